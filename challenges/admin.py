@@ -1,8 +1,35 @@
 # challenges/admin.py
 from django.contrib import admin
 from django import forms
-import cloudinary.uploader
-from .models import Letter, Word, Challenge, Comment, UserProgress, YesNoQuestion, FunctionalPhrase
+from django.utils.html import format_html
+from .models import (Letter, Word, Challenge, Comment, UserProgress, YesNoQuestion,
+                     FunctionalPhrase, AudioSprite, ReviewState, ProgressAttempt)
+from .uploads import upload_word_audio, upload_yes_no_visual, upload_phrase_visual
+from speechfun_backend.large_admin import LargeTableAdmin
+from . import item_stats
+from .attempts import PROGRESS_TARGETS
+
+
+# Attempts / completion rate / average score columns (challenges/item_stats.py),
+# sortable - the numbers are stored, so it's one LEFT JOIN, not a GROUP BY
+# over all progress rows.
+class ItemStatsColumns:
+    stats_columns = ('stats_attempts', 'stats_completion_rate', 'stats_average_score')
+
+    def get_queryset(self, request):
+        return item_stats.annotate(super().get_queryset(request))
+
+    @admin.display(ordering='stats_attempts', description='Attempts')
+    def stats_attempts(self, obj):
+        return obj.stats_attempts
+
+    @admin.display(ordering='completion_rate', description='Completed')
+    def stats_completion_rate(self, obj):
+        return '-' if obj.completion_rate is None else f"{obj.completion_rate:.0%}"
+
+    @admin.display(ordering='average_score', description='Avg score')
+    def stats_average_score(self, obj):
+        return '-' if obj.average_score is None else f"{obj.average_score:.1f}"
 
 # Custom form for YesNoQuestion - uploads image/video to Cloudinary
 
@@ -29,26 +56,10 @@ class YesNoQuestionAdminForm(forms.ModelForm):
             file = self.files['visual_file']
 
             try:
-                safe_question = (
-                    instance.question.lower()
-                    .replace('?', '')
-                    .replace(
-                        ' ', '_')
-                    .replace('/', '_')
-                    .replace('\\', '_')
-                )[:50]
-                upload_result = cloudinary.uploader.upload(
-                    file,
-                    resource_type="auto",  # auto-detect image or video
-                    folder="speechfun-kids/yesno-visuals",
-                    public_id=f"q_{safe_question}",
-                    overwrite=True,
-                    quality="auto",
-                    fetch_format="auto",
-                )
-
-                instance.visual_url = upload_result['secure_url']
-                print(f"✅ Uploaded to Cloudinary: {instance.visual_url}")
+                for field, value in upload_yes_no_visual(file, instance.question).items():
+                    setattr(instance, field, value)
+                print(f"✅ Uploaded to Cloudinary: {instance.visual_url} "
+                      f"({len(instance.visual_variants)} variants)")
 
             except Exception as e:
                 print(f"❌ Cloudinary upload failed: {e}")
@@ -61,9 +72,9 @@ class YesNoQuestionAdminForm(forms.ModelForm):
 
 
 @admin.register(YesNoQuestion)
-class YesNoQuestionAdmin(admin.ModelAdmin):
+class YesNoQuestionAdmin(ItemStatsColumns, admin.ModelAdmin):
     form = YesNoQuestionAdminForm
-    list_display = ('question', 'correct_answer', 'has_visual')
+    list_display = ('question', 'correct_answer', 'has_visual', *ItemStatsColumns.stats_columns)
     list_filter = ('correct_answer',)
     search_fields = ('question', 'scene_description')
 
@@ -91,25 +102,10 @@ class FunctionalPhraseAdminForm(forms.ModelForm):
             file = self.files['visual_file']
 
             try:
-                safe_phrase = (
-                    instance.phrase.lower()
-                    .replace('?', '')
-                    .replace(' ', '_')
-                    .replace('/', '_')
-                    .replace('\\', '_')
-                )[:50]
-                upload_result = cloudinary.uploader.upload(
-                    file,
-                    resource_type="auto",
-                    folder="speechfun-kids/functional-visuals",
-                    public_id=f"phrase_{safe_phrase}",
-                    overwrite=True,
-                    quality="auto",
-                    fetch_format="auto",
-                )
-
-                instance.visual_url = upload_result['secure_url']
-                print(f"✅ Functional Phrase uploaded: {instance.visual_url}")
+                for field, value in upload_phrase_visual(file, instance.phrase).items():
+                    setattr(instance, field, value)
+                print(f"✅ Functional Phrase uploaded: {instance.visual_url} "
+                      f"({len(instance.visual_variants)} variants)")
 
             except Exception as e:
                 print(f"❌ Cloudinary upload failed: {e}")
@@ -122,9 +118,9 @@ class FunctionalPhraseAdminForm(forms.ModelForm):
 
 
 @admin.register(FunctionalPhrase)
-class FunctionalPhraseAdmin(admin.ModelAdmin):
+class FunctionalPhraseAdmin(ItemStatsColumns, admin.ModelAdmin):
     form = FunctionalPhraseAdminForm
-    list_display = ('phrase', 'has_visual')
+    list_display = ('phrase', 'has_visual', *ItemStatsColumns.stats_columns)
     search_fields = ('phrase',)
 
     @admin.display(boolean=True, description='Visual')
@@ -160,16 +156,9 @@ class WordAdminForm(forms.ModelForm):
             audio_file = self.files['audio_file']
 
             try:
-                # Upload to Cloudinary
-                upload_result = cloudinary.uploader.upload(
-                    audio_file,
-                    resource_type="auto",
-                    folder="speechfun-kids/audios",
-                    public_id=f"{instance.word.lower().replace(' ', '_')}"
-                )
-
-                # Save the Cloudinary URL
-                instance.audio = upload_result['secure_url']
+                # Upload to Cloudinary and save the URL
+                for field, value in upload_word_audio(audio_file, instance.word).items():
+                    setattr(instance, field, value)
                 print(f"✅ Uploaded to Cloudinary: {instance.audio}")
 # self.add_error comes from Django's base Form class — and since ModelForm inherits from Form,
 # your WordAdminForm automatically gets this method.
@@ -189,14 +178,28 @@ class WordAdmin(admin.ModelAdmin):
     list_display = ('word', 'letter', 'difficulty', 'has_audio')
     list_filter = ('difficulty', 'letter')
     search_fields = ('word',)
+    list_select_related = ('letter',)
 
     @admin.display(boolean=True, description='Audio')
     def has_audio(self, obj):
         return bool(obj.audio)
 
 
+# Sprites are built by `manage.py build_audio_sprites` - read-only here.
+@admin.register(AudioSprite)
+class AudioSpriteAdmin(admin.ModelAdmin):
+    list_display = ('letter', 'clip_count', 'duration_ms', 'bytes', 'built_at')
+    list_select_related = ('letter',)
+    readonly_fields = ('letter', 'url', 'source_hash', 'duration_ms', 'bytes',
+                       'manifest', 'built_at')
+
+    @admin.display(description='Clips')
+    def clip_count(self, obj):
+        return len(obj.manifest.get('clips', []))
+
+
 @admin.register(Challenge)
-class ChallengeAdmin(admin.ModelAdmin):
+class ChallengeAdmin(LargeTableAdmin, ItemStatsColumns, admin.ModelAdmin):
     list_display = (
         'title',
         'get_letter',           # custom method instead of 'letter'
@@ -204,6 +207,7 @@ class ChallengeAdmin(admin.ModelAdmin):
         'get_word_audio',
         'difficulty',
         'created_at',
+        *ItemStatsColumns.stats_columns,
     )
     list_filter = (
         'difficulty',
@@ -214,7 +218,9 @@ class ChallengeAdmin(admin.ModelAdmin):
         'description',
         'word__word',           # search inside the word name
     )
-    date_hierarchy = 'created_at'
+    date_hierarchy = 'created_at'   # the catalog is small - fine here
+    list_select_related = ('word__letter',)   # letter + audio columns, no query per row
+    autocomplete_fields = ('word',)
 
     # Custom method to display the letter nicely
     @admin.display(ordering='word__letter__letter', description='Letter')
@@ -230,12 +236,41 @@ class ChallengeAdmin(admin.ModelAdmin):
         return "❌ No audio"
 
 
+class ItemTypeFilter(admin.SimpleListFilter):
+    # 'letter' / 'yes_no' / 'functional' written out - the default filter of
+    # a CharField finds its values with SELECT DISTINCT over the whole table
+    title = 'item type'
+    parameter_name = 'item_type'
+
+    def lookups(self, request, model_admin):
+        return [(item_type, item_type) for item_type in PROGRESS_TARGETS]
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(**{self.parameter_name: self.value()})
+        return queryset
+
+
+class ChallengeTypeFilter(ItemTypeFilter):
+    title = 'challenge type'
+    parameter_name = 'challenge_type'
+
+
 @admin.register(Comment)
-class CommentAdmin(admin.ModelAdmin):
-    list_display = ('user', 'challenge', 'created_at', 'short_text')
-    list_filter = ('challenge', 'created_at')
-    search_fields = ('text', 'user__username')
-    date_hierarchy = 'created_at'
+class CommentAdmin(LargeTableAdmin, admin.ModelAdmin):
+    # the comments of one challenge: click its name in the list
+    # (?challenge__id__exact=, on the challenge_id index) - a 'challenge'
+    # list_filter would put every challenge in the sidebar
+    list_display = ('user', 'challenge_link', 'created_at', 'short_text')
+    list_filter = ('created_at',)
+    search_fields = ('text', '=user__username')
+    list_select_related = ('user', 'challenge__word')
+    autocomplete_fields = ('user', 'challenge')
+
+    @admin.display(ordering='challenge', description='Challenge')
+    def challenge_link(self, obj):
+        return format_html('<a href="?challenge__id__exact={}">{}</a>',
+                           obj.challenge_id, obj.challenge)
 
     def short_text(self, obj):
         return obj.text[:50] + '...' if len(obj.text) > 50 else obj.text
@@ -243,15 +278,18 @@ class CommentAdmin(admin.ModelAdmin):
 
 
 @admin.register(UserProgress)
-class UserProgressAdmin(admin.ModelAdmin):
-    list_display = ('user', 'challenge', 'completed', 'score', 'updated_at')
-    list_filter = ('completed', 'challenge__difficulty')
-    search_fields = ('user__username', 'challenge__title')
-    date_hierarchy = 'updated_at'
+class UserProgressAdmin(LargeTableAdmin, admin.ModelAdmin):
+    # millions of rows: filters on the row's own columns only (no JOIN to
+    # Challenge for the difficulty), an exact username search (its unique
+    # index) and no date_hierarchy - see speechfun_backend/large_admin.py
+    list_display = ('user', 'challenge', 'challenge_type', 'completed', 'score', 'updated_at')
+    list_filter = (ChallengeTypeFilter, 'completed')
+    search_fields = ('=user__username',)
+    autocomplete_fields = ('user', 'challenge', 'yes_no_question', 'functional_phrase')
 
     def get_queryset(self, request):
         # Optimize queries
-        return super().get_queryset(request).select_related('user', 'challenge')
+        return super().get_queryset(request).select_related('user', 'challenge__word')
 
 # Without it (return super()......above):
 
@@ -269,3 +307,32 @@ class UserProgressAdmin(admin.ModelAdmin):
 # Django makes 1 query using SQL JOINs
 # Gets UserProgress + User + Challenge all at once
 # 100 records = 1 query ⚡
+
+
+@admin.register(ReviewState)
+class ReviewStateAdmin(LargeTableAdmin, admin.ModelAdmin):
+    # Spaced-repetition state (challenges/scheduler.py) - mostly for looking
+    # at why a kid gets a certain item; progress writes keep it up to date.
+    list_display = ('user', 'item_type', 'item_id', 'due_at', 'interval_days',
+                    'ease', 'repetitions', 'last_quality')
+    list_filter = (ItemTypeFilter,)
+    search_fields = ('=user__username',)
+    raw_id_fields = ('user',)   # a dropdown of every user would be huge
+    list_select_related = ('user',)
+
+
+@admin.register(ProgressAttempt)
+class ProgressAttemptAdmin(LargeTableAdmin, admin.ModelAdmin):
+    # Every progress submission (challenges/attempts.py) - the history a
+    # therapist looks at. Insert-only: nothing here can be edited or added.
+    list_display = ('user', 'item_type', 'item_id', 'completed', 'score', 'created_at')
+    list_filter = (ItemTypeFilter, 'completed')
+    search_fields = ('=user__username',)
+    raw_id_fields = ('user',)
+    list_select_related = ('user',)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,17 @@
+# Async (ASGI) versions of the hot endpoints in urls.py - see async_views.py.
+# Mounted at /api/async/challenges/, same paths as /api/challenges/.
+from django.urls import path
+from . import async_views
+
+
+urlpatterns = [
+    path('letters/', async_views.letter_list, name='async-letter-list'),
+    path('letters/<int:letter_id>/challenges/', async_views.challenges_by_letter,
+         name='async-challenges-by-letter'),
+    path('challenges/<int:pk>/', async_views.challenge_detail,
+         name='async-challenge-detail'),
+    path('challenges/<int:challenge_id>/comments/', async_views.comment_list,
+         name='async-comment-list'),
+    path('progress/', async_views.get_user_progress, name='async-get-user-progress'),
+    path('progress/update/', async_views.update_progress, name='async-update-progress'),
+]
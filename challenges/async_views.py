@@ -0,0 +1,194 @@
+# challenges/async_views.py
+# Async versions of the hot endpoints, for running under ASGI:
+#
+#   uvicorn speechfun_backend.asgi:application --workers 4
+#
+# Same URLs as challenges/urls.py but under /api/async/challenges/, and the
+# exact same JSON (tests compare the bytes). DRF views are sync-only, so these
+# are plain Django async views using the async ORM (aget, async for, asave...):
+# while one request waits for the database, the worker serves other requests
+# instead of blocking a whole thread/process.
+#
+# Things that would quietly break the "async" part - keep them out of here:
+#   - lazy relations (challenge.word inside async code raises
+#     SynchronousOnlyOperation) → select_related everything the serializer shows
+#   - str(progress) and friends, which load related rows
+#   - anything from views.py that does sync DB work
+#
+# The async ORM has no transactions: writes that must commit together
+# (update_progress) go in a sync function run through sync_to_async.
+#
+# Auth is Token only (what the app sends): no cookies → no CSRF to check.
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import transaction
+from django.http import HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+
+from . import attempts, item_stats, scheduler
+# challenge_type → (model, UserProgress field, 404 message)
+from .attempts import PROGRESS_TARGETS
+from .models import Challenge, Comment, Letter, UserProgress
+from .serializers import ChallengeSerializer, CommentSerializer, LetterSerializer
+
+
+def json_response(data, status=200, **headers):
+    # DRF's renderer, so the bytes match what the sync views send
+    response = HttpResponse(JSONRenderer().render(data), status=status,
+                            content_type='application/json')
+    for name, value in headers.items():
+        response[name.replace('_', '-')] = value
+    return response
+
+
+def not_authenticated(detail='Authentication credentials were not provided.'):
+    # same status, body and header as DRF's TokenAuthentication
+    return json_response({'detail': detail}, status=401, WWW_Authenticate='Token')
+
+
+async def authenticate(request):
+    """Async TokenAuthentication. Returns (user or None, error response or None)."""
+    keyword, _, key = request.headers.get('Authorization', '').partition(' ')
+    if keyword.lower() != 'token':
+        return None, None
+    key = key.strip()
+    if not key or ' ' in key:
+        return None, not_authenticated('Invalid token header.')
+    try:
+        token = await Token.objects.select_related('user').aget(key=key)
+    except Token.DoesNotExist:
+        return None, not_authenticated('Invalid token.')
+    if not token.user.is_active:
+        return None, not_authenticated('User inactive or deleted.')
+    # the DB router reads request.user (read-your-writes stickiness)
+    request.user = token.user
+    return token.user, None
+
+
+@require_GET
+async def letter_list(request):
+    letters = [letter async for letter in Letter.objects.all()]
+    return json_response(LetterSerializer(letters, many=True).data)
+
+
+@require_GET
+async def challenges_by_letter(request, letter_id):
+    queryset = Challenge.objects.select_related(
+        'word__letter').filter(word__letter_id=letter_id)
+    difficulty = request.GET.get('difficulty')
+    if difficulty in ['easy', 'medium', 'hard']:
+        queryset = queryset.filter(difficulty=difficulty)
+    challenges = [c async for c in queryset.order_by('difficulty', 'title')]
+    return json_response(ChallengeSerializer(challenges, many=True).data)
+
+
+@require_GET
+async def challenge_detail(request, pk):
+    try:
+        challenge = await Challenge.objects.select_related('word__letter').aget(pk=pk)
+    except Challenge.DoesNotExist:
+        return json_response({'detail': 'No Challenge matches the given query.'}, status=404)
+    return json_response(ChallengeSerializer(challenge).data)
+
+
+@require_GET
+async def comment_list(request, challenge_id):
+    comments = [c async for c in Comment.objects.filter(challenge_id=challenge_id)
+                .select_related('user').order_by('-created_at')]
+    return json_response(CommentSerializer(comments, many=True).data)
+
+
+@require_GET
+async def get_user_progress(request):
+    user, error = await authenticate(request)
+    if error or user is None:
+        return error or not_authenticated()
+
+    result = []
+    rows = UserProgress.objects.filter(user=user).values_list(
+        'challenge_id', 'yes_no_question_id', 'functional_phrase_id',
+        'challenge_type', 'completed', 'score')
+    async for challenge_id, yes_no_id, phrase_id, challenge_type, completed, score in rows:
+        item_id = challenge_id or yes_no_id or phrase_id
+        if not item_id:
+            continue
+        result.append({'challenge': item_id, 'type': challenge_type,
+                       'completed': completed, 'score': score})
+    return json_response(result)
+
+
+@csrf_exempt   # token auth only, see the top of this file
+@require_POST
+async def update_progress(request):
+    user, error = await authenticate(request)
+    if error or user is None:
+        return error or not_authenticated()
+
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError as e:
+            return json_response({'detail': f'JSON parse error - {e}'}, status=400)
+    else:
+        data = request.POST
+    challenge_id = data.get('challenge')
+    challenge_type = data.get('challenge_type', 'letter')
+    completed = data.get('completed', False)
+    score = data.get('score', 0)
+
+    if not challenge_id:
+        return json_response({'error': 'Challenge ID required'}, status=400)
+
+    stored_type = challenge_type if challenge_type in PROGRESS_TARGETS else 'letter'
+    model, field, missing = PROGRESS_TARGETS[stored_type]
+    try:
+        if settings.PROGRESS_WRITES == 'rollup':
+            # only the attempt - rollup_attempts applies it (attempts.py)
+            if not await model.objects.filter(id=challenge_id).aexists():
+                return json_response({'error': missing}, status=404)
+            await attempts.arecord_attempt(user, stored_type, challenge_id, completed, score,
+                                           applied=False)
+        else:
+            try:
+                item = await model.objects.aget(id=challenge_id)
+            except model.DoesNotExist:
+                return json_response({'error': missing}, status=404)
+
+            def save():
+                # one transaction, like views.update_progress (see item_stats.py)
+                with transaction.atomic():
+                    progress, created = UserProgress.objects.get_or_create(
+                        user=user, **{field: item},
+                        defaults={'completed': completed, 'score': score,
+                                  'challenge_type': stored_type})
+                    previous = None if created else (progress.completed, progress.score)
+                    if not created:
+                        progress.completed = completed
+                        progress.score = score
+                        progress.save()
+                    scheduler.record_review(user, stored_type, item.pk, score, completed)
+                    attempts.record_attempt(user, stored_type, item.pk, completed, score)
+                    item_stats.apply_delta(field, item.pk,
+                                           item_stats.progress_delta(previous, completed, score))
+
+            await sync_to_async(save)()
+            print(f"✅ {stored_type} progress saved: user {user.pk}, item {item.pk}")
+    except Exception as e:
+        print(f"❌ Progress update error: {type(e).__name__}: {e}")
+        return json_response({'error': str(e)}, status=500)
+
+    return json_response({
+        'success': True,
+        'progress': {
+            'challenge': challenge_id,
+            'type': challenge_type,
+            'completed': completed,
+            'score': score
+        }
+    })
+
@@ -0,0 +1,202 @@
+# challenges/attempts.py
+# The progress attempt log: every submission, never overwritten.
+#
+# UserProgress only keeps the LATEST completed/score per item, so a
+# therapist can't see how a kid got there (5 tries? scores going up?). And
+# updating the same hot rows again and again leaves a dead row version
+# behind on Postgres every time (MVCC bloat, vacuum work).
+#
+# So every progress write also appends a ProgressAttempt row:
+#
+#   PROGRESS_WRITES='inline'   (default) the request appends the attempt AND
+#                              updates UserProgress/ReviewState, like before
+#   PROGRESS_WRITES='rollup'   the request ONLY appends the attempt (one
+#                              INSERT, no hot row touched);
+#                              `manage.py rollup_attempts` folds new attempts
+#                              into UserProgress and ReviewState in batches
+#
+# Either way "what is the latest state" is still one UserProgress/ReviewState
+# row - reads stay O(1), whatever the history's size. With 'rollup' they
+# show a submission once the next rollup has run (run it every minute).
+#
+# Postgres: the table is partitioned by month of created_at (migration 0019).
+# rollup_attempts creates the coming months' partitions; old months can be
+# detached/dropped as a whole when the history isn't needed any more.
+#
+# The rollup goes through the log in id order and remembers how far it got
+# (AttemptRollup). It leaves the newest PROGRESS_ROLLUP_LAG_SECONDS alone:
+# ids are handed out before the INSERT commits, so a slow transaction could
+# otherwise commit an attempt BEHIND the point the rollup already passed.
+import datetime
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+from django.utils import timezone
+
+from . import item_stats, scheduler
+from .models import (AttemptRollup, Challenge, FunctionalPhrase, ProgressAttempt,
+                     ReviewState, UserProgress, YesNoQuestion)
+
+# challenge_type → (content model, its UserProgress field, 404 message).
+# Anything else is treated as 'letter', like update_progress always did.
+PROGRESS_TARGETS = {
+    'yes_no': (YesNoQuestion, 'yes_no_question', 'Yes/No question not found'),
+    'functional': (FunctionalPhrase, 'functional_phrase', 'Functional phrase not found'),
+    'letter': (Challenge, 'challenge', 'Challenge not found'),
+}
+ROLLUP_NAME = 'progress'
+
+
+def record_attempt(user, item_type, item_id, completed, score, applied=True):
+    return ProgressAttempt.objects.create(
+        user=user, item_type=item_type, item_id=item_id,
+        completed=completed, score=score, applied=applied)
+
+
+async def arecord_attempt(user, item_type, item_id, completed, score, applied=True):
+    return await ProgressAttempt.objects.acreate(
+        user=user, item_type=item_type, item_id=item_id,
+        completed=completed, score=score, applied=applied)
+
+
+def roll_up(batch_size=5000, now=None):
+    """Fold every attempt old enough into UserProgress/ReviewState.
+    Returns how many attempts were read."""
+    cutoff = (now or timezone.now()) - datetime.timedelta(
+        seconds=settings.PROGRESS_ROLLUP_LAG_SECONDS)
+    AttemptRollup.objects.get_or_create(name=ROLLUP_NAME)
+    total = 0
+    while True:
+        with transaction.atomic():
+            # one rollup at a time - a second one waits here
+            state = AttemptRollup.objects.select_for_update().get(name=ROLLUP_NAME)
+            attempts = list(ProgressAttempt.objects
+                            .filter(id__gt=state.last_attempt_id)
+                            .order_by('id')[:batch_size])
+            # stop at the first one that is too new (see the top of this file)
+            for position, attempt in enumerate(attempts):
+                if attempt.created_at > cutoff:
+                    attempts = attempts[:position]
+                    break
+            if not attempts:
+                return total
+            fold(attempts)
+            state.last_attempt_id = attempts[-1].id
+            state.rolled_up_at = timezone.now()
+            state.save()
+        total += len(attempts)
+        if len(attempts) < batch_size:
+            return total
+
+
+def fold(attempts):
+    """Apply the attempts not applied by their request yet (in id order)."""
+    pending = [a for a in attempts if not a.applied]
+    if not pending:
+        return
+    # items deleted since the attempt: nothing left to update
+    existing = set()
+    for item_type, (model, _, _) in PROGRESS_TARGETS.items():
+        ids = {a.item_id for a in pending if a.item_type == item_type}
+        if ids:
+            existing.update((item_type, pk) for pk in
+                            model.objects.filter(pk__in=ids).values_list('pk', flat=True))
+    pending = [a for a in pending if (a.item_type, a.item_id) in existing]
+
+    # UserProgress: the latest attempt per (user, item) wins
+    latest = {(a.user_id, a.item_type, a.item_id): a for a in pending}
+    for item_type, (_, field, _) in PROGRESS_TARGETS.items():
+        keys = [(user_id, item_id) for (user_id, kind, item_id) in latest if kind == item_type]
+        if not keys:
+            continue
+        # the rows as they were, for the per-item stats (item_stats.py)
+        previous = {(user_id, item_id): (completed, score) for user_id, item_id, completed, score
+                    in rows_with_keys(UserProgress.objects.all(), ('user_id', f'{field}_id'), keys)
+                    .values_list('user_id', f'{field}_id', 'completed', 'score')}
+        rows = [UserProgress(user_id=user_id, challenge_type=item_type,
+                             completed=latest[user_id, item_type, item_id].completed,
+                             score=latest[user_id, item_type, item_id].score,
+                             **{f'{field}_id': item_id})
+                for user_id, item_id in keys]
+        UserProgress.objects.bulk_create(
+            rows, update_conflicts=True, unique_fields=['user', field],
+            update_fields=['completed', 'score', 'challenge_type', 'updated_at'])
+        deltas = []
+        for a in pending:
+            if a.item_type == item_type:
+                deltas.append((a.item_id, item_stats.progress_delta(
+                    previous.get((a.user_id, a.item_id)), a.completed, a.score)))
+                previous[a.user_id, a.item_id] = (a.completed, a.score)
+        item_stats.apply_deltas(field, deltas)
+
+    # ReviewState: every attempt is a review, oldest first
+    states = {(s.user_id, s.item_type, s.item_id): s for s in review_states(latest)}
+    changed = {}
+    for a in pending:
+        key = (a.user_id, a.item_type, a.item_id)
+        state = changed.get(key) or states.get(key) or scheduler.new_state(*key, a.created_at)
+        changed[key] = scheduler.schedule(state, scheduler.quality(a.score, a.completed),
+                                          a.created_at)
+    for state in changed.values():
+        state.pk = None   # written by the upsert below, matched on (user, item)
+    ReviewState.objects.bulk_create(list(changed.values()), **scheduler.UPSERT)
+
+
+def rows_with_keys(queryset, columns, keys):
+    """The rows of `queryset` whose `columns` equal one of `keys` (tuples).
+
+    One (col, col, ...) IN (VALUES ...) query, which both Postgres and
+    SQLite answer with the unique index. "users IN (...) AND items IN (...)"
+    would read almost the whole table on a busy day, and thousands of OR-ed
+    conditions take seconds just to plan.
+    """
+    keys = list(keys)
+    if not keys:
+        return queryset.none()
+    names = ', '.join(f'"{column}"' for column in columns)
+    rows = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(keys))
+    params = [value for key in keys for value in key]
+    return queryset.filter(RawSQL(f'({names}) IN (VALUES {rows})', params,
+                                  output_field=BooleanField()))
+
+
+def review_states(keys):
+    """The ReviewStates of exactly these (user_id, item_type, item_id) keys."""
+    return rows_with_keys(ReviewState.objects.all(), ('user_id', 'item_type', 'item_id'), keys)
+
+
+def ensure_partitions(months_ahead=None, today=None):
+    """Postgres: create the monthly partitions up to `months_ahead` months
+    from now. Returns the names of the ones created."""
+    if connection.vendor != 'postgresql':
+        return []
+    if months_ahead is None:
+        months_ahead = settings.ATTEMPT_PARTITIONS_AHEAD
+    table = ProgressAttempt._meta.db_table
+    today = today or timezone.now().date()
+    year, month = today.year, today.month
+    created = []
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT c.relname FROM pg_inherits i "
+                       "JOIN pg_class c ON c.oid = i.inhrelid "
+                       "JOIN pg_class p ON p.oid = i.inhparent WHERE p.relname = %s", [table])
+        existing = {name for (name,) in cursor.fetchall()}
+        for _ in range(months_ahead + 1):
+            start = datetime.date(year, month, 1)
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+            name = f'{table}_y{start:%Y}m{start:%m}'
+            if name in existing:
+                continue
+            try:
+                with transaction.atomic():
+                    cursor.execute(
+                        f"CREATE TABLE {name} PARTITION OF {table} "
+                        f"FOR VALUES FROM ('{start}') TO ('{datetime.date(year, month, 1)}')")
+                created.append(name)
+            except Exception as e:
+                # the default partition already holds rows of that month -
+                # they stay there, which works, just without the monthly split
+                print(f"❌ Could not create partition {name}: {e}")
+    return created
@@ -0,0 +1,130 @@
+# challenges/audio.py
+# Tiny MP3 reader - just enough to glue word clips into one sprite file.
+#
+# An MP3 file is (optional ID3 tag) + a run of independent "frames" + (optional
+# ID3v1 tag). Each frame header tells us its length and how many audio samples
+# it holds, so we can:
+#   - work out a clip's duration without decoding any audio
+#   - concatenate the frames of several clips into one playable file
+#     and know the exact millisecond offset where each clip starts
+# No ffmpeg needed.
+from collections import namedtuple
+
+# kbps, indexed by [version_is_mpeg1][layer][bitrate_index]
+BITRATES = {
+    True: {
+        1: [0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+        2: [0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+        3: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    },
+    False: {
+        1: [0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+        2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+        3: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    },
+}
+# Hz, indexed by version bits (0 = MPEG2.5, 2 = MPEG2, 3 = MPEG1)
+SAMPLE_RATES = {
+    0: [11025, 12000, 8000],
+    2: [22050, 24000, 16000],
+    3: [44100, 48000, 32000],
+}
+
+Mp3Clip = namedtuple('Mp3Clip', ['frames', 'samples', 'sample_rate', 'duration_ms'])
+
+
+def _frame_info(data, pos):
+    """Return (length, samples, sample_rate) of the frame at pos, or None."""
+    if pos + 4 > len(data):
+        return None
+    b1, b2 = data[pos + 1], data[pos + 2]
+    if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0:
+        return None
+
+    version = (b1 >> 3) & 0x03      # 0 = 2.5, 1 = reserved, 2 = 2, 3 = 1
+    layer = 4 - ((b1 >> 1) & 0x03)  # header stores 3 for layer I, 1 for layer III
+    bitrate_index = (b2 >> 4) & 0x0F
+    rate_index = (b2 >> 2) & 0x03
+    padding = (b2 >> 1) & 0x01
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    bitrate = BITRATES[mpeg1][layer][bitrate_index] * 1000
+    sample_rate = SAMPLE_RATES[version][rate_index]
+
+    if layer == 1:
+        length = (12 * bitrate // sample_rate + padding) * 4
+        samples = 384
+    elif layer == 2 or mpeg1:
+        length = 144 * bitrate // sample_rate + padding
+        samples = 1152
+    else:  # layer III, MPEG2 / 2.5
+        length = 72 * bitrate // sample_rate + padding
+        samples = 576
+    return length, samples, sample_rate
+
+
+def _skip_id3v2(data):
+    if data[:3] != b'ID3' or len(data) < 10:
+        return 0
+    # tag size is "syncsafe": 4 bytes of 7 bits each
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return 10 + size + footer
+
+
+def parse_mp3(data):
+    """Split an MP3 into its audio frames.
+
+    Returns Mp3Clip(frames, samples, sample_rate, duration_ms), with tags and the
+    Xing/Info/VBRI header frame removed (they'd play as a glitch mid-sprite).
+    Returns None if the data doesn't look like an MP3.
+    """
+    end = len(data)
+    if end >= 128 and data[end - 128:end - 125] == b'TAG':
+        end -= 128  # ID3v1 tag
+
+    pos = _skip_id3v2(data)
+    chunks = []
+    total_samples = 0
+    sample_rate = None
+    first = True
+
+    while pos < end:
+        info = _frame_info(data, pos)
+        if info is None or pos + info[0] > end:
+            if chunks:
+                break  # trailing junk after the audio
+            # junk before the first frame - jump to the next possible sync byte
+            pos = data.find(b'\xff', pos + 1, end)
+            if pos == -1:
+                break
+            continue
+        length, samples, rate = info
+        frame = data[pos:pos + length]
+        pos += length
+
+        if first:
+            first = False
+            if b'Xing' in frame or b'Info' in frame or b'VBRI' in frame:
+                continue
+        if sample_rate is None:
+            sample_rate = rate
+        chunks.append(frame)
+        total_samples += samples
+
+    if not chunks:
+        return None
+    return Mp3Clip(
+        frames=b''.join(chunks),
+        samples=total_samples,
+        sample_rate=sample_rate,
+        duration_ms=round(total_samples * 1000 / sample_rate),
+    )
+
+
+def mp3_duration_ms(data):
+    """Duration of an MP3 in milliseconds, or None if it isn't one."""
+    clip = parse_mp3(data)
+    return clip.duration_ms if clip else None
@@ -0,0 +1,125 @@
+# challenges/bundles.py
+# Offline bundles: one file per letter with everything the app needs to run
+# that letter with no internet (words, challenges, media manifest).
+#
+# - The file name contains a hash of its content, so a given URL never
+#   changes content and can be cached forever (see
+#   speechfun_backend/middleware.py for the cache headers).
+# - A .gz copy sits next to each file; WhiteNoise serves it to clients
+#   that accept gzip.
+# - build_letter_bundle() is cheap (a few queries, no network), so it runs
+#   right after any admin edit that touches the letter (see signals.py).
+import gzip
+import hashlib
+import json
+from pathlib import Path
+
+from django.conf import settings
+from speechfun_backend.metrics import record_cache
+
+from .models import AudioSprite, Challenge, Letter, OfflineBundle, Word
+from .serializers import (AudioSpriteSerializer, ChallengeSerializer,
+                          WordSerializer)
+
+BUNDLE_FORMAT_VERSION = 1
+
+
+def bundle_dir():
+    path = Path(settings.OFFLINE_BUNDLE_ROOT)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def bundle_content(letter):
+    """The bundle as a dict. No timestamps of its own - same data, same hash."""
+    words = Word.objects.filter(letter=letter).order_by('word', 'id')
+    challenges = (Challenge.objects.filter(word__letter=letter)
+                  .select_related('word__letter').order_by('difficulty', 'title', 'id'))
+    sprite = AudioSprite.objects.filter(letter=letter).select_related('letter').first()
+
+    word_data = WordSerializer(words, many=True).data
+    media = [
+        {'kind': 'audio', 'word_id': w['id'], 'url': w['audio'],
+         'bytes': w['audio_bytes'], 'duration_ms': w['audio_duration_ms']}
+        for w in word_data if w['audio']
+    ]
+    if sprite:
+        media.append({'kind': 'audio_sprite', 'url': sprite.url,
+                      'bytes': sprite.bytes, 'duration_ms': sprite.duration_ms})
+
+    return {
+        'version': BUNDLE_FORMAT_VERSION,
+        'letter': {'id': letter.id, 'letter': letter.letter},
+        'words': word_data,
+        'challenges': ChallengeSerializer(challenges, many=True).data,
+        'audio_sprite': AudioSpriteSerializer(sprite).data if sprite else None,
+        'media': media,
+    }
+
+
+def build_letter_bundle(letter):
+    """Write the letter's bundle if its content changed (or its file is gone).
+
+    Returns (OfflineBundle, built).
+    """
+    content = bundle_content(letter)
+    # built_at of the sprite changes on every rebuild even if nothing else did
+    if content['audio_sprite']:
+        content['audio_sprite'].pop('built_at', None)
+    raw = json.dumps(content, sort_keys=True, separators=(',', ':'),
+                     ensure_ascii=False).encode('utf-8')
+    content_hash = hashlib.sha256(raw).hexdigest()
+    filename = f"letter-{letter.id}.{content_hash[:16]}.json"
+    path = bundle_dir() / filename
+
+    existing = OfflineBundle.objects.filter(letter=letter).first()
+    up_to_date = (existing is not None and existing.content_hash == content_hash
+                  and path.exists())
+    record_cache('offline_bundle', up_to_date)
+    if up_to_date:
+        return existing, False
+
+    path.write_bytes(raw)
+    # mtime=0 keeps the .gz byte-identical between rebuilds
+    path.with_name(filename + '.gz').write_bytes(gzip.compress(raw, 9, mtime=0))
+
+    bundle, _ = OfflineBundle.objects.update_or_create(
+        letter=letter,
+        defaults={
+            'filename': filename,
+            'content_hash': content_hash,
+            'bytes': len(raw),
+            'gzip_bytes': path.with_name(filename + '.gz').stat().st_size,
+        },
+    )
+    _prune(letter, keep={filename, existing.filename if existing else None})
+    return bundle, True
+
+
+def build_letter_bundle_by_id(letter_id):
+    letter = Letter.objects.filter(pk=letter_id).first()
+    if letter is None:
+        return None, False
+    return build_letter_bundle(letter)
+
+
+def build_all_bundles():
+    """Build every letter's bundle; returns how many were (re)written."""
+    built = 0
+    for letter in Letter.objects.order_by('letter'):
+        built += build_letter_bundle(letter)[1]
+    return built
+
+
+def delete_letter_bundles(letter_id):
+    """Remove a deleted letter's files (its OfflineBundle row cascades)."""
+    for old in bundle_dir().glob(f"letter-{letter_id}.*.json*"):
+        old.unlink(missing_ok=True)
+
+
+def _prune(letter, keep):
+    # Keep the new file and the one it replaces (a client may be halfway
+    # through downloading it); anything older can go.
+    for old in bundle_dir().glob(f"letter-{letter.id}.*.json*"):
+        if old.name.removesuffix('.gz') not in keep:
+            old.unlink(missing_ok=True)
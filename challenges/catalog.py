@@ -0,0 +1,73 @@
+# challenges/catalog.py
+# Shared bits for the import_catalog / export_catalog management commands.
+#
+# A catalog is five sections. On disk it is either ONE json file:
+#   {"letters": [...], "words": [...], "challenges": [...],
+#    "yes_no_questions": [...], "functional_phrases": [...]}
+# or a DIRECTORY with one csv per section (letters.csv, words.csv, ...).
+# Both formats use the same column names, so an export can be re-imported.
+import csv
+import json
+from pathlib import Path
+
+# section name → columns (in export order)
+# *_file columns are only used on import: a path (relative to --media-dir)
+# of an mp3/image/video that gets uploaded to Cloudinary.
+SECTIONS = {
+    'letters': ['letter'],
+    'words': ['letter', 'word', 'difficulty', 'audio', 'audio_file'],
+    'challenges': ['letter', 'word', 'title', 'description', 'difficulty'],
+    'yes_no_questions': ['question', 'scene_description', 'correct_answer',
+                         'visual_url', 'visual_file'],
+    'functional_phrases': ['phrase', 'visual_url', 'visual_file'],
+}
+
+# Natural keys - how we recognise "the same row" between two imports.
+# Everything is compared lowercased so "Apple" and "apple" are one word.
+
+
+def letter_key(letter):
+    return letter.strip().lower()
+
+
+def word_key(letter, word):
+    return (letter_key(letter), word.strip().lower())
+
+
+def challenge_key(letter, word, title):
+    return word_key(letter, word) + (title.strip().lower(),)
+
+
+def text_key(text):
+    return text.strip().lower()
+
+
+def load_catalog(source):
+    """Read a catalog from a .json file or a directory of csv files.
+
+    Returns {section: [row dicts]} with every section present (maybe empty).
+    """
+    source = Path(source)
+    catalog = {name: [] for name in SECTIONS}
+
+    if source.is_dir():
+        for name in SECTIONS:
+            csv_path = source / f"{name}.csv"
+            if not csv_path.exists():
+                continue
+            with open(csv_path, newline='', encoding='utf-8') as f:
+                catalog[name] = list(csv.DictReader(f))
+    else:
+        with open(source, encoding='utf-8') as f:
+            data = json.load(f)
+        for name in SECTIONS:
+            catalog[name] = data.get(name, [])
+
+    # Normalise: missing columns → '' and strip whitespace, so the command
+    # never has to care whether the row came from csv or json.
+    for name, columns in SECTIONS.items():
+        catalog[name] = [
+            {col: (str(row.get(col) or '')).strip() for col in columns}
+            for row in catalog[name]
+        ]
+    return catalog
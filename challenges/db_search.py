@@ -0,0 +1,152 @@
+# challenges/db_search.py
+# Database-backed search - the alternative to the in-memory index in search.py
+# for catalogs too big to keep in every worker, and for fuzzy matching of
+# kids' misspellings ("elefant" → "elephant").
+#
+#   SEARCH_BACKEND=database   → /api/challenges/search/ uses this module
+#
+# Postgres (migration 0017 adds the columns and indexes):
+#   - full-text: search_vector @@ to_tsquery('simple', 'red & app:*')
+#     ranked with ts_rank_cd - the main text (weight A) counts more than the
+#     description (weight B), short texts more than long ones; the last
+#     query word may be a prefix
+#   - trigram (if pg_trgm is installed): 'elefant' <% word, ranked by
+#     word_similarity(). <% compares with pg_trgm.word_similarity_threshold,
+#     so that is set to SEARCH_SIMILARITY_THRESHOLD for the query's
+#     transaction first (one more, tiny query)
+#   Both use GIN indexes, so they stay fast on big tables.
+#
+# Anything else (SQLite test/dev databases): a portable fallback -
+# icontains for every query word, ranked in Python, and difflib for
+# misspellings. It reads whole tables for the fuzzy part, so it's only meant
+# for small databases.
+#
+# Every backend returns the same shape as search.py:
+#   [{'type': 'word', 'id': 3, 'text': 'Elephant', 'score': 0.62}, ...]
+import difflib
+import re
+from functools import reduce
+from operator import and_, or_
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+from .search import KINDS, SOURCES
+
+TERM_RE = re.compile(r'\w+')
+MAX_TERMS = 10
+
+_trigram_available = {}   # database alias → bool, checked once per process
+
+
+def query_terms(query):
+    return TERM_RE.findall((query or '').lower())[:MAX_TERMS]
+
+
+def has_trigram(alias):
+    if alias not in _trigram_available:
+        with connections[alias].cursor() as cursor:
+            cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            _trigram_available[alias] = cursor.fetchone() is not None
+    return _trigram_available[alias]
+
+
+def search(query, limit=20, kinds=KINDS):
+    """The best `limit` matches over `kinds`, best first - one query per kind
+    (two with pg_trgm)."""
+    terms = query_terms(query)
+    if not terms:
+        return []
+    results = []
+    for kind in kinds:
+        model = SOURCES[kind][0]
+        alias = model.objects.db   # a replica, if the router picks one
+        if connections[alias].vendor == 'postgresql':
+            rows = postgres_search(model, kind, query, terms, limit, alias)
+        else:
+            rows = fallback_search(model, kind, terms, limit)
+        results.extend({'type': kind, 'id': pk, 'text': text, 'score': round(score, 4)}
+                       for pk, text, score in rows)
+    results.sort(key=lambda r: (-r['score'], len(r['text'])))
+    return results[:limit]
+
+
+def postgres_search(model, kind, query, terms, limit, alias):
+    """[(pk, text, score)] from the stored tsvector (+ trigram index)."""
+    table = connections[alias].ops.quote_name(model._meta.db_table)
+    main = next(iter(SOURCES[kind][1]))
+    column = f'{table}.{connections[alias].ops.quote_name(main)}'
+    tsquery = ' & '.join(terms[:-1] + [terms[-1] + ':*'])
+
+    condition = f'{table}.search_vector @@ to_tsquery(%s, %s)'
+    params = ['simple', tsquery]
+    # normalization 1: divide by 1 + log(number of words) → shorter texts first
+    rank = f'ts_rank_cd({table}.search_vector, to_tsquery(%s, %s), 1)'
+    rank_params = ['simple', tsquery]
+    if has_trigram(alias):
+        # <% uses the GIN trigram index and the threshold set below
+        condition = f'({condition} OR %s <%% {column})'
+        params += [query]
+        rank = f'({rank} + word_similarity(%s, {column}))'
+        rank_params += [query]
+
+    rows = (model.objects.using(alias)
+            .filter(RawSQL(condition, params, output_field=BooleanField()))
+            .annotate(rank=RawSQL(rank, rank_params, output_field=FloatField()))
+            .order_by('-rank', 'pk')
+            .values_list('pk', main, 'rank')[:limit])
+    if not has_trigram(alias):
+        return list(rows)
+    with transaction.atomic(using=alias, savepoint=False):
+        with connections[alias].cursor() as cursor:
+            # = SET LOCAL: back to the server's default when the transaction ends
+            cursor.execute("SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                           [str(settings.SEARCH_SIMILARITY_THRESHOLD)])
+        return list(rows)
+
+
+def fallback_search(model, kind, terms, limit):
+    """[(pk, text, score)] with icontains + difflib - see the top of this file."""
+    weights = SOURCES[kind][1]
+    fields = list(weights)
+    # every word in at least one field (like the admin's search box)
+    condition = reduce(and_, (reduce(or_, (Q(**{f'{field}__icontains': term})
+                                           for field in fields))
+                              for term in terms))
+    rows = list(model.objects.filter(condition).values_list('pk', *fields))
+    if rows:
+        scored = []
+        for pk, *texts in rows:
+            score = 0.0
+            for (field, weight), text in zip(weights.items(), texts):
+                tokens = TERM_RE.findall((text or '').lower())
+                for term in terms:
+                    if term in tokens:
+                        score += weight          # the whole word
+                    elif any(t.startswith(term) for t in tokens):
+                        score += weight / 2      # "app" in "apple"
+                    elif term in (text or '').lower():
+                        score += weight / 4      # somewhere inside a word
+            scored.append((pk, texts[0], score))
+    else:
+        scored = fuzzy_search(model, fields[0], terms)
+    scored.sort(key=lambda row: (-row[2], row[0]))
+    return scored[:limit]
+
+
+def fuzzy_search(model, field, terms):
+    """Misspellings without pg_trgm: compare each query word with every word
+    of the main text (difflib ratio, 0..1) - reads the whole table."""
+    threshold = settings.SEARCH_SIMILARITY_THRESHOLD
+    scored = []
+    for pk, text in model.objects.values_list('pk', field).iterator():
+        tokens = TERM_RE.findall((text or '').lower())
+        if not tokens:
+            continue
+        best = [max(difflib.SequenceMatcher(None, term, token).ratio() for token in tokens)
+                for term in terms]
+        if min(best) >= threshold:   # every query word has a close match
+            scored.append((pk, text, sum(best) / len(best)))
+    return scored
@@ -0,0 +1,113 @@
+# challenges/fast_serializers.py
+# Read-only fast path for list endpoints that just dump a few columns.
+#
+# A DRF ModelSerializer with many=True builds a model instance per row, then
+# walks every field of every row through get_attribute() + to_representation().
+# For 200 yes/no questions that's most of the request's CPU time - for data
+# that is already plain strings and ints in the database.
+#
+# RowEncoder looks at a serializer class ONCE, works out which column each
+# field reads and whether its to_representation() changes the value at all,
+# and then turns values_list() tuples straight into the same dicts:
+#
+#   encoder = row_encoder(LetterSerializer)
+#   encoder.rows(Letter.objects.all())     # [{'id': 1, 'letter': 'a'}, ...]
+#   encoder.render(Letter.objects.all())   # the JSON bytes DRF would send
+#   row_encoder(LetterSerializer, frozenset({'id'}))   # only some fields (?fields=)
+#
+# The output is identical to the serializer's (challenges/tests.py compares
+# the bytes). Only "flat" serializers are supported: model columns and
+# foreign key ids. Nested serializers, SerializerMethodField and dotted
+# sources raise ValueError when the encoder is built - use the real
+# serializer for those.
+#
+# `manage.py bench_serializers` shows the speedup per endpoint.
+from functools import lru_cache
+
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.response import Response
+
+from speechfun_backend.sparse_fields import SparseFieldsMixin
+
+# Fields whose to_representation() returns database values unchanged
+# (CharField does str(value) - already a str; IntegerField int(value) - already an int...)
+PASSTHROUGH_FIELDS = (
+    serializers.CharField,        # also EmailField, URLField, SlugField...
+    serializers.IntegerField,
+    serializers.BooleanField,
+    serializers.JSONField,
+    serializers.ChoiceField,      # choices stored as their own values
+    serializers.PrimaryKeyRelatedField,
+    serializers.ReadOnlyField,
+)
+UNSUPPORTED_FIELDS = (
+    serializers.BaseSerializer,   # nested serializers
+    serializers.SerializerMethodField,
+    serializers.ManyRelatedField,
+    serializers.HyperlinkedRelatedField,
+)
+
+
+class RowEncoder:
+    """Serializer output for values_list() rows - see the top of this file."""
+
+    def __init__(self, serializer_class, fields=None):
+        self.names = []
+        self.columns = []
+        self.converters = []   # (index, to_representation) for non-passthrough fields
+        for index, (name, field) in enumerate(
+                (name, f) for name, f in serializer_class().fields.items()
+                if not f.write_only and (fields is None or name in fields)):
+            if isinstance(field, UNSUPPORTED_FIELDS) or len(field.source_attrs) != 1:
+                raise ValueError(
+                    f"{serializer_class.__name__}.{name} is not a plain column "
+                    f"({type(field).__name__}, source={field.source!r})")
+            column = field.source
+            if isinstance(field, serializers.PrimaryKeyRelatedField):
+                column = f"{column}_id"   # the id is on the row, no join needed
+            self.names.append(name)
+            self.columns.append(column)
+            if not isinstance(field, PASSTHROUGH_FIELDS):
+                # DateTimeField, DecimalField, ... - let DRF format them
+                self.converters.append((index, field.to_representation))
+
+    def rows(self, queryset):
+        """The list serializer.data would be, from one values_list() query."""
+        names = self.names
+        values = queryset.values_list(*self.columns)
+        if not self.converters:
+            return [dict(zip(names, row)) for row in values]
+        result = []
+        for row in values:
+            row = list(row)
+            for index, convert in self.converters:
+                if row[index] is not None:   # DRF sends None as-is too
+                    row[index] = convert(row[index])
+            result.append(dict(zip(names, row)))
+        return result
+
+    def render(self, queryset):
+        """JSON bytes, exactly as a DRF Response of the serializer would render."""
+        return JSONRenderer().render(self.rows(queryset))
+
+
+@lru_cache(maxsize=None)
+def row_encoder(serializer_class, fields=None):
+    """The RowEncoder of `serializer_class`, limited to `fields` (a frozenset)."""
+    return RowEncoder(serializer_class, fields)
+
+
+class FastListMixin(SparseFieldsMixin):
+    """For generics.ListAPIView: list() through row_encoder() instead of the
+    serializer. get_queryset()/filtering/permissions work as before, and so
+    does ?fields= (only those columns are selected)."""
+
+    def list(self, request, *args, **kwargs):
+        if self.paginator is not None:   # pages need the normal path
+            return super().list(request, *args, **kwargs)
+        queryset = self.filter_queryset(self.get_queryset())   # checks ?fields=
+        tree = self.sparse_fields()
+        encoder = row_encoder(self.get_serializer_class(),
+                              None if tree is None else frozenset(tree))
+        return Response(encoder.rows(queryset))
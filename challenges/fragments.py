@@ -0,0 +1,108 @@
+# challenges/fragments.py
+# Pre-rendered JSON for every Challenge.
+#
+# A challenge's API representation (ChallengeSerializer: nested word with
+# audio, letter_name...) only changes when the challenge, its word or its
+# letter is edited - but the list and detail endpoints used to rebuild it on
+# every request. Now it's rendered once and stored in ChallengeFragment, and
+# the endpoints just glue strings together:
+#
+#   detail → the fragment
+#   list   → '[' + ','.join(fragments) + ']'
+#
+# One query, no model instances, no serializer - and byte-for-byte what
+# DRF's JSONRenderer would have produced (tests compare them).
+#
+# Keeping them fresh:
+#   - signals.py rebuilds them after a Challenge/Word/Letter save (admin)
+#   - bulk writes don't send signals, so seeding, generate_data,
+#     import_catalog and the audio sprite builder call build_fragments()
+#   - a challenge without a fragment is rendered when it's first requested
+#   - `manage.py build_challenge_fragments` rebuilds everything (e.g. after
+#     changing ChallengeSerializer)
+from django.http import Http404, HttpResponse
+from rest_framework.renderers import JSONRenderer
+
+from speechfun_backend.metrics import record_cache
+
+from .models import Challenge, ChallengeFragment
+from .serializers import ChallengeSerializer
+
+BATCH_SIZE = 500
+
+
+def render_fragment(challenge):
+    """The JSON text DRF would send for this challenge (word__letter loaded)."""
+    return JSONRenderer().render(ChallengeSerializer(challenge).data).decode('utf-8')
+
+
+def build_fragments(challenge_ids=None):
+    """(Re)build the fragments of these challenges, or of all of them.
+
+    Returns {challenge id: json}.
+    """
+    queryset = Challenge.objects.select_related('word__letter').order_by('pk')
+    if challenge_ids is not None:
+        queryset = queryset.filter(pk__in=list(challenge_ids))
+    built = {}
+    batch = []
+    for challenge in queryset.iterator(chunk_size=BATCH_SIZE):
+        built[challenge.pk] = render_fragment(challenge)
+        batch.append(ChallengeFragment(challenge_id=challenge.pk, json=built[challenge.pk]))
+        if len(batch) >= BATCH_SIZE:
+            _save(batch)
+            batch = []
+    _save(batch)
+    return built
+
+
+def _save(fragments):
+    if fragments:
+        ChallengeFragment.objects.bulk_create(
+            fragments, update_conflicts=True, unique_fields=['challenge'],
+            update_fields=['json', 'built_at'])
+
+
+def build_fragments_for_words(word_ids):
+    ids = Challenge.objects.filter(word_id__in=list(word_ids)).values_list('pk', flat=True)
+    return build_fragments(list(ids))
+
+
+def build_fragments_for_letter(letter_id):
+    ids = Challenge.objects.filter(word__letter_id=letter_id).values_list('pk', flat=True)
+    return build_fragments(list(ids))
+
+
+def fragment_rows(queryset):
+    """[(challenge id, fragment)] for `queryset`, in its order - one query,
+    plus one more to render any that are missing."""
+    rows = list(queryset.values_list('pk', 'fragment__json'))
+    missing = [pk for pk, json in rows if json is None]
+    record_cache('challenge_fragment', not missing)
+    if not missing:
+        return rows
+    built = build_fragments(missing)
+    # (a challenge deleted in between simply drops out)
+    return [(pk, json if json is not None else built[pk])
+            for pk, json in rows if json is not None or pk in built]
+
+
+def fragments_for(queryset):
+    """Just the fragments of fragment_rows()."""
+    return [json for _, json in fragment_rows(queryset)]
+
+
+def json_response(body):
+    return HttpResponse(body.encode('utf-8'), content_type='application/json')
+
+
+def list_response(queryset):
+    return json_response('[' + ','.join(fragments_for(queryset)) + ']')
+
+
+def detail_response(queryset):
+    fragments = fragments_for(queryset)
+    if not fragments:
+        # same message as DRF's get_object_or_404
+        raise Http404('No Challenge matches the given query.')
+    return json_response(fragments[0])
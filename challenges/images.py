@@ -0,0 +1,86 @@
+# challenges/images.py
+# Shrink admin-uploaded pictures before they go to Cloudinary.
+#
+# Admins often upload multi-megabyte phone photos. Tablets only need a
+# few hundred pixels, so we:
+#   1. rotate according to EXIF (phones store photos sideways + a flag)
+#   2. downscale to each width in VISUAL_VARIANT_WIDTHS (never upscale)
+#   3. re-encode as WebP / JPEG at a tuned quality
+#   4. drop ALL metadata (EXIF, GPS location, camera info, ICC...)
+# Videos and animated GIFs can't be handled by Pillow, so build_variants()
+# returns None for them and the caller uploads the original file.
+import io
+
+from django.conf import settings
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# format → Pillow save() options. Quality values are a compromise that looks
+# fine on a tablet screen at a fraction of the original size.
+ENCODERS = {
+    'webp': {'format': 'WEBP', 'quality': 80, 'method': 4},
+    'jpeg': {'format': 'JPEG', 'quality': 82, 'optimize': True, 'progressive': True},
+}
+
+
+def target_widths(original_width):
+    """Widths to generate for an image that is `original_width` pixels wide.
+
+    Widths bigger than the original are skipped (upscaling only adds bytes),
+    but we always keep at least one variant at the original size.
+    """
+    widths = [w for w in settings.VISUAL_VARIANT_WIDTHS if w < original_width]
+    if not widths or max(widths) < original_width <= max(settings.VISUAL_VARIANT_WIDTHS):
+        widths.append(original_width)
+    return sorted(set(widths))
+
+
+def build_variants(file):
+    """Return a list of re-encoded variants of `file`, smallest first.
+
+    Each variant is a dict: width, height, format, content (bytes).
+    Returns None if the file isn't a still image (video, animated gif...).
+    """
+    content_type = getattr(file, 'content_type', '') or ''
+    if content_type.startswith('video/'):
+        return None
+
+    try:
+        image = Image.open(file)
+        image.load()
+    except (UnidentifiedImageError, OSError):
+        return None
+    finally:
+        if hasattr(file, 'seek'):
+            file.seek(0)  # the caller may still need to upload the original
+
+    if getattr(image, 'is_animated', False):
+        return None
+
+    image = ImageOps.exif_transpose(image)
+
+    variants = []
+    for width in target_widths(image.width):
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize(
+            (width, height), Image.LANCZOS)
+
+        for fmt in settings.VISUAL_VARIANT_FORMATS:
+            options = ENCODERS[fmt]
+            frame = resized
+            if fmt == 'jpeg' and frame.mode not in ('RGB', 'L'):
+                frame = frame.convert('RGB')  # JPEG has no alpha channel
+            elif frame.mode not in ('RGB', 'RGBA', 'L'):
+                frame = frame.convert('RGBA')
+
+            # Saving a fresh frame without exif=/icc_profile= is what strips
+            # the metadata - Pillow only writes what you pass in.
+            buffer = io.BytesIO()
+            frame.save(buffer, **options)
+            variants.append({
+                'width': width,
+                'height': height,
+                'format': fmt,
+                'content': buffer.getvalue(),
+            })
+
+    return variants
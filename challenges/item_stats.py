@@ -0,0 +1,140 @@
+# challenges/item_stats.py
+# Per-item analytics: attempts, completion rate and average score of every
+# Challenge, YesNoQuestion and FunctionalPhrase (ItemStats).
+#
+# Working them out with GROUP BY over all of UserProgress on every admin
+# page load doesn't scale, so the numbers are stored and kept up to date:
+#
+#   every progress write    → a delta: +1 attempt, +1 learner if it's the
+#                             kid's first try, completed/score changed by
+#                             the difference to their previous result
+#                             (update_progress, or the rollup when
+#                             PROGRESS_WRITES='rollup' - see attempts.py),
+#                             in the same transaction as the progress row
+#                             and the attempt
+#   every night             → `manage.py reconcile_item_stats` recomputes them
+#                             from UserProgress and the attempt log, fixing
+#                             any drift (failed requests, bulk loads, deletes)
+#
+# Reading them is one LEFT JOIN: annotate() below adds the numbers to a
+# Challenge/YesNoQuestion/FunctionalPhrase queryset (admin, /stats/<kind>/).
+from django.db import transaction
+from django.db.models import Count, F, FloatField, Q, Sum
+from django.db.models.functions import Cast, Coalesce, NullIf
+from django.utils import timezone
+
+from .models import AttemptRollup, ItemStats, ProgressAttempt, UserProgress
+
+COUNTERS = ('attempts', 'learners', 'completed', 'score_sum')
+
+
+def progress_delta(previous, completed, score):
+    """The change one progress write makes. `previous` = (completed, score)
+    of the kid's row before the write, or None if it's their first try."""
+    completed = UserProgress._meta.get_field('completed').to_python(completed)
+    score = UserProgress._meta.get_field('score').to_python(score)
+    if previous is None:
+        return {'attempts': 1, 'learners': 1, 'completed': int(completed), 'score_sum': score}
+    return {'attempts': 1, 'learners': 0,
+            'completed': int(completed) - int(previous[0]),
+            'score_sum': score - previous[1]}
+
+
+def _update(field, item_id, delta):
+    return ItemStats.objects.filter(**{f'{field}_id': item_id}).update(
+        updated_at=timezone.now(),
+        **{name: F(name) + delta.get(name, 0) for name in COUNTERS})
+
+
+def apply_delta(field, item_id, delta):
+    """Add `delta` to the item's stats (field = 'challenge', 'yes_no_question'
+    or 'functional_phrase'). One UPDATE - two more for the item's first row."""
+    if not _update(field, item_id, delta):
+        ItemStats.objects.bulk_create([ItemStats(**{f'{field}_id': item_id})],
+                                      ignore_conflicts=True)
+        _update(field, item_id, delta)
+
+
+def apply_deltas(field, deltas):
+    """apply_delta() for a list of (item_id, delta) - one UPDATE per item."""
+    totals = {}
+    for item_id, delta in deltas:
+        total = totals.setdefault(item_id, dict.fromkeys(COUNTERS, 0))
+        for name in COUNTERS:
+            total[name] += delta[name]
+    for item_id, total in totals.items():
+        apply_delta(field, item_id, total)
+
+
+def annotate(queryset):
+    """Add stats_attempts, stats_learners, stats_completed, completion_rate
+    (0..1) and average_score to a Challenge/YesNoQuestion/FunctionalPhrase
+    queryset. Items nobody tried yet: 0 / None."""
+    return queryset.annotate(
+        stats_attempts=Coalesce('stats__attempts', 0),
+        stats_learners=Coalesce('stats__learners', 0),
+        stats_completed=Coalesce('stats__completed', 0),
+        completion_rate=(Cast('stats__completed', FloatField())
+                         / NullIf('stats__learners', 0)),
+        average_score=(Cast('stats__score_sum', FloatField())
+                       / NullIf('stats__learners', 0)),
+    )
+
+
+def reconcile(targets):
+    """Recompute every item's stats. `targets` = attempts.PROGRESS_TARGETS.
+    Returns how many items' numbers were off."""
+    fixed = 0
+    for item_type, (model, field, _) in targets.items():
+        # an item without a stats row has nothing to lock below: give every
+        # item its (zero) row first, committed on its own
+        ItemStats.objects.bulk_create(
+            [ItemStats(**{f'{field}_id': pk}) for pk in
+             model.objects.filter(stats__isnull=True).values_list('pk', flat=True)],
+            batch_size=1000, ignore_conflicts=True)
+        with transaction.atomic():
+            fixed += _reconcile_kind(item_type, model, field)
+    return fixed
+
+
+def _reconcile_kind(item_type, model, field):
+    # Lock the kind's stats rows BEFORE counting: a progress write that lands
+    # meanwhile waits at its F() update until we're done and adds its delta
+    # on top of our numbers, instead of being overwritten by them.
+    stored = {row[0]: dict(zip(COUNTERS, row[1:])) for row in
+              ItemStats.objects.select_for_update()
+              .filter(**{f'{field}__isnull': False})
+              .values_list(f'{field}_id', *COUNTERS)}
+    # attempts the rollup hasn't applied yet will add themselves when it does
+    rolled_up = (AttemptRollup.objects.values_list('last_attempt_id', flat=True).first()
+                 or 0)
+    actual = {}
+    progress = (UserProgress.objects.filter(**{f'{field}__isnull': False})
+                .values_list(field)
+                .annotate(learners=Count('id'),
+                          completed=Count('id', filter=Q(completed=True)),
+                          score_sum=Coalesce(Sum('score'), 0))
+                .order_by())
+    for item_id, learners, completed, score_sum in progress:
+        actual[item_id] = {'attempts': 0, 'learners': learners,
+                           'completed': completed, 'score_sum': score_sum}
+    attempts = (ProgressAttempt.objects
+                .filter(Q(applied=True) | Q(id__lte=rolled_up), item_type=item_type)
+                .values_list('item_id').annotate(n=Count('id')).order_by())
+    for item_id, n in attempts:
+        actual.setdefault(item_id, dict.fromkeys(COUNTERS, 0))['attempts'] = n
+    # items deleted since (their attempts stay in the log)
+    existing = set(model.objects.values_list('pk', flat=True))
+    actual = {item_id: counters for item_id, counters in actual.items()
+              if item_id in existing}
+
+    zero = dict.fromkeys(COUNTERS, 0)
+    wrong = [ItemStats(**{f'{field}_id': item_id}, **counters)
+             for item_id, counters in actual.items() if stored.get(item_id) != counters]
+    wrong += [ItemStats(**{f'{field}_id': item_id}, **zero)
+              for item_id, counters in stored.items()
+              if item_id not in actual and counters != zero]
+    ItemStats.objects.bulk_create(wrong, batch_size=1000, update_conflicts=True,
+                                  unique_fields=[field],
+                                  update_fields=[*COUNTERS, 'updated_at'])
+    return len(wrong)
@@ -0,0 +1,76 @@
+# challenges/management/commands/backfill_review_state.py
+# Seed spaced-repetition state (ReviewState, see challenges/scheduler.py)
+# from the progress rows that already exist.
+#
+#   python manage.py backfill_review_state              # after deploying the migration
+#   python manage.py backfill_review_state --reset      # recompute existing states too
+#
+# Every UserProgress row counts as one review at its updated_at, with its
+# score/completed. Progress writes keep the states up to date after that;
+# run it again after bulk-loading progress (generate_data).
+#
+# Reads the progress table in id order, batch by batch (keyset pagination,
+# no OFFSET), and writes each batch with one bulk INSERT. Without --reset,
+# states that already exist are left alone, so it's safe to re-run.
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from challenges.models import ReviewState, UserProgress
+from challenges.scheduler import UPSERT, new_state, quality, schedule
+
+
+class Command(BaseCommand):
+    help = "Create ReviewState rows from existing UserProgress rows"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--reset', action='store_true',
+                            help="overwrite review states that already exist")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        batch_size = options['batch_size']
+        written = 0
+        last_id = 0
+        last_report = started
+        while True:
+            rows = list(UserProgress.objects.filter(id__gt=last_id).order_by('id')
+                        .values_list('id', 'user_id', 'challenge_id', 'yes_no_question_id',
+                                     'functional_phrase_id', 'completed', 'score',
+                                     'updated_at')[:batch_size])
+            if not rows:
+                break
+            last_id = rows[-1][0]
+            states = []
+            for _, user_id, challenge_id, yes_no_id, phrase_id, completed, score, at in rows:
+                # the foreign key that is set says what the row is about
+                if challenge_id:
+                    item_type, item_id = 'letter', challenge_id
+                elif yes_no_id:
+                    item_type, item_id = 'yes_no', yes_no_id
+                elif phrase_id:
+                    item_type, item_id = 'functional', phrase_id
+                else:
+                    continue
+                states.append(schedule(new_state(user_id, item_type, item_id, at),
+                                       quality(score, completed), at))
+            if options['reset']:
+                ReviewState.objects.bulk_create(states, **UPSERT)
+            else:
+                ReviewState.objects.bulk_create(states, ignore_conflicts=True)
+            written += len(states)
+            # a progress line every ~5 seconds, not every batch
+            if time.perf_counter() - last_report >= 5:
+                last_report = time.perf_counter()
+                self.stdout.write(f"  ...{written:,} progress rows")
+
+        if connection.vendor == 'postgresql':
+            # fresh statistics, so the planner uses the (user, due_at) index
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE "{ReviewState._meta.db_table}"')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Review state written for {written:,} progress row(s) in "
+            f"{time.perf_counter() - started:.1f}s"))
@@ -0,0 +1,220 @@
+# challenges/management/commands/bench.py
+# Load benchmark: how many requests per second can ONE app process serve?
+#
+#   python manage.py bench                          # 8 clients for 20s
+#   python manage.py bench --clients 16 --duration 60 --output before.json
+#   DATABASE_URL=postgres://... python manage.py bench   # bench on Postgres
+#
+# What it does:
+#   1. creates a throwaway test database (never touches your real data)
+#   2. seeds it with challenges/seeding.py (sizes are flags)
+#   3. runs N simulated kids in threads, each looping a realistic session:
+#        login → letters → challenges for a letter → a few progress writes
+#   4. prints throughput + p50/p95/p99 latency per endpoint as JSON
+#
+# Requests go through Django's test Client - the full middleware/view/DB
+# stack, just without the network - so numbers are comparable between
+# commits on the same machine. Diff two JSON files to compare.
+import contextlib
+import io
+import json
+import math
+import os
+import random
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import reverse
+
+from challenges.seeding import DIFFICULTIES, seed_catalog, seed_users
+
+PASSWORD = 'bench-pass-123'
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    # the smallest value with at least p% of the values at or below it
+    rank = max(0, min(len(sorted_values) - 1,
+                      math.ceil(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(latencies, errors, elapsed):
+    ordered = sorted(latencies)
+    ms = lambda seconds: round(seconds * 1000, 2) if seconds is not None else None
+    return {
+        'requests': len(ordered),
+        'errors': errors,
+        'rps': round(len(ordered) / elapsed, 1),
+        'mean_ms': ms(sum(ordered) / len(ordered)) if ordered else None,
+        'p50_ms': ms(percentile(ordered, 50)),
+        'p95_ms': ms(percentile(ordered, 95)),
+        'p99_ms': ms(percentile(ordered, 99)),
+        'max_ms': ms(ordered[-1]) if ordered else None,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'],
+                              capture_output=True, text=True, check=True,
+                              cwd=settings.BASE_DIR).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = "Seed a throwaway database and load-test the API (JSON report)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=8,
+                            help="concurrent simulated users (threads)")
+        parser.add_argument('--duration', type=float, default=20,
+                            help="seconds to run after warm-up")
+        parser.add_argument('--warmup', type=float, default=2,
+                            help="seconds of traffic that are not measured")
+        parser.add_argument('--progress-writes', type=int, default=5,
+                            help="progress updates per session")
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--letters', type=int, default=26)
+        parser.add_argument('--words-per-letter', type=int, default=30)
+        parser.add_argument('--challenges-per-word', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=0,
+                            help="random seed for data AND traffic")
+        parser.add_argument('--output', help="also write the JSON report here")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        # SQLite: use a temp FILE, not the in-memory test db - threads need
+        # real concurrent connections like gunicorn workers would have.
+        # IMMEDIATE transactions + a busy timeout make writers wait for the
+        # lock instead of failing with "database is locked".
+        tmpdir = None
+        if connection.vendor == 'sqlite':
+            tmpdir = tempfile.TemporaryDirectory(prefix='speechfun-bench-')
+            connection.settings_dict.setdefault('TEST', {})['NAME'] = \
+                os.path.join(tmpdir.name, 'bench.sqlite3')
+            connection.settings_dict['OPTIONS'].update(
+                {'transaction_mode': 'IMMEDIATE', 'timeout': 20})
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            report = self.run_bench(options)
+        finally:
+            connections.close_all()
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            if tmpdir:
+                tmpdir.cleanup()
+
+        body = json.dumps(report, indent=2)
+        self.stdout.write(body)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(body + '\n')
+            self.stderr.write(f"✅ report written to {options['output']}")
+
+    def run_bench(self, options):
+        started = time.perf_counter()
+        catalog = seed_catalog(
+            letters=options['letters'],
+            words_per_letter=options['words_per_letter'],
+            challenges_per_word=options['challenges_per_word'],
+            seed=options['seed'])
+        usernames = [u.username for u in seed_users(
+            options['users'], prefix='bench', password=PASSWORD)]
+        self.stderr.write(f"seeded in {time.perf_counter() - started:.1f}s, "
+                          f"running {options['clients']} clients for "
+                          f"{options['duration']:.0f}s...")
+
+        ids = {
+            'letters': [l.id for l in catalog['letters']],
+            'challenges': [c.id for c in catalog['challenges']],
+            'yes_no': [q.id for q in catalog['yes_no_questions']],
+            'functional': [p.id for p in catalog['functional_phrases']],
+        }
+
+        lock = threading.Lock()
+        latencies = defaultdict(list)   # endpoint name -> [seconds]
+        errors = defaultdict(int)
+        measure_from = time.perf_counter() + options['warmup']
+        stop_at = measure_from + options['duration']
+
+        def timed(name, send):
+            before = time.perf_counter()
+            response = send()
+            took = time.perf_counter() - before
+            if before >= measure_from:
+                with lock:
+                    latencies[name].append(took)
+                    if response.status_code >= 400:
+                        errors[name] += 1
+            return response
+
+        def client_loop(number):
+            rng = random.Random(options['seed'] * 1000 + number)
+            client = Client()
+            try:
+                while time.perf_counter() < stop_at:
+                    self.one_session(client, rng, usernames, ids, timed,
+                                     options['progress_writes'])
+            finally:
+                connections.close_all()   # this thread's DB connections
+
+        # the views print() a lot - keep that out of the report
+        with contextlib.redirect_stdout(io.StringIO()):
+            threads = [threading.Thread(target=client_loop, args=(n,))
+                       for n in range(options['clients'])]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+        elapsed = time.perf_counter() - measure_from
+
+        all_latencies = [x for values in latencies.values() for x in values]
+        return {
+            'commit': git_commit(),
+            'database': connection.vendor,
+            'options': {k: options[k] for k in (
+                'clients', 'duration', 'warmup', 'progress_writes', 'users',
+                'letters', 'words_per_letter', 'challenges_per_word', 'seed')},
+            'total': summarize(all_latencies, sum(errors.values()), elapsed),
+            'endpoints': {name: summarize(values, errors[name], elapsed)
+                          for name, values in sorted(latencies.items())},
+        }
+
+    def one_session(self, client, rng, usernames, ids, timed, progress_writes):
+        """login → catalog → progress writes, like a kid opening the app."""
+        response = timed('login', lambda: client.post(
+            reverse('login'),
+            {'username': rng.choice(usernames), 'password': PASSWORD},
+            content_type='application/json'))
+        if response.status_code != 200:
+            return
+        auth = {'HTTP_AUTHORIZATION': f"Token {response.json()['token']}"}
+
+        timed('letter-list', lambda: client.get(reverse('letter-list')))
+        letter_id = rng.choice(ids['letters'])
+        url = (reverse('challenges-by-letter', args=[letter_id])
+               + f'?difficulty={rng.choice(DIFFICULTIES)}')
+        timed('challenges-by-letter', lambda: client.get(url))
+
+        for _ in range(progress_writes):
+            # mostly letter challenges, sometimes the picture games
+            kind = rng.choices(['letter', 'yes_no', 'functional'], [6, 2, 2])[0]
+            pool = ids['challenges'] if kind == 'letter' else ids[kind]
+            payload = {'challenge': rng.choice(pool), 'challenge_type': kind,
+                       'completed': rng.random() < 0.7, 'score': rng.randint(0, 100)}
+            timed('update-progress', lambda: client.post(
+                reverse('update-progress'), payload,
+                content_type='application/json', **auth))
@@ -0,0 +1,237 @@
+# challenges/management/commands/bench_asgi.py
+# Sync (gunicorn) vs async (uvicorn) servers under the same concurrent load.
+#
+#   python manage.py generate_data --users 2000      # something worth reading
+#   python manage.py bench_asgi                      # 64 connections, 20s per mode
+#   python manage.py bench_asgi --concurrency 256 --workers 4 --output asgi.json
+#
+# For every mode it starts the real server as a subprocess on DATABASE_URL,
+# opens --concurrency keep-alive connections (httpx + asyncio) and loops a
+# kid's session on each of them:
+#   letters → challenges of a letter → one challenge → its comments
+#   → own progress → a progress write
+#
+# Modes:
+#   wsgi        gunicorn sync workers   + DRF views    (/api/challenges/)
+#   asgi-sync   uvicorn workers         + DRF views    (run in a thread each)
+#   asgi        uvicorn workers         + async views  (/api/async/challenges/)
+#
+# Reported per mode: requests/sec, p50/p95/p99 (bench.py's summary) and the
+# server's memory - RSS of all its processes when idle, the peak under load,
+# and (peak - idle) / concurrency = what one more open connection costs.
+#
+# Use Postgres: SQLite serialises the writes, so you'd measure its locking.
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+
+import httpx
+import psutil
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from rest_framework.authtoken.models import Token
+
+from challenges.models import Challenge, Letter
+from .bench import git_commit, summarize
+
+MODES = ('wsgi', 'asgi-sync', 'asgi')
+PREFIXES = {'wsgi': '/api/challenges', 'asgi-sync': '/api/challenges',
+            'asgi': '/api/async/challenges'}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def server_command(mode, port, workers):
+    if mode == 'wsgi':
+        return [sys.executable, '-m', 'gunicorn', 'speechfun_backend.wsgi',
+                '--workers', str(workers), '--bind', f'127.0.0.1:{port}',
+                '--log-level', 'warning']
+    return [sys.executable, '-m', 'uvicorn', 'speechfun_backend.asgi:application',
+            '--workers', str(workers), '--host', '127.0.0.1', '--port', str(port),
+            '--no-access-log', '--log-level', 'warning']
+
+
+def rss_bytes(process):
+    """Memory of the server: the master process plus all its workers."""
+    total = 0
+    for p in [process] + process.children(recursive=True):
+        try:
+            total += p.memory_info().rss
+        except psutil.NoSuchProcess:
+            pass
+    return total
+
+
+class Command(BaseCommand):
+    help = "Compare gunicorn (sync) and uvicorn (async views) throughput and memory"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=64,
+                            help="open connections, each looping a session")
+        parser.add_argument('--duration', type=float, default=20,
+                            help="measured seconds per mode")
+        parser.add_argument('--warmup', type=float, default=3)
+        parser.add_argument('--workers', type=int, default=2,
+                            help="server processes (same for every mode)")
+        parser.add_argument('--users', type=int, default=50,
+                            help="existing active users to log in as")
+        parser.add_argument('--modes', default=','.join(MODES))
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="also write the JSON report here")
+
+    def handle(self, *args, **options):
+        modes = options['modes'].split(',')
+        for mode in modes:
+            if mode not in MODES:
+                raise CommandError(f"Unknown mode {mode} (choose from {', '.join(MODES)})")
+
+        data = self.load_ids(options['users'])
+        report = {'commit': git_commit(), 'database': connection.vendor,
+                  'options': {k: options[k] for k in (
+                      'concurrency', 'duration', 'warmup', 'workers', 'seed')},
+                  'modes': {}}
+        connection.close()   # the servers get their own connections
+        for mode in modes:
+            self.stderr.write(f"{mode}: {options['concurrency']} connections "
+                              f"for {options['duration']:.0f}s...")
+            report['modes'][mode] = self.run_mode(mode, data, options)
+
+        body = json.dumps(report, indent=2)
+        self.stdout.write(body)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(body + '\n')
+            self.stderr.write(f"✅ report written to {options['output']}")
+
+    def load_ids(self, user_count):
+        users = list(User.objects.filter(is_active=True).order_by('id')[:user_count])
+        if not users:
+            raise CommandError("No users - run `manage.py generate_data` first")
+        challenges = list(Challenge.objects.values_list('id', flat=True)[:500])
+        if not challenges:
+            raise CommandError("No challenges - run `manage.py generate_data` first")
+        return {
+            'tokens': [Token.objects.get_or_create(user=u)[0].key for u in users],
+            'letters': list(Letter.objects.values_list('id', flat=True)),
+            'challenges': challenges,
+        }
+
+    def run_mode(self, mode, data, options):
+        port = free_port()
+        log = tempfile.TemporaryFile()
+        env = dict(os.environ)
+        env['ALLOWED_HOSTS'] = env.get('ALLOWED_HOSTS', 'localhost') + ',127.0.0.1'
+        server = subprocess.Popen(
+            server_command(mode, port, options['workers']),
+            cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL, stderr=log)
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            self.wait_until_up(server, base_url, log)
+            process = psutil.Process(server.pid)
+            result = asyncio.run(self.load(
+                base_url + PREFIXES[mode], data, options, process))
+        finally:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+            log.close()
+        return result
+
+    def wait_until_up(self, server, base_url, log, timeout=30):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                log.seek(0)
+                raise CommandError("Server exited:\n" + log.read().decode(errors='replace'))
+            try:
+                if httpx.get(base_url + '/health/', timeout=1).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            time.sleep(0.2)
+        raise CommandError(f"Server not up after {timeout}s")
+
+    async def load(self, api, data, options, process):
+        latencies = defaultdict(list)
+        errors = defaultdict(int)
+        loop = asyncio.get_running_loop()
+        measure_from = loop.time() + options['warmup']
+        stop_at = measure_from + options['duration']
+        concurrency = options['concurrency']
+
+        idle = rss_bytes(process)   # after start-up, before any load
+        peak = [idle]
+        sampling = threading.Event()
+
+        def sample_memory():
+            while not sampling.wait(0.2):
+                peak[0] = max(peak[0], rss_bytes(process))
+        sampler = threading.Thread(target=sample_memory, daemon=True)
+        sampler.start()
+
+        async def timed(name, send):
+            before = loop.time()
+            try:
+                response = await send()
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                response, failed = None, True
+            if before >= measure_from:
+                latencies[name].append(loop.time() - before)
+                errors[name] += failed
+            return response
+
+        async def connection_loop(number):
+            rng = random.Random(options['seed'] * 1000 + number)
+            token = data['tokens'][number % len(data['tokens'])]
+            headers = {'Authorization': f'Token {token}'}
+            while loop.time() < stop_at:
+                challenge_id = rng.choice(data['challenges'])
+                await timed('letters', lambda: client.get(f'{api}/letters/'))
+                await timed('challenges-by-letter', lambda: client.get(
+                    f"{api}/letters/{rng.choice(data['letters'])}/challenges/"))
+                await timed('challenge-detail', lambda: client.get(
+                    f'{api}/challenges/{challenge_id}/'))
+                await timed('comments', lambda: client.get(
+                    f'{api}/challenges/{challenge_id}/comments/'))
+                await timed('progress', lambda: client.get(
+                    f'{api}/progress/', headers=headers))
+                await timed('progress-update', lambda: client.post(
+                    f'{api}/progress/update/', headers=headers,
+                    json={'challenge': challenge_id, 'challenge_type': 'letter',
+                          'completed': True, 'score': rng.randint(50, 100)}))
+
+        limits = httpx.Limits(max_connections=concurrency,
+                              max_keepalive_connections=concurrency)
+        async with httpx.AsyncClient(limits=limits, timeout=60) as client:
+            await asyncio.gather(*(connection_loop(n) for n in range(concurrency)))
+        elapsed = loop.time() - measure_from
+        sampling.set()
+        sampler.join()
+
+        all_latencies = [x for values in latencies.values() for x in values]
+        result = summarize(all_latencies, sum(errors.values()), elapsed)
+        result['memory'] = {
+            'idle_mb': round(idle / 2**20, 1),
+            'peak_mb': round(peak[0] / 2**20, 1),
+            'per_connection_kb': round((peak[0] - idle) / concurrency / 1024, 1),
+        }
+        result['endpoints'] = {name: summarize(values, errors[name], elapsed)
+                               for name, values in sorted(latencies.items())}
+        return result
@@ -0,0 +1,125 @@
+# challenges/management/commands/bench_db.py
+# How much does connection reuse save per request? Runs the same (read-only)
+# endpoint three ways against the database in DATABASE_URL:
+#
+#   fresh       CONN_MAX_AGE=0 - new connection (TCP + TLS + auth) every request
+#   persistent  CONN_MAX_AGE=600 + health checks - one connection per worker
+#   pool        psycopg 3 connection pool (Postgres only)
+#
+#   python manage.py bench_db                       # 300 GETs of letter-list per mode
+#   python manage.py bench_db --requests 1000 --output db.json
+#
+# Run it against the real (remote) database: the difference is mostly
+# network round trips, so a local database shows much smaller savings.
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from django.urls import NoReverseMatch, reverse
+from prometheus_client import REGISTRY
+
+from .bench import git_commit, summarize
+
+MODES = ('fresh', 'persistent', 'pool')
+
+
+class Command(BaseCommand):
+    help = "Compare per-request latency with fresh, persistent and pooled DB connections"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300,
+                            help="measured requests per mode")
+        parser.add_argument('--warmup', type=int, default=20)
+        parser.add_argument('--url-name', default='letter-list',
+                            help="a read-only GET endpoint without URL arguments")
+        parser.add_argument('--pool-size', type=int, default=4)
+        parser.add_argument('--modes', default=','.join(MODES))
+        parser.add_argument('--output', help="also write the JSON report here")
+
+    def handle(self, *args, **options):
+        try:
+            url = reverse(options['url_name'])
+        except NoReverseMatch:
+            raise CommandError(f"No URL named {options['url_name']} without arguments")
+
+        original = {'CONN_MAX_AGE': connection.settings_dict['CONN_MAX_AGE'],
+                    'CONN_HEALTH_CHECKS': connection.settings_dict['CONN_HEALTH_CHECKS'],
+                    'OPTIONS': dict(connection.settings_dict['OPTIONS'])}
+        setup_test_environment()
+        report = {'commit': git_commit(), 'database': connection.vendor,
+                  'url': url, 'requests': options['requests'], 'modes': {}}
+        try:
+            for mode in options['modes'].split(','):
+                error = self.configure(mode, options['pool_size'], original)
+                if error:
+                    report['modes'][mode] = {'skipped': error}
+                    continue
+                before = self.connections_opened()
+                report['modes'][mode] = self.run_mode(url, options)
+                report['modes'][mode]['connections_opened'] = \
+                    self.connections_opened() - before
+        finally:
+            connection.close()
+            if connection.vendor == 'postgresql':
+                connection.close_pool()
+            connection.settings_dict.update(original)
+            teardown_test_environment()
+
+        fresh = report['modes'].get('fresh', {}).get('mean_ms')
+        for mode, result in report['modes'].items():
+            if fresh and result.get('mean_ms') is not None:
+                result['saved_ms_per_request'] = round(fresh - result['mean_ms'], 2)
+
+        body = json.dumps(report, indent=2)
+        self.stdout.write(body)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(body + '\n')
+
+    def configure(self, mode, pool_size, original):
+        """Switch the default connection to `mode`. Returns a reason to skip, or None."""
+        connection.close()
+        if connection.vendor == 'postgresql':
+            connection.close_pool()
+        options = {k: v for k, v in original['OPTIONS'].items() if k != 'pool'}
+        settings = {'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False, 'OPTIONS': options}
+        if mode == 'persistent':
+            settings.update(CONN_MAX_AGE=600, CONN_HEALTH_CHECKS=True)
+        elif mode == 'pool':
+            if connection.vendor != 'postgresql':
+                return "the connection pool needs PostgreSQL"
+            try:
+                import psycopg_pool  # noqa: F401
+            except ImportError:
+                return 'needs pip install "psycopg[binary,pool]"'
+            options['pool'] = {'min_size': pool_size, 'max_size': pool_size}
+        elif mode != 'fresh':
+            raise CommandError(f"Unknown mode {mode} (choose from {', '.join(MODES)})")
+        connection.settings_dict.update(settings)
+        return None
+
+    def run_mode(self, url, options):
+        client = Client()
+        latencies = []
+        for i in range(options['warmup'] + options['requests']):
+            # what Django's WSGI handler does around every request
+            # (the test Client skips it on purpose)
+            started = time.perf_counter()
+            close_old_connections()
+            response = client.get(url)
+            close_old_connections()
+            took = time.perf_counter() - started
+            if response.status_code != 200:
+                raise CommandError(f"GET {url} returned {response.status_code}")
+            if i >= options['warmup']:
+                latencies.append(took)
+        return summarize(latencies, 0, sum(latencies))
+
+    @staticmethod
+    def connections_opened():
+        # counted by MetricsMiddleware (real connections, also for the pool)
+        return int(REGISTRY.get_sample_value('speechfun_db_connections_opened_total',
+                                             {'alias': connection.alias}) or 0)
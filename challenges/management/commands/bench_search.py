@@ -0,0 +1,121 @@
+# challenges/management/commands/bench_search.py
+# Search three ways on the catalog in DATABASE_URL, same queries each:
+#
+#   admin      what the admin search box runs: icontains on every
+#              search_field, for every word (ModelAdmin.get_search_results)
+#   database   db_search.py - Postgres full-text + trigram (or the SQLite fallback)
+#   memory     search.py - the in-memory index (build time reported separately)
+#
+#   python manage.py generate_data --users 1000      # a catalog to search
+#   python manage.py bench_search
+#   python manage.py bench_search --query elefant --query "red app" --output search.json
+#
+# Without --query it picks queries from the data: a whole word, a prefix,
+# two words of a challenge title and a misspelled word. For the misspelling
+# the report also says whether each method found the word it came from.
+import json
+import random
+import statistics
+import time
+
+from django.contrib import admin
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import RequestFactory
+
+from challenges import db_search
+from challenges.models import Challenge, Word
+from challenges.search import KINDS, SOURCES, build_index
+from .bench import git_commit
+
+
+def misspell(word, rng):
+    """'elephant' → 'elepfant': one letter in the middle replaced."""
+    position = rng.randrange(1, len(word) - 1)
+    letters = [c for c in 'abcdefghijklmnopqrstuvwxyz' if c != word[position]]
+    return word[:position] + rng.choice(letters) + word[position + 1:]
+
+
+def median_ms(function, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 3), result
+
+
+class Command(BaseCommand):
+    help = "Compare admin icontains search, database search and the in-memory index"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--query', action='append', default=[],
+                            help="a query to time (repeatable)")
+        parser.add_argument('--iterations', type=int, default=50)
+        parser.add_argument('--limit', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--output', help="also write the JSON report here")
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        queries = [(q, None) for q in options['query']] or self.pick_queries(rng)
+
+        started = time.perf_counter()
+        index = build_index()
+        build_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        limit, iterations = options['limit'], options['iterations']
+        report = {'commit': git_commit(), 'database': connection.vendor,
+                  'trigram': (connection.vendor == 'postgresql'
+                              and db_search.has_trigram(connection.alias)),
+                  'iterations': iterations, 'memory_index_build_ms': build_ms,
+                  'queries': {}}
+        methods = {
+            'admin': lambda q: self.admin_search(q, limit),
+            'database': lambda q: db_search.search(q, limit=limit),
+            'memory': lambda q: index.search(q, limit=limit),
+        }
+        for query, expected in queries:
+            self.stderr.write(f"{query!r}...")
+            report['queries'][query] = entry = {}
+            for name, method in methods.items():
+                ms, results = median_ms(lambda: method(query), iterations)
+                entry[name] = {'median_ms': ms, 'results': len(results)}
+                if expected:
+                    entry[name]['found_original'] = expected in [
+                        (r['type'], r['id']) for r in results]
+
+        body = json.dumps(report, indent=2)
+        self.stdout.write(body)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(body + '\n')
+
+    def pick_queries(self, rng):
+        words = list(Word.objects.filter(word__regex=r'^\w{5,}$')
+                     .order_by('pk').values_list('pk', 'word')[:500])
+        titles = list(Challenge.objects.order_by('pk').values_list('title', flat=True)[:500])
+        if not words or not titles:
+            raise CommandError("No catalog - run `manage.py generate_data` first "
+                               "(or pass --query)")
+        word_id, word = rng.choice(words)
+        title_words = db_search.query_terms(rng.choice(titles))[:2]
+        return [
+            (word.lower(), None),
+            (word[:3].lower(), None),
+            (' '.join(title_words), None),
+            (misspell(word.lower(), rng), ('word', word_id)),
+        ]
+
+    def admin_search(self, query, limit):
+        """The admin changelist search for every model, first page of each."""
+        request = RequestFactory().get('/admin/')
+        results = []
+        for kind in KINDS:
+            model = SOURCES[kind][0]
+            model_admin = admin.site._registry[model]
+            queryset, _ = model_admin.get_search_results(
+                request, model.objects.order_by('-pk'), query)
+            results.extend({'type': kind, 'id': pk}
+                           for pk in queryset.values_list('pk', flat=True)[:limit])
+        return results
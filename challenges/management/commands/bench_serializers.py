@@ -0,0 +1,98 @@
+# challenges/management/commands/bench_serializers.py
+# Micro-benchmark: DRF serializer vs the fast path (fast_serializers.py) for
+# each list endpoint that uses it. Times query + serialization + JSON
+# rendering - everything the view does apart from HTTP - on a throwaway
+# seeded test database, and checks both give the same bytes.
+#
+#   python manage.py bench_serializers
+#   python manage.py bench_serializers --iterations 500 --output ser.json
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+
+from challenges.fast_serializers import row_encoder
+from challenges.models import FunctionalPhrase, Letter, Word, YesNoQuestion
+from challenges.seeding import seed_catalog
+from challenges.serializers import (FunctionalPhraseSerializer, LetterSerializer,
+                                    WordSerializer, YesNoQuestionSerializer)
+from .bench import git_commit
+
+
+def endpoints(catalog):
+    """url name → (serializer, function returning a fresh queryset), like the views."""
+    letter_id = catalog['letters'][0].id
+    return {
+        'letter-list': (LetterSerializer, lambda: Letter.objects.all()),
+        'words-by-letter': (WordSerializer,
+                            lambda: Word.objects.filter(letter_id=letter_id)),
+        'yes-no-questions': (YesNoQuestionSerializer, lambda: YesNoQuestion.objects.all()),
+        'functional-phrases': (FunctionalPhraseSerializer,
+                               lambda: FunctionalPhrase.objects.all()),
+    }
+
+
+def median_ms(function, iterations):
+    timings = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return round(statistics.median(timings) * 1000, 3)
+
+
+class Command(BaseCommand):
+    help = "Time DRF serializers against the fast values_list path per list endpoint"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200)
+        parser.add_argument('--words-per-letter', type=int, default=30)
+        parser.add_argument('--yes-no-questions', type=int, default=200)
+        parser.add_argument('--functional-phrases', type=int, default=200)
+        parser.add_argument('--output', help="also write the JSON report here")
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            catalog = seed_catalog(words_per_letter=options['words_per_letter'],
+                                   yes_no_questions=options['yes_no_questions'],
+                                   functional_phrases=options['functional_phrases'])
+            report = {'commit': git_commit(), 'database': connection.vendor,
+                      'iterations': options['iterations'], 'endpoints': {}}
+            for name, (serializer_class, queryset) in endpoints(catalog).items():
+                report['endpoints'][name] = self.compare(
+                    name, serializer_class, queryset, options['iterations'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        body = json.dumps(report, indent=2)
+        self.stdout.write(body)
+        if options['output']:
+            with open(options['output'], 'w') as f:
+                f.write(body + '\n')
+
+    def compare(self, name, serializer_class, queryset, iterations):
+        renderer = JSONRenderer()
+        encoder = row_encoder(serializer_class)
+
+        def drf():
+            return renderer.render(serializer_class(queryset(), many=True).data)
+
+        def fast():
+            return encoder.render(queryset())
+
+        body = drf()
+        if fast() != body:
+            raise CommandError(f"{name}: fast path output differs from the serializer")
+        drf_ms = median_ms(drf, iterations)
+        fast_ms = median_ms(fast, iterations)
+        return {'rows': len(json.loads(body)), 'bytes': len(body),
+                'drf_ms': drf_ms, 'fast_ms': fast_ms,
+                'speedup': round(drf_ms / fast_ms, 1) if fast_ms else None}
@@ -0,0 +1,52 @@
+# challenges/management/commands/build_audio_sprites.py
+# Rebuild the per-letter audio sprites (see challenges/sprites.py).
+#
+#   python manage.py build_audio_sprites            # only letters whose words changed
+#   python manage.py build_audio_sprites --letter b # just one letter
+#   python manage.py build_audio_sprites --force    # everything
+#
+# Safe to run on a schedule / after every deploy: unchanged letters are skipped.
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from challenges.models import Letter
+from challenges.sprites import build_letter_sprite
+
+
+class Command(BaseCommand):
+    help = "Build per-letter audio sprites for letters whose words changed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--letter', help="only this letter, e.g. 'a'")
+        parser.add_argument('--force', action='store_true',
+                            help="rebuild even if nothing changed")
+        parser.add_argument('--workers', type=int, default=8,
+                            help="parallel audio downloads per letter")
+
+    def handle(self, *args, **options):
+        letters = Letter.objects.order_by('letter')
+        if options['letter']:
+            letters = letters.filter(letter__iexact=options['letter'])
+            if not letters.exists():
+                raise CommandError(f"Letter {options['letter']} not found")
+
+        built = skipped = 0
+        for letter in letters:
+            started = time.perf_counter()
+            sprite, rebuilt = build_letter_sprite(
+                letter, force=options['force'], workers=options['workers'])
+            if not rebuilt:
+                skipped += 1
+                continue
+            built += 1
+            if sprite is None:
+                self.stdout.write(f"{letter}: no playable audio, no sprite")
+            else:
+                self.stdout.write(
+                    f"{letter}: {len(sprite.manifest['clips'])} clips, "
+                    f"{sprite.bytes / 1024:.0f} KB, {sprite.duration_ms / 1000:.1f}s "
+                    f"in {time.perf_counter() - started:.2f}s")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {built} sprite(s) built, {skipped} already up to date"))
@@ -0,0 +1,22 @@
+# challenges/management/commands/build_challenge_fragments.py
+# Re-render the stored JSON of every challenge (see challenges/fragments.py).
+#
+# Edits through the admin/ORM keep them fresh by themselves; run this once
+# after deploying the ChallengeFragment migration, and whenever
+# ChallengeSerializer (or anything it shows) changes shape.
+import time
+
+from django.core.management.base import BaseCommand
+
+from challenges.fragments import build_fragments
+
+
+class Command(BaseCommand):
+    help = "Rebuild the pre-rendered JSON of every challenge"
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        built = len(build_fragments())
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ {built} challenge fragment(s) written in "
+            f"{time.perf_counter() - started:.1f}s"))
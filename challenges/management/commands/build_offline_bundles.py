@@ -0,0 +1,17 @@
+# challenges/management/commands/build_offline_bundles.py
+# Write the per-letter offline bundles (see challenges/bundles.py).
+#
+# Admin edits rebuild their letter automatically; run this after a deploy
+# (the bundle directory lives on local disk) or after a bulk import.
+# Letters whose content hasn't changed are skipped.
+from django.core.management.base import BaseCommand
+
+from challenges.bundles import build_all_bundles
+
+
+class Command(BaseCommand):
+    help = "Build offline bundles for every letter whose content changed"
+
+    def handle(self, *args, **options):
+        built = build_all_bundles()
+        self.stdout.write(self.style.SUCCESS(f"✅ {built} bundle(s) written"))
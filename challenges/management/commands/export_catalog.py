@@ -0,0 +1,96 @@
+# challenges/management/commands/export_catalog.py
+# Stream the whole content catalog out in the same format import_catalog reads.
+#
+#   python manage.py export_catalog > catalog.json
+#   python manage.py export_catalog --format csv --output ./catalog_csvs/
+#
+# Rows are read with .values() + .iterator() and written as they arrive,
+# so memory stays flat no matter how big the catalog gets.
+import csv
+import json
+import sys
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import F
+
+from challenges.catalog import SECTIONS
+from challenges.models import (Letter, Word, Challenge, YesNoQuestion,
+                               FunctionalPhrase)
+
+CHUNK_SIZE = 2000
+
+
+def section_rows(name):
+    """Yield export rows for one section, already in catalog column names."""
+    if name == 'letters':
+        qs = Letter.objects.order_by('letter').values('letter')
+    elif name == 'words':
+        qs = (Word.objects.order_by('letter__letter', 'word')
+              .values('word', 'difficulty', 'audio', letter_name=F('letter__letter')))
+    elif name == 'challenges':
+        qs = (Challenge.objects.order_by('word__letter__letter', 'word__word', 'title')
+              .values('title', 'description', 'difficulty',
+                      letter_name=F('word__letter__letter'), word_name=F('word__word')))
+    elif name == 'yes_no_questions':
+        qs = YesNoQuestion.objects.order_by('id').values(
+            'question', 'scene_description', 'correct_answer', 'visual_url')
+    else:
+        qs = FunctionalPhrase.objects.order_by('id').values('phrase', 'visual_url')
+
+    columns = [c for c in SECTIONS[name] if not c.endswith('_file')]
+    for row in qs.iterator(chunk_size=CHUNK_SIZE):
+        if 'letter_name' in row:
+            row['letter'] = row.pop('letter_name')
+        if 'word_name' in row:
+            row['word'] = row.pop('word_name')
+        yield {c: row.get(c) or '' for c in columns}
+
+
+class Command(BaseCommand):
+    help = "Export the content catalog as JSON (default) or a directory of CSVs"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=['json', 'csv'], default='json')
+        parser.add_argument(
+            '--output',
+            help="file (json) or directory (csv). json defaults to stdout")
+
+    def handle(self, *args, **options):
+        if options['format'] == 'csv':
+            if not options['output']:
+                raise CommandError("--output directory is required for csv")
+            self.export_csv(Path(options['output']))
+        elif options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as out:
+                self.export_json(out)
+        else:
+            self.export_json(sys.stdout)
+
+    def export_json(self, out):
+        # Written by hand (one row per line) instead of json.dump(whole_dict),
+        # so we never hold the full catalog in memory.
+        out.write('{\n')
+        for i, name in enumerate(SECTIONS):
+            out.write(f'  "{name}": [')
+            first = True
+            for row in section_rows(name):
+                out.write('\n    ' if first else ',\n    ')
+                out.write(json.dumps(row, ensure_ascii=False))
+                first = False
+            out.write('\n  ]' if not first else ']')
+            out.write(',\n' if i < len(SECTIONS) - 1 else '\n')
+        out.write('}\n')
+
+    def export_csv(self, directory):
+        directory.mkdir(parents=True, exist_ok=True)
+        for name, columns in SECTIONS.items():
+            columns = [c for c in columns if not c.endswith('_file')]
+            count = 0
+            with open(directory / f"{name}.csv", 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                writer.writeheader()
+                for row in section_rows(name):
+                    writer.writerow(row)
+                    count += 1
+            self.stdout.write(f"{name}: {count} rows → {directory / f'{name}.csv'}")
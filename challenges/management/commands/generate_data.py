@@ -0,0 +1,113 @@
+# challenges/management/commands/generate_data.py
+# Fill the database with production-sized synthetic data for scale testing.
+#
+#   python manage.py generate_data                       # 100k users, 10M progress rows
+#   python manage.py generate_data --users 1000 --progress 50000 --comments 5000
+#   python manage.py generate_data --seed 7 --noinput    # different (but repeatable) data
+#
+# Deterministic: the same --seed on an empty database gives the same rows.
+# Distributions (Zipfian popularity, 80/20 user activity, comment bursts)
+# are explained in challenges/synthetic.py.
+#
+# ⚠️ Writes to the database in DATABASE_URL. Never point this at production.
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.db import connection
+
+from challenges.models import Challenge, Comment, UserProgress
+from challenges.seeding import seed_catalog
+from challenges.synthetic import (COMMENT_FIELDS, PROGRESS_FIELDS, USER_FIELDS,
+                                  Generator, generated_user_ids, insert_rows)
+
+
+class Command(BaseCommand):
+    help = "Generate millions of realistic users, progress rows and comments"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--progress', type=int, default=10_000_000,
+                            help="target number of UserProgress rows")
+        parser.add_argument('--comments', type=int, default=300_000)
+        parser.add_argument('--letters', type=int, default=26,
+                            help="catalog size, only used if the catalog is empty")
+        parser.add_argument('--words-per-letter', type=int, default=30)
+        parser.add_argument('--challenges-per-word', type=int, default=2)
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument('--zipf', type=float, default=1.1,
+                            help="popularity skew (higher = fewer hot items)")
+        parser.add_argument('--prefix', default='synth',
+                            help="username prefix of the generated users")
+        parser.add_argument('--password', default='synthetic-pass',
+                            help="password of every generated user")
+        parser.add_argument('--batch-size', type=int, default=20_000)
+        parser.add_argument('--noinput', '--no-input', action='store_true',
+                            help="don't ask for confirmation")
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        if User.objects.filter(username__startswith=prefix).exists():
+            raise CommandError(
+                f"Users starting with '{prefix}' already exist - "
+                f"use another --prefix or a fresh database")
+
+        db = connection.settings_dict
+        if not options['noinput']:
+            answer = input(
+                f"This adds {options['users']:,} users, ~{options['progress']:,} "
+                f"progress rows and {options['comments']:,} comments to "
+                f"{db['ENGINE'].rsplit('.', 1)[-1]} database '{db['NAME']}'. "
+                f"Type 'yes' to continue: ")
+            if answer != 'yes':
+                raise CommandError("Cancelled.")
+
+        started = time.perf_counter()
+        gen = Generator(seed=options['seed'], zipf_s=options['zipf'])
+        batch_size = options['batch_size']
+        self.last_report = 0
+
+        if not Challenge.objects.exists():
+            seed_catalog(letters=options['letters'],
+                         words_per_letter=options['words_per_letter'],
+                         challenges_per_word=options['challenges_per_word'],
+                         seed=options['seed'])
+            self.stdout.write("Catalog was empty - seeded one")
+        gen.set_catalog()
+
+        self.step("users", lambda: insert_rows(
+            User, USER_FIELDS,
+            gen.user_rows(options['users'], prefix, options['password']),
+            batch_size, self.progress))
+        gen.set_users(generated_user_ids(prefix))
+
+        self.step("progress rows", lambda: insert_rows(
+            UserProgress, PROGRESS_FIELDS, gen.progress_rows(options['progress']),
+            batch_size, self.progress))
+        self.step("comments", lambda: insert_rows(
+            Comment, COMMENT_FIELDS, gen.comment_rows(options['comments']),
+            batch_size, self.progress))
+
+        if connection.vendor == 'postgresql':
+            # fresh statistics so the planner knows the tables are now huge
+            with connection.cursor() as cursor:
+                cursor.execute(f'ANALYZE "{User._meta.db_table}", '
+                               f'"{UserProgress._meta.db_table}", '
+                               f'"{Comment._meta.db_table}"')
+
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Done in {time.perf_counter() - started:.0f}s"))
+
+    def step(self, label, run):
+        started = time.perf_counter()
+        count = run()
+        took = time.perf_counter() - started
+        self.stdout.write(f"{count:,} {label} in {took:.1f}s "
+                          f"({count / max(took, 1e-9):,.0f}/s)")
+
+    def progress(self, model, total):
+        # a progress line every ~5 seconds, not every batch
+        now = time.perf_counter()
+        if now - self.last_report >= 5:
+            self.last_report = now
+            self.stdout.write(f"  ...{total:,} {model.__name__} rows")
@@ -0,0 +1,345 @@
+# challenges/management/commands/import_catalog.py
+# Bulk-load letters, words, challenges, yes/no questions and functional phrases.
+#
+#   python manage.py import_catalog catalog.json --media-dir ./media
+#   python manage.py import_catalog ./catalog_csvs/ --media-dir ./media --workers 16
+#
+# - Idempotent: rows are matched by natural key (see challenges/catalog.py),
+#   so running the same file twice creates nothing the second time.
+# - Uses bulk_create / bulk_update in batches, each batch in its own transaction.
+# - Media (*_file columns) is uploaded to Cloudinary through a thread pool,
+#   because uploads are network-bound and one-at-a-time is what made the admin slow.
+import time
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from challenges import search
+from challenges.bundles import build_all_bundles
+from challenges.fragments import build_fragments
+from challenges.catalog import (load_catalog, letter_key, word_key,
+                                challenge_key, text_key)
+from challenges.models import (Letter, Word, Challenge, YesNoQuestion,
+                               FunctionalPhrase)
+from challenges.uploads import (upload_word_audio, upload_yes_no_visual,
+                                upload_phrase_visual)
+
+DIFFICULTIES = ('easy', 'medium', 'hard')
+ANSWERS = ('Yes', 'No')
+
+
+def chunked(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class Command(BaseCommand):
+    help = "Import the content catalog from a JSON file or a directory of CSVs"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'source', help="catalog .json file or directory of .csv files")
+        parser.add_argument(
+            '--media-dir', default='.',
+            help="directory that *_file paths are relative to")
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=8,
+                            help="parallel Cloudinary uploads")
+        parser.add_argument(
+            '--reupload', action='store_true',
+            help="upload media even if the row already has a URL")
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="report what would change, without uploading or saving")
+
+    def handle(self, *args, **options):
+        self.batch_size = options['batch_size']
+        self.workers = options['workers']
+        self.reupload = options['reupload']
+        self.dry_run = options['dry_run']
+        self.media_dir = Path(options['media_dir'])
+
+        try:
+            catalog = load_catalog(options['source'])
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read catalog: {e}")
+
+        self.validate(catalog)
+
+        started = time.perf_counter()
+        # A dry run wraps everything in one transaction that is rolled back.
+        # A real run commits batch by batch (see sync()), so a 2,000 word
+        # import never holds one giant transaction open during uploads.
+        outer = transaction.atomic() if self.dry_run else nullcontext()
+        with outer:
+            letters = self.import_letters(catalog)
+            words = self.import_words(catalog, letters)
+            self.import_challenges(catalog, words)
+            self.import_yes_no_questions(catalog)
+            self.import_functional_phrases(catalog)
+            if self.dry_run:
+                transaction.set_rollback(True)
+
+        if not self.dry_run:
+            # bulk writes skip the signals that normally rebuild bundles,
+            # the pre-rendered challenge JSON and the search index
+            built = build_all_bundles()
+            self.stdout.write(f"offline bundles: {built} rebuilt")
+            fragments = len(build_fragments())
+            self.stdout.write(f"challenge JSON fragments: {fragments} rebuilt")
+            search.catalog_changed()
+
+        elapsed = time.perf_counter() - started
+        total = sum(len(rows) for rows in catalog.values())
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Imported {total} rows in {elapsed:.2f}s "
+            f"({total / elapsed if elapsed else 0:.0f} rows/s)"
+            + (" [dry run - nothing saved]" if self.dry_run else "")))
+
+    # ------------------------------------------------------------------
+    # validation - fail before touching the database
+
+    def validate(self, catalog):
+        problems = []
+        for i, row in enumerate(catalog['letters']):
+            if len(row['letter']) != 1:
+                problems.append(f"letters[{i}]: letter must be 1 character")
+        for section in ('words', 'challenges'):
+            for i, row in enumerate(catalog[section]):
+                if not row['letter'] or not row['word']:
+                    problems.append(f"{section}[{i}]: letter and word are required")
+                if row['difficulty'] not in DIFFICULTIES:
+                    problems.append(
+                        f"{section}[{i}]: difficulty must be one of {DIFFICULTIES}")
+        for i, row in enumerate(catalog['challenges']):
+            if not row['title']:
+                problems.append(f"challenges[{i}]: title is required")
+        for i, row in enumerate(catalog['yes_no_questions']):
+            if not row['question']:
+                problems.append(f"yes_no_questions[{i}]: question is required")
+            if row['correct_answer'] not in ANSWERS:
+                problems.append(
+                    f"yes_no_questions[{i}]: correct_answer must be Yes or No")
+        for i, row in enumerate(catalog['functional_phrases']):
+            if not row['phrase']:
+                problems.append(f"functional_phrases[{i}]: phrase is required")
+        for section in ('words', 'yes_no_questions', 'functional_phrases'):
+            column = 'audio_file' if section == 'words' else 'visual_file'
+            for i, row in enumerate(catalog[section]):
+                if row[column] and not (self.media_dir / row[column]).is_file():
+                    problems.append(
+                        f"{section}[{i}]: {column} {row[column]} not found in {self.media_dir}")
+
+        if problems:
+            shown = "\n  ".join(problems[:20])
+            more = f"\n  ...and {len(problems) - 20} more" if len(problems) > 20 else ""
+            raise CommandError(f"Catalog has {len(problems)} problem(s):\n  {shown}{more}")
+
+    # ------------------------------------------------------------------
+    # generic upsert
+
+    def sync(self, label, model, rows, existing, fields):
+        """Create/update `rows` (key → field values) against `existing` (key → obj).
+
+        Only rows whose values actually differ are written, which is what makes
+        a second run of the same file a no-op.
+        """
+        started = time.perf_counter()
+        to_create, to_update = [], []
+        for key, values in rows.items():
+            obj = existing.get(key)
+            if obj is None:
+                to_create.append(model(**values))
+                continue
+            changed = False
+            for field in fields:
+                if getattr(obj, field) != values[field]:
+                    setattr(obj, field, values[field])
+                    changed = True
+            if changed:
+                to_update.append(obj)
+
+        for batch in chunked(to_create, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_create(batch)
+        for batch in chunked(to_update, self.batch_size):
+            with transaction.atomic():
+                model.objects.bulk_update(batch, fields)
+
+        elapsed = time.perf_counter() - started
+        unchanged = len(rows) - len(to_create) - len(to_update)
+        self.stdout.write(
+            f"{label}: {len(rows)} rows → {len(to_create)} created, "
+            f"{len(to_update)} updated, {unchanged} unchanged "
+            f"in {elapsed:.2f}s ({len(rows) / elapsed if elapsed else 0:.0f} rows/s)")
+
+    def upload_media(self, label, jobs):
+        """Run uploads in parallel. jobs = {key: (upload_fn, path, name)}.
+
+        Returns {key: {model field: value}} for the uploads that succeeded.
+        """
+        if not jobs:
+            return {}
+        if self.dry_run:
+            self.stdout.write(f"{label} media: {len(jobs)} file(s) would be uploaded")
+            return {}
+
+        started = time.perf_counter()
+        uploaded, failed = {}, 0
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {}
+            for key, (upload_fn, path, name) in jobs.items():
+                futures[pool.submit(self._upload_one, upload_fn, path, name)] = (key, path)
+            for future in as_completed(futures):
+                key, path = futures[future]
+                try:
+                    uploaded[key] = future.result()
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f"❌ Upload failed for {path}: {e}")
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f"{label} media: {len(uploaded)} uploaded, {failed} failed "
+            f"in {elapsed:.2f}s ({len(uploaded) / elapsed if elapsed else 0:.1f} files/s, "
+            f"{self.workers} workers)")
+        return uploaded
+
+    def _upload_one(self, upload_fn, path, name):
+        with open(path, 'rb') as f:
+            return upload_fn(f, name)
+
+    def needs_upload(self, row, column, obj, url_field):
+        if not row[column]:
+            return False
+        return self.reupload or obj is None or not getattr(obj, url_field)
+
+    # ------------------------------------------------------------------
+    # sections
+
+    def import_letters(self, catalog):
+        # Words and challenges may mention letters that aren't listed in the
+        # letters section - create those too rather than failing.
+        wanted = {}
+        for section in ('letters', 'words', 'challenges'):
+            for row in catalog[section]:
+                wanted.setdefault(letter_key(row['letter']), row['letter'].strip())
+
+        existing = {letter_key(l.letter): l for l in Letter.objects.all()}
+        rows = {key: {'letter': value} for key, value in wanted.items()
+                if key not in existing}
+        self.sync('letters', Letter, rows, existing, ['letter'])
+        return {letter_key(l.letter): l for l in Letter.objects.all()}
+
+    def import_words(self, catalog, letters):
+        existing = {
+            word_key(w.letter.letter, w.word): w
+            for w in Word.objects.select_related('letter')
+        }
+        catalog_rows = {word_key(r['letter'], r['word']): r for r in catalog['words']}
+
+        jobs = {
+            key: (upload_word_audio, self.media_dir / row['audio_file'], row['word'])
+            for key, row in catalog_rows.items()
+            if self.needs_upload(row, 'audio_file', existing.get(key), 'audio')
+        }
+        uploaded = self.upload_media('words', jobs)
+
+        rows = {}
+        for key, row in catalog_rows.items():
+            obj = existing.get(key)
+            # never blank out a URL we already have just because the row has none
+            audio = row['audio'] or (obj.audio if obj else '')
+            # duration/size only stay valid while the audio URL is unchanged
+            same_audio = obj is not None and obj.audio == audio
+            rows[key] = {
+                'word': row['word'],
+                'letter': letters[letter_key(row['letter'])],
+                'difficulty': row['difficulty'],
+                'audio': audio,
+                'audio_duration_ms': obj.audio_duration_ms if same_audio else None,
+                'audio_bytes': obj.audio_bytes if same_audio else None,
+            }
+            rows[key].update(uploaded.get(key, {}))
+        self.sync('words', Word, rows, existing,
+                  ['word', 'difficulty', 'audio', 'audio_duration_ms', 'audio_bytes'])
+        return {
+            word_key(w.letter.letter, w.word): w
+            for w in Word.objects.select_related('letter')
+        }
+
+    def import_challenges(self, catalog, words):
+        existing = {
+            challenge_key(c.word.letter.letter, c.word.word, c.title): c
+            for c in Challenge.objects.select_related('word__letter')
+        }
+        rows = {}
+        missing = []
+        for row in catalog['challenges']:
+            word = words.get(word_key(row['letter'], row['word']))
+            if word is None:
+                missing.append(f"{row['letter']}/{row['word']}")
+                continue
+            rows[challenge_key(row['letter'], row['word'], row['title'])] = {
+                'title': row['title'],
+                'description': row['description'],
+                'word': word,
+                'difficulty': row['difficulty'],
+            }
+        if missing:
+            raise CommandError(
+                f"{len(missing)} challenge(s) point at unknown words, e.g. {missing[:5]}")
+        self.sync('challenges', Challenge, rows, existing,
+                  ['title', 'description', 'difficulty'])
+
+    def import_yes_no_questions(self, catalog):
+        existing = {text_key(q.question): q for q in YesNoQuestion.objects.all()}
+        catalog_rows = {text_key(r['question']): r for r in catalog['yes_no_questions']}
+
+        jobs = {
+            key: (upload_yes_no_visual, self.media_dir / row['visual_file'], row['question'])
+            for key, row in catalog_rows.items()
+            if self.needs_upload(row, 'visual_file', existing.get(key), 'visual_url')
+        }
+        uploaded = self.upload_media('yes_no_questions', jobs)
+
+        rows = {}
+        for key, row in catalog_rows.items():
+            obj = existing.get(key)
+            rows[key] = {
+                'question': row['question'],
+                'scene_description': row['scene_description'],
+                'correct_answer': row['correct_answer'],
+                'visual_url': row['visual_url'] or (obj.visual_url if obj else None),
+                'visual_variants': obj.visual_variants if obj else [],
+            }
+            rows[key].update(uploaded.get(key, {}))
+        self.sync('yes_no_questions', YesNoQuestion, rows, existing,
+                  ['question', 'scene_description', 'correct_answer',
+                   'visual_url', 'visual_variants'])
+
+    def import_functional_phrases(self, catalog):
+        existing = {text_key(p.phrase): p for p in FunctionalPhrase.objects.all()}
+        catalog_rows = {text_key(r['phrase']): r for r in catalog['functional_phrases']}
+
+        jobs = {
+            key: (upload_phrase_visual, self.media_dir / row['visual_file'], row['phrase'])
+            for key, row in catalog_rows.items()
+            if self.needs_upload(row, 'visual_file', existing.get(key), 'visual_url')
+        }
+        uploaded = self.upload_media('functional_phrases', jobs)
+
+        rows = {}
+        for key, row in catalog_rows.items():
+            obj = existing.get(key)
+            rows[key] = {
+                'phrase': row['phrase'],
+                'visual_url': row['visual_url'] or (obj.visual_url if obj else None),
+                'visual_variants': obj.visual_variants if obj else [],
+            }
+            rows[key].update(uploaded.get(key, {}))
+        self.sync('functional_phrases', FunctionalPhrase, rows, existing,
+                  ['phrase', 'visual_url', 'visual_variants'])
@@ -0,0 +1,36 @@
+# challenges/management/commands/rollup_attempts.py
+# Fold new progress attempts into UserProgress/ReviewState (challenges/attempts.py)
+# and create the coming months' partitions of the attempt log (Postgres).
+#
+#   python manage.py rollup_attempts                # once - e.g. a cron job every minute
+#   python manage.py rollup_attempts --every 30     # as a worker process, every 30s
+#
+# Needed for PROGRESS_WRITES=rollup (otherwise submissions never reach
+# /progress/). With the default 'inline' writes it only moves its bookmark
+# and makes partitions - harmless, so it can run either way.
+import time
+
+from django.core.management.base import BaseCommand
+
+from challenges.attempts import ensure_partitions, roll_up
+
+
+class Command(BaseCommand):
+    help = "Apply new progress attempts and create attempt log partitions"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--every', type=float, metavar='SECONDS',
+                            help="keep running, one rollup every SECONDS")
+
+    def handle(self, *args, **options):
+        while True:
+            for name in ensure_partitions():
+                self.stdout.write(f"  partition {name} created")
+            started = time.perf_counter()
+            count = roll_up(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(
+                f"✅ {count:,} attempt(s) rolled up in {time.perf_counter() - started:.1f}s"))
+            if not options['every']:
+                return
+            time.sleep(options['every'])
@@ -0,0 +1,59 @@
+# challenges/management/commands/run_service_stubs.py
+# Run local stand-ins for Groq, SendGrid and Cloudinary (speechfun_backend/stubs.py).
+#
+#   python manage.py run_service_stubs
+#   python manage.py run_service_stubs --set groq.latency=lognormal:3000:0.8 --set groq.errors=0.1
+#   python manage.py run_service_stubs --set cloudinary.rps=2 --set sendgrid.hang=0.05
+#
+# Then start the app with SERVICE_STUBS_URL=http://127.0.0.1:8765 (and any
+# non-empty GROQ_API_KEY / CLOUDINARY_* values - the stubs don't check them).
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from speechfun_backend.stubs import DEFAULTS, SERVICES, StubServer, config_from_env
+
+
+class Command(BaseCommand):
+    help = "Serve fake Groq/SendGrid/Cloudinary APIs with tunable latency and faults"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--set', action='append', default=[], metavar='SERVICE.KEY=VALUE',
+            help="e.g. groq.latency=fixed:2000, sendgrid.errors=0.2, "
+                 "cloudinary.rps=5 (repeatable)")
+        parser.add_argument('--seed', type=int, help="make faults repeatable")
+        parser.add_argument('--verbose', action='store_true',
+                            help="log every request")
+
+    def handle(self, *args, **options):
+        config = config_from_env()
+        for item in options['set']:
+            try:
+                name, value = item.split('=', 1)
+                service, key = name.split('.', 1)
+                config[service][key] = type(DEFAULTS[service][key])(value)
+            except (ValueError, KeyError):
+                raise CommandError(
+                    f"Bad --set '{item}': use SERVICE.KEY=VALUE with SERVICE in "
+                    f"{', '.join(SERVICES)} and KEY in {', '.join(DEFAULTS['groq'])}")
+
+        try:
+            server = StubServer((options['host'], options['port']), config,
+                                options['seed'], options['verbose'])
+        except ValueError as e:
+            raise CommandError(str(e))
+
+        self.stdout.write(json.dumps(config, indent=2))
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ Service stubs on {server.url} - start the app with "
+            f"SERVICE_STUBS_URL={server.url}"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            self.stdout.write(json.dumps(server.state.stats(), indent=2))
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0012_functionalphrase_alter_userprogress_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='functionalphrase',
+            name='visual_variants',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='yesnoquestion',
+            name='visual_variants',
+            field=models.JSONField(blank=True, default=list),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:52
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0013_yesnoquestion_visual_variants_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='word',
+            name='audio_bytes',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='word',
+            name='audio_duration_ms',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='AudioSprite',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500)),
+                ('source_hash', models.CharField(max_length=64)),
+                ('duration_ms', models.PositiveIntegerField(default=0)),
+                ('bytes', models.PositiveIntegerField(default=0)),
+                ('manifest', models.JSONField(default=dict)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+                ('letter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='audio_sprite', to='challenges.letter')),
+            ],
+        ),
+    ]
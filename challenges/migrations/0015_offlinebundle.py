@@ -0,0 +1,26 @@
+# Generated by Django 6.0.1 on 2026-10-19 04:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0014_word_audio_bytes_word_audio_duration_ms_audiosprite'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OfflineBundle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('filename', models.CharField(max_length=100)),
+                ('content_hash', models.CharField(max_length=64)),
+                ('bytes', models.PositiveIntegerField(default=0)),
+                ('gzip_bytes', models.PositiveIntegerField(default=0)),
+                ('built_at', models.DateTimeField(auto_now=True)),
+                ('letter', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='offline_bundle', to='challenges.letter')),
+            ],
+        ),
+    ]
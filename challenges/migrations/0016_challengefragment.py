@@ -0,0 +1,22 @@
+# Generated by Django 6.0.1 on 2026-10-19 05:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0015_offlinebundle'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChallengeFragment',
+            fields=[
+                ('challenge', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='fragment', serialize=False, to='challenges.challenge')),
+                ('json', models.TextField()),
+                ('built_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,73 @@
+# Written by hand: database search columns and indexes (challenges/db_search.py).
+#
+# Postgres only - on SQLite this migration does nothing and db_search.py
+# uses its portable fallback. The columns are NOT on the Django models:
+#
+#   search_vector  tsvector GENERATED ALWAYS AS (...) STORED
+#                  Postgres keeps it up to date on every INSERT/UPDATE -
+#                  bulk_create and queryset.update() included, no signals needed.
+#                  Weight A = the main text, B = the description.
+#   GIN index on search_vector               → full-text matches
+#   GIN trigram index on the main text       → misspellings ("elefant"),
+#                                              only if pg_trgm can be installed
+from django.db import migrations, transaction
+
+# table → (main column, description column or None)
+SEARCH_COLUMNS = {
+    'challenges_word': ('word', None),
+    'challenges_challenge': ('title', 'description'),
+    'challenges_yesnoquestion': ('question', 'scene_description'),
+    'challenges_functionalphrase': ('phrase', None),
+}
+
+
+def vector_sql(main, description):
+    sql = f"setweight(to_tsvector('simple'::regconfig, coalesce({main}, '')), 'A')"
+    if description:
+        sql += (f" || setweight(to_tsvector('simple'::regconfig, "
+                f"coalesce({description}, '')), 'B')")
+    return sql
+
+
+def add_search_columns(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    try:
+        # needs the contrib package on the server (and CREATE rights)
+        with transaction.atomic(using=schema_editor.connection.alias):
+            schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        trigram = True
+    except Exception as e:
+        print(f"\n❌ pg_trgm not available ({type(e).__name__}) - "
+              f"database search will work without fuzzy matching")
+        trigram = False
+
+    for table, (main, description) in SEARCH_COLUMNS.items():
+        schema_editor.execute(
+            f'ALTER TABLE {table} ADD COLUMN search_vector tsvector '
+            f'GENERATED ALWAYS AS ({vector_sql(main, description)}) STORED')
+        schema_editor.execute(
+            f'CREATE INDEX {table}_search_vector ON {table} USING gin (search_vector)')
+        if trigram:
+            schema_editor.execute(
+                f'CREATE INDEX {table}_{main}_trgm ON {table} USING gin ({main} gin_trgm_ops)')
+
+
+def remove_search_columns(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, (main, _) in SEARCH_COLUMNS.items():
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_{main}_trgm')
+        # dropping the column drops its GIN index too
+        schema_editor.execute(f'ALTER TABLE {table} DROP COLUMN IF EXISTS search_vector')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0016_challengefragment'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_search_columns, remove_search_columns),
+    ]
@@ -0,0 +1,114 @@
+# Generated by Django 6.0.1 on 2026-10-19 05:50
+# Edited by hand: on Postgres, challenges_progressattempt is created as a
+# table partitioned by month of created_at (see challenges/attempts.py).
+#
+#   - the primary key is (id, created_at): Postgres wants the partition key
+#     in it. Django still sees `id` as the primary key - ids come from one
+#     sequence, so they stay unique across partitions
+#   - a DEFAULT partition catches anything no monthly partition covers
+#   - this month and the next 2 get their partitions here;
+#     `manage.py rollup_attempts` keeps creating the next ones
+#
+# Anything else (SQLite) gets the ordinary table from the model.
+import datetime
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+PARTITIONS_AHEAD = 2
+
+
+def month_starts(today, count):
+    year, month = today.year, today.month
+    for _ in range(count + 1):
+        yield datetime.date(year, month, 1)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+
+
+def create_attempt_table(apps, schema_editor):
+    model = apps.get_model('challenges', 'ProgressAttempt')
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.create_model(model)
+        return
+    table = model._meta.db_table
+    user_field = model._meta.get_field('user')
+    user_table = user_field.related_model._meta.db_table
+    user_type = user_field.db_type(schema_editor.connection)
+    schema_editor.execute(f'CREATE SEQUENCE {table}_id_seq')
+    schema_editor.execute(f"""
+        CREATE TABLE {table} (
+            id bigint NOT NULL DEFAULT nextval('{table}_id_seq'),
+            item_type varchar(20) NOT NULL,
+            item_id integer NOT NULL CHECK (item_id >= 0),
+            completed boolean NOT NULL,
+            score integer NOT NULL,
+            applied boolean NOT NULL,
+            created_at timestamp with time zone NOT NULL,
+            user_id {user_type} NOT NULL
+                REFERENCES {user_table} (id) DEFERRABLE INITIALLY DEFERRED,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)""")
+    # owned by the column: dropped with the table, found by sequence resets
+    schema_editor.execute(f'ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id')
+    # created on the parent = created on every partition, now and later
+    schema_editor.execute(f'CREATE INDEX attempt_user ON {table} (user_id, id)')
+    schema_editor.execute(
+        f'CREATE INDEX attempt_user_item ON {table} (user_id, item_type, item_id, id)')
+    schema_editor.execute(f'CREATE TABLE {table}_default PARTITION OF {table} DEFAULT')
+    starts = list(month_starts(datetime.date.today(), PARTITIONS_AHEAD + 1))
+    for start, end in zip(starts, starts[1:]):
+        schema_editor.execute(
+            f"CREATE TABLE {table}_y{start:%Y}m{start:%m} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{start}') TO ('{end}')")
+
+
+def drop_attempt_table(apps, schema_editor):
+    model = apps.get_model('challenges', 'ProgressAttempt')
+    if schema_editor.connection.vendor != 'postgresql':
+        schema_editor.delete_model(model)
+        return
+    # the partitions and the sequence go with it
+    schema_editor.execute(f'DROP TABLE {model._meta.db_table}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0018_reviewstate'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttemptRollup',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_attempt_id', models.BigIntegerField(default=0)),
+                ('rolled_up_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.CreateModel(
+                    name='ProgressAttempt',
+                    fields=[
+                        ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                        ('item_type', models.CharField(max_length=20)),
+                        ('item_id', models.PositiveIntegerField()),
+                        ('completed', models.BooleanField()),
+                        ('score', models.IntegerField()),
+                        ('applied', models.BooleanField(default=True)),
+                        ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+                        ('user', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='progress_attempts', to=settings.AUTH_USER_MODEL)),
+                    ],
+                    options={
+                        'indexes': [models.Index(fields=['user', 'id'], name='attempt_user'), models.Index(fields=['user', 'item_type', 'item_id', 'id'], name='attempt_user_item')],
+                    },
+                ),
+            ],
+        ),
+        # after the state one above, so the function sees the model
+        migrations.RunPython(create_attempt_table, drop_attempt_table),
+    ]
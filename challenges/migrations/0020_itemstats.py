@@ -0,0 +1,31 @@
+# Generated by Django 6.0.1 on 2026-10-19 05:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('challenges', '0019_progressattempt'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ItemStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attempts', models.IntegerField(default=0)),
+                ('learners', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('score_sum', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('challenge', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='challenges.challenge')),
+                ('functional_phrase', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='challenges.functionalphrase')),
+                ('yes_no_question', models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='stats', to='challenges.yesnoquestion')),
+            ],
+            options={
+                'verbose_name_plural': 'Item stats',
+            },
+        ),
+    ]
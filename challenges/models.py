@@ -1,5 +1,6 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.utils import timezone
 
 # Create your models here.
 
@@ -29,12 +30,51 @@ class Word(models.Model):
     # That's why its written as tuples of 2 items
     difficulty = models.CharField(max_length=10, choices=[(
         'easy', 'Easy'), ('medium', 'Medium'), ('hard', 'Hard')])
+    # Filled in when the audio is uploaded / when the letter's sprite is built,
+    # so the app can plan what to prefetch. null = unknown (e.g. not an MP3).
+    audio_duration_ms = models.PositiveIntegerField(null=True, blank=True)
+    audio_bytes = models.PositiveIntegerField(null=True, blank=True)
 # Add this for admin
 
     def __str__(self):
         return self.word
 
 
+class AudioSprite(models.Model):
+    # All the word audio for one letter glued into ONE mp3, so a letter screen
+    # downloads 1 file instead of 30. Built by `manage.py build_audio_sprites`.
+    letter = models.OneToOneField(Letter, on_delete=models.CASCADE,
+                                  related_name='audio_sprite')
+    url = models.URLField(max_length=500)  # Cloudinary URL of the sprite
+    # sha256 of the letter's (word id, audio url) list - if it hasn't changed,
+    # the sprite is still correct and the build skips this letter
+    source_hash = models.CharField(max_length=64)
+    duration_ms = models.PositiveIntegerField(default=0)
+    bytes = models.PositiveIntegerField(default=0)
+    # {"clips": [{"word_id", "word", "offset_ms", "duration_ms", "bytes"}],
+    #  "missing": [word ids whose audio couldn't be added]}
+    manifest = models.JSONField(default=dict)
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Audio sprite for {self.letter}"
+
+
+class OfflineBundle(models.Model):
+    # Latest offline bundle file for a letter (see challenges/bundles.py).
+    # The file itself lives in OFFLINE_BUNDLE_ROOT; this row is the index entry.
+    letter = models.OneToOneField(Letter, on_delete=models.CASCADE,
+                                  related_name='offline_bundle')
+    filename = models.CharField(max_length=100)  # letter-<id>.<hash16>.json
+    content_hash = models.CharField(max_length=64)  # sha256 of the json
+    bytes = models.PositiveIntegerField(default=0)
+    gzip_bytes = models.PositiveIntegerField(default=0)
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"Offline bundle for {self.letter}"
+
+
 class Challenge(models.Model):
     title = models.CharField(max_length=100)
     description = models.TextField()
@@ -48,6 +88,18 @@ class Challenge(models.Model):
         return f"{self.title or 'Say ' + self.word.word} ({self.difficulty})"
 
 
+class ChallengeFragment(models.Model):
+    # The challenge's ChallengeSerializer JSON, rendered ahead of time so the
+    # list/detail endpoints just join strings (see challenges/fragments.py).
+    challenge = models.OneToOneField(Challenge, on_delete=models.CASCADE,
+                                     primary_key=True, related_name='fragment')
+    json = models.TextField()
+    built_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"JSON for challenge {self.challenge_id}"
+
+
 class Comment(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     challenge = models.ForeignKey(Challenge, on_delete=models.CASCADE)
@@ -88,6 +140,113 @@ class UserProgress(models.Model):
             return f"✓ {self.user.username}"
 
 
+class ReviewState(models.Model):
+    # Spaced repetition: when should this kid see this item again?
+    # Updated on every progress write (see challenges/scheduler.py), read by
+    # /practice/next/ with one range scan of the (user, due_at) index.
+    # item_type/item_id instead of 3 foreign keys, so every content type sits
+    # in the same index: 'letter' → Challenge, 'yes_no' → YesNoQuestion,
+    # 'functional' → FunctionalPhrase.
+    # no separate user_id index: the two below both start with user
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='review_states',
+                             db_index=False)
+    item_type = models.CharField(max_length=20)
+    item_id = models.PositiveIntegerField()
+    # SM-2: days until the next review, how fast that grows, correct answers in a row
+    interval_days = models.FloatField(default=0)
+    ease = models.FloatField(default=2.5)
+    repetitions = models.PositiveIntegerField(default=0)
+    last_quality = models.PositiveSmallIntegerField(default=0)  # 0-5
+    due_at = models.DateTimeField()
+    reviewed_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'item_type', 'item_id'],
+                                    name='unique_review_state'),
+        ]
+        indexes = [
+            models.Index(fields=['user', 'due_at'], name='review_user_due'),
+            # deleting a challenge/question/phrase deletes its review states
+            models.Index(fields=['item_type', 'item_id'], name='review_item'),
+        ]
+
+    def __str__(self):
+        return f"{self.item_type} {self.item_id} for user {self.user_id}, due {self.due_at:%Y-%m-%d}"
+
+
+class ProgressAttempt(models.Model):
+    # Every progress submission, in order - never updated (see
+    # challenges/attempts.py). UserProgress keeps only the latest result per
+    # item; this is the history behind it (how many tries, how the scores
+    # went). On Postgres the table is partitioned by month of created_at.
+    # Items by (type, id) like ReviewState; the history outlives a deleted item.
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='progress_attempts',
+                             db_index=False)
+    item_type = models.CharField(max_length=20)
+    item_id = models.PositiveIntegerField()
+    completed = models.BooleanField()
+    score = models.IntegerField()
+    # True: the request already updated UserProgress/ReviewState itself.
+    # False: left to the rollup (PROGRESS_WRITES='rollup')
+    applied = models.BooleanField(default=True)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        indexes = [
+            # a kid's history, newest first - all of it, or of one item
+            models.Index(fields=['user', 'id'], name='attempt_user'),
+            models.Index(fields=['user', 'item_type', 'item_id', 'id'], name='attempt_user_item'),
+        ]
+
+    def __str__(self):
+        return f"{self.item_type} {self.item_id} by user {self.user_id}: {self.score}"
+
+
+class AttemptRollup(models.Model):
+    # How far `manage.py rollup_attempts` got: every attempt up to
+    # last_attempt_id has been folded into UserProgress/ReviewState.
+    name = models.CharField(max_length=50, primary_key=True)
+    last_attempt_id = models.BigIntegerField(default=0)
+    rolled_up_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.name}: up to attempt {self.last_attempt_id}"
+
+
+class ItemStats(models.Model):
+    # Per-item analytics for content designers (challenges/item_stats.py):
+    # kept up to date by a delta on every progress write, and recomputed from
+    # UserProgress every night (`manage.py reconcile_item_stats`), so the
+    # admin and /stats/ never GROUP BY the whole progress table.
+    # One of the three items is set - the same field names as UserProgress.
+    challenge = models.OneToOneField(Challenge, on_delete=models.CASCADE, null=True,
+                                     blank=True, related_name='stats')
+    yes_no_question = models.OneToOneField('YesNoQuestion', on_delete=models.CASCADE,
+                                           null=True, blank=True, related_name='stats')
+    functional_phrase = models.OneToOneField('FunctionalPhrase', on_delete=models.CASCADE,
+                                             null=True, blank=True, related_name='stats')
+    attempts = models.IntegerField(default=0)    # submissions in the attempt log
+    learners = models.IntegerField(default=0)    # UserProgress rows = kids who tried it
+    completed = models.IntegerField(default=0)   # ...of them with completed=True
+    score_sum = models.BigIntegerField(default=0)   # sum of their latest scores
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = "Item stats"
+
+    @property
+    def completion_rate(self):
+        return self.completed / self.learners if self.learners else None
+
+    @property
+    def average_score(self):
+        return self.score_sum / self.learners if self.learners else None
+
+    def __str__(self):
+        return f"{self.attempts} attempts, {self.completed}/{self.learners} completed"
+
+
 class YesNoQuestion(models.Model):
     scene_description = models.CharField(
         max_length=200,
@@ -107,6 +266,9 @@ class YesNoQuestion(models.Model):
         null=True,
         help_text="Cloudinary URL for image or video (auto-filled after upload)"
     )
+    # Resized copies made by the admin upload (see challenges/images.py):
+    # [{"url", "width", "height", "bytes", "format", "kind"}, ...] smallest first
+    visual_variants = models.JSONField(default=list, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -128,6 +290,7 @@ class FunctionalPhrase(models.Model):
         null=True,
         help_text="Cloudinary URL for image or short video (auto-filled after upload)"
     )
+    visual_variants = models.JSONField(default=list, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -0,0 +1,101 @@
+# challenges/scheduler.py
+# Spaced repetition (SM-2, the SuperMemo 2 algorithm) for every content type.
+#
+# Each progress write (update_progress, sync and async) becomes a "review":
+#
+#   score 0-100 (+ completed) → quality 0-5
+#   quality < 3  → start over: see it again tomorrow
+#   quality >= 3 → next review in 1 day, then 6 days, then interval x ease
+#   ease         → goes down when it was hard, up when it was easy (min 1.3)
+#
+# and the result is stored in ReviewState(user, item_type, item_id).
+# /practice/next/ then just reads "what is due now?" for the kid - one range
+# scan of the (user, due_at) index instead of the app downloading every list
+# and every progress row to decide.
+#
+# Progress rows written before this existed (or by generate_data) are turned
+# into review states by `manage.py backfill_review_state`.
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import Challenge, FunctionalPhrase, ReviewState, YesNoQuestion
+
+# item_type (= UserProgress.challenge_type) → content model
+ITEM_TYPES = {
+    'letter': Challenge,
+    'yes_no': YesNoQuestion,
+    'functional': FunctionalPhrase,
+}
+
+PASSING_QUALITY = 3
+MIN_EASE = 1.3
+UPDATE_FIELDS = ['interval_days', 'ease', 'repetitions', 'last_quality',
+                 'due_at', 'reviewed_at']
+# bulk_create(..., **UPSERT) = INSERT ... ON CONFLICT UPDATE, so two requests
+# for the same new item at once can't both insert
+UPSERT = {'update_conflicts': True, 'unique_fields': ['user', 'item_type', 'item_id'],
+          'update_fields': UPDATE_FIELDS}
+
+
+def quality(score, completed):
+    """SM-2 quality 0-5 from the app's score (0-100). Not completed = failed (max 2)."""
+    try:
+        score = int(score)
+    except (TypeError, ValueError):
+        score = 0
+    q = max(0, min(5, round(score / 20)))
+    return q if completed else min(q, PASSING_QUALITY - 1)
+
+
+def schedule(state, q, now):
+    """Apply one review of quality `q` at `now` to `state` (not saved)."""
+    if q < PASSING_QUALITY:
+        state.repetitions = 0
+        state.interval_days = 1
+    else:
+        if state.repetitions == 0:
+            interval = 1
+        elif state.repetitions == 1:
+            interval = 6
+        else:
+            interval = state.interval_days * state.ease
+        state.interval_days = round(interval, 2)
+        state.repetitions += 1
+    state.ease = round(max(MIN_EASE, state.ease + 0.1 - (5 - q) * (0.08 + (5 - q) * 0.02)), 3)
+    state.last_quality = q
+    state.reviewed_at = now
+    state.due_at = now + timedelta(days=state.interval_days)
+    return state
+
+
+def new_state(user_id, item_type, item_id, now):
+    return ReviewState(user_id=user_id, item_type=item_type, item_id=item_id,
+                       due_at=now, reviewed_at=now)
+
+
+def record_review(user, item_type, item_id, score, completed, now=None):
+    """Update the kid's review state after a progress write. 2 queries."""
+    now = now or timezone.now()
+    state = ReviewState.objects.filter(
+        user=user, item_type=item_type, item_id=item_id).first()
+    if state is None:
+        ReviewState.objects.bulk_create(
+            [schedule(new_state(user.pk, item_type, item_id, now),
+                      quality(score, completed), now)], **UPSERT)
+    else:
+        schedule(state, quality(score, completed), now).save(update_fields=UPDATE_FIELDS)
+
+
+def due_items(user, limit=10, now=None):
+    """The kid's most overdue items, oldest first - one index range scan."""
+    now = now or timezone.now()
+    rows = (ReviewState.objects
+            .filter(user=user, due_at__lte=now)
+            .order_by('due_at')
+            .values_list('item_type', 'item_id', 'due_at', 'interval_days',
+                         'repetitions', 'last_quality')[:limit])
+    return [{'challenge': item_id, 'type': item_type, 'due_at': due_at,
+             'interval_days': interval_days, 'repetitions': repetitions,
+             'last_quality': last_quality}
+            for item_type, item_id, due_at, interval_days, repetitions, last_quality in rows]
@@ -0,0 +1,254 @@
+# challenges/search.py
+# In-memory search over all the content text: words, challenges, yes/no
+# questions and functional phrases. Powers GET /api/challenges/search/?q=.
+#
+# The catalog is small (a few thousand short texts) and changes rarely, so
+# every worker keeps its own index in memory and a search never touches the
+# database:
+#
+#   postings     token → {doc number: weight}   "which texts contain 'apple'"
+#   vocabulary   every token, sorted             prefix lookups with bisect
+#                                                (a flattened prefix trie:
+#                                                'ap' → 'ape', 'apple', ...)
+#   docs         doc number → (kind, id, text, tokens)
+#
+# Type-ahead semantics: every word of the query must match; the last one may
+# be a prefix ("red app" finds "red apple"). Ranking adds up field weights
+# (a word's own text counts more than a challenge description), exact tokens
+# beat prefix matches, and shorter texts win ties (each posting carries a
+# tiny length bonus, so ranking is a single float comparison).
+#
+#   index = get_index()
+#   index.search('app', limit=10)   # [{'type': 'word', 'id': 3, 'text': 'Apple', 'score': 3.0}, ...]
+#
+# Keeping it fresh:
+#   - the index is built on first use (gunicorn.conf.py builds it when a
+#     worker starts, so no kid waits for it)
+#   - signals.py calls item_saved()/item_deleted() after a commit: the index
+#     of THIS process is updated in place
+#   - every change also bumps a version number in the cache; other workers
+#     notice within SEARCH_INDEX_CHECK_INTERVAL seconds and rebuild (needs a
+#     shared CACHE_BACKEND when running several workers, see settings.py)
+#   - with the default per-process cache the other workers never see that
+#     number, so every index is also rebuilt once it is older than
+#     SEARCH_INDEX_MAX_AGE seconds, whatever the version says
+#   - bulk writes (seeding, import_catalog) send no signals, so they call
+#     catalog_changed() to force that rebuild
+import bisect
+import heapq
+import re
+import threading
+import time
+import unicodedata
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Challenge, FunctionalPhrase, Word, YesNoQuestion
+
+# kind → (model, {field: weight}, shown to anonymous users?)
+# The first field is the text shown in the results.
+SOURCES = {
+    'word': (Word, {'word': 3}, True),
+    'challenge': (Challenge, {'title': 2, 'description': 1}, True),
+    'yes_no': (YesNoQuestion, {'question': 2, 'scene_description': 1}, False),
+    'phrase': (FunctionalPhrase, {'phrase': 3}, False),
+}
+KINDS = tuple(SOURCES)
+# yes/no questions and phrases are only listed for logged-in users
+PUBLIC_KINDS = tuple(kind for kind, (_, _, public) in SOURCES.items() if public)
+
+EXACT_BOOST = 2          # "apple" typed in full beats "applesauce"
+MAX_PREFIX_TOKENS = 50   # 'a' could match thousands of tokens - take the first 50
+MAX_TERMS = 10           # longer queries are cut - nobody types more in a search box
+VERSION_KEY = 'search-index-version'
+
+TOKEN_RE = re.compile(r'\w+')
+
+
+def tokenize(text):
+    """'Éléphant, big!' → ['elephant', 'big'] (lowercase, accents removed)."""
+    text = unicodedata.normalize('NFKD', (text or '').lower())
+    text = ''.join(c for c in text if not unicodedata.combining(c))
+    return TOKEN_RE.findall(text)
+
+
+class SearchIndex:
+    """Token postings + sorted vocabulary - see the top of this file."""
+
+    def __init__(self, version=0):
+        self.version = version      # catalog version it was built from
+        self.built_at = time.monotonic()
+        self.checked_at = self.built_at
+        self.postings = {}
+        self.vocabulary = []
+        self.docs = {}
+        self.doc_numbers = {}       # (kind, id) → doc number
+        self._next_number = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.docs)
+
+    def add(self, kind, item_id, texts):
+        """Index (or re-index) one item. `texts` is {field: text}."""
+        weights = SOURCES[kind][1]
+        display = texts.get(next(iter(weights))) or ''
+        # < 0.001 per query word: orders equal scores without changing them
+        shorter_bonus = 1 / (len(display) + 2) / 1000
+        token_weights = {}
+        for field, weight in weights.items():
+            for token in tokenize(texts.get(field)):
+                token_weights[token] = token_weights.get(token, shorter_bonus) + weight
+        with self._lock:
+            self._remove(kind, item_id)
+            number = self._next_number
+            self._next_number += 1
+            self.docs[number] = (kind, item_id, display, tuple(token_weights))
+            self.doc_numbers[(kind, item_id)] = number
+            for token, weight in token_weights.items():
+                postings = self.postings.get(token)
+                if postings is None:
+                    postings = self.postings[token] = {}
+                    bisect.insort(self.vocabulary, token)
+                postings[number] = weight
+
+    def remove(self, kind, item_id):
+        with self._lock:
+            self._remove(kind, item_id)
+
+    def _remove(self, kind, item_id):
+        number = self.doc_numbers.pop((kind, item_id), None)
+        if number is None:
+            return
+        for token in self.docs.pop(number)[3]:
+            postings = self.postings[token]
+            del postings[number]
+            if not postings:   # last text with this token
+                del self.postings[token]
+                del self.vocabulary[bisect.bisect_left(self.vocabulary, token)]
+
+    def _matches(self, term, prefix):
+        """{doc number: score} for one query word."""
+        scores = {number: weight * EXACT_BOOST
+                  for number, weight in self.postings.get(term, {}).items()}
+        if not prefix:
+            return scores
+        start = bisect.bisect_left(self.vocabulary, term)
+        for token in self.vocabulary[start:start + MAX_PREFIX_TOKENS]:
+            if not token.startswith(term):
+                break
+            if token == term:
+                continue
+            for number, weight in self.postings[token].items():
+                if weight > scores.get(number, 0):
+                    scores[number] = weight
+        return scores
+
+    def search(self, query, limit=20, kinds=KINDS):
+        """The best `limit` matches for `query`, best first."""
+        terms = tokenize(query)[:MAX_TERMS]
+        if not terms:
+            return []
+        with self._lock:
+            scores = None
+            for position, term in enumerate(terms):
+                matches = self._matches(term, prefix=position == len(terms) - 1)
+                if scores is None:
+                    scores = matches
+                else:   # every word of the query must match
+                    scores = {number: score + matches[number]
+                              for number, score in scores.items() if number in matches}
+                if not scores:
+                    return []
+            docs = self.docs
+            if set(kinds) != set(KINDS):
+                scores = {number: score for number, score in scores.items()
+                          if docs[number][0] in kinds}
+            best = heapq.nlargest(limit, scores, key=scores.get)
+            # int(): drop the length bonus, it's only there for the order
+            return [{'type': docs[number][0], 'id': docs[number][1],
+                     'text': docs[number][2], 'score': float(int(scores[number]))}
+                    for number in best]
+
+
+def build_index(version=0):
+    """A fresh index of the whole catalog - one query per kind."""
+    index = SearchIndex(version)
+    for kind, (model, weights, _) in SOURCES.items():
+        fields = list(weights)
+        for row in model.objects.values_list('pk', *fields).iterator(chunk_size=2000):
+            index.add(kind, row[0], dict(zip(fields, row[1:])))
+    return index
+
+
+_index = None
+_build_lock = threading.Lock()
+
+
+def current_version():
+    return cache.get(VERSION_KEY, 0)
+
+
+def get_index():
+    """This worker's index: built on first use, rebuilt when another
+    worker has changed the catalog (checked every few seconds) or when it
+    is older than SEARCH_INDEX_MAX_AGE."""
+    global _index
+    index = _index
+    now = time.monotonic()
+    if index is not None and now - index.checked_at < settings.SEARCH_INDEX_CHECK_INTERVAL:
+        return index
+    version = current_version()
+    with _build_lock:
+        if (_index is None or _index.version != version
+                or now - _index.built_at > settings.SEARCH_INDEX_MAX_AGE):
+            started = time.perf_counter()
+            _index = build_index(version)
+            print(f"✅ Search index built: {len(_index)} items in "
+                  f"{(time.perf_counter() - started) * 1000:.0f}ms")
+        _index.checked_at = now
+        return _index
+
+
+def reset_index():
+    """Forget the index; the next search rebuilds it (tests)."""
+    global _index
+    with _build_lock:
+        _index = None
+
+
+def catalog_changed():
+    """Bump the catalog version → every worker rebuilds on its next check.
+    Returns the new version."""
+    cache.add(VERSION_KEY, 0, timeout=None)
+    return cache.incr(VERSION_KEY)
+
+
+def _changed_here(update):
+    # Apply a change to our own index, then tell the other workers. If nobody
+    # else changed anything in between, our index is now up to date with the
+    # new version; otherwise keep the old one so the next check rebuilds.
+    index = _index
+    if index is not None:
+        update(index)
+    version = catalog_changed()
+    if index is not None and index.version == version - 1:
+        index.version = version
+
+
+def item_saved(instance):
+    kind = kind_of(instance)
+    texts = {field: getattr(instance, field) for field in SOURCES[kind][1]}
+    _changed_here(lambda index: index.add(kind, instance.pk, texts))
+
+
+def item_deleted(kind, item_id):
+    _changed_here(lambda index: index.remove(kind, item_id))
+
+
+def kind_of(instance):
+    for kind, (model, _, _) in SOURCES.items():
+        if isinstance(instance, model):
+            return kind
+    raise ValueError(f"{type(instance).__name__} is not searchable")
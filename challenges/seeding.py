@@ -0,0 +1,116 @@
+# challenges/seeding.py
+# Quick, realistic-sized fake data for tests and benchmarks.
+# Everything uses bulk_create (no signals, no per-row round trips),
+# so seeding a full catalog takes well under a second. The pre-rendered
+# challenge JSON that signals would normally build is built explicitly, and
+# the search index is told to rebuild.
+import random
+import string
+
+from django.contrib.auth.models import User
+from django.contrib.auth.hashers import make_password
+from rest_framework.authtoken.models import Token
+
+from . import search
+from .fragments import build_fragments
+from .models import (Letter, Word, Challenge, Comment, UserProgress,
+                     YesNoQuestion, FunctionalPhrase)
+
+DIFFICULTIES = ['easy', 'medium', 'hard']
+
+
+def seed_catalog(letters=26, words_per_letter=30, challenges_per_word=2,
+                 yes_no_questions=200, functional_phrases=200, seed=0):
+    """Create a full content catalog. Returns a dict of the created lists."""
+    rng = random.Random(seed)
+    letter_objs = Letter.objects.bulk_create(
+        [Letter(letter=c) for c in string.ascii_lowercase[:letters]])
+
+    words = Word.objects.bulk_create([
+        Word(
+            word=f"{letter.letter}word{i}",
+            letter=letter,
+            audio=f"https://res.cloudinary.com/demo/video/upload/v1/"
+                  f"speechfun-kids/audios/{letter.letter}word{i}.mp3",
+            difficulty=rng.choice(DIFFICULTIES),
+            audio_duration_ms=rng.randint(400, 1500),
+            audio_bytes=rng.randint(5_000, 25_000),
+        )
+        for letter in letter_objs for i in range(words_per_letter)
+    ])
+
+    challenges = Challenge.objects.bulk_create([
+        Challenge(
+            title=f"Say {word.word} #{n}",
+            description=f"Practise saying {word.word} slowly and clearly.",
+            word=word,
+            difficulty=rng.choice(DIFFICULTIES),
+        )
+        for word in words for n in range(challenges_per_word)
+    ])
+    build_fragments(c.pk for c in challenges)
+
+    questions = YesNoQuestion.objects.bulk_create([
+        YesNoQuestion(
+            scene_description=f"Scene {i}",
+            question=f"Is the child in scene {i} jumping?",
+            correct_answer=rng.choice(['Yes', 'No']),
+            visual_url=f"https://res.cloudinary.com/demo/image/upload/q_{i}.jpg",
+        )
+        for i in range(yes_no_questions)
+    ])
+
+    phrases = FunctionalPhrase.objects.bulk_create([
+        FunctionalPhrase(
+            phrase=f"I want thing number {i}",
+            visual_url=f"https://res.cloudinary.com/demo/image/upload/p_{i}.jpg",
+        )
+        for i in range(functional_phrases)
+    ])
+    search.catalog_changed()
+
+    return {'letters': letter_objs, 'words': words, 'challenges': challenges,
+            'yes_no_questions': questions, 'functional_phrases': phrases}
+
+
+def seed_users(count, prefix='kid', password='speechfun-pass', active=True):
+    """Create `count` users with API tokens. The password is hashed once."""
+    hashed = make_password(password)
+    users = User.objects.bulk_create([
+        User(username=f"{prefix}{i}", email=f"{prefix}{i}@example.com",
+             password=hashed, is_active=active)
+        for i in range(count)
+    ])
+    Token.objects.bulk_create([Token(user=u, key=Token.generate_key()) for u in users])
+    return users
+
+
+def seed_progress(user, catalog, challenges=300, yes_no_questions=100,
+                  functional_phrases=100, seed=0):
+    """Give one user a realistic progress history across all three types."""
+    rng = random.Random(seed)
+    rows = [
+        UserProgress(user=user, challenge=c, challenge_type='letter',
+                     completed=rng.random() < 0.7, score=rng.randint(0, 100))
+        for c in rng.sample(catalog['challenges'], challenges)
+    ]
+    rows += [
+        UserProgress(user=user, yes_no_question=q, challenge_type='yes_no',
+                     completed=rng.random() < 0.7, score=rng.randint(0, 100))
+        for q in rng.sample(catalog['yes_no_questions'], yes_no_questions)
+    ]
+    rows += [
+        UserProgress(user=user, functional_phrase=p, challenge_type='functional',
+                     completed=rng.random() < 0.7, score=rng.randint(0, 100))
+        for p in rng.sample(catalog['functional_phrases'], functional_phrases)
+    ]
+    return UserProgress.objects.bulk_create(rows)
+
+
+def seed_comments(challenge, users, count=100, seed=0):
+    rng = random.Random(seed)
+    return Comment.objects.bulk_create([
+        Comment(user=rng.choice(users), challenge=challenge,
+                text=f"Comment {i}: my kid loved this one!")
+        for i in range(count)
+    ])
@@ -1,8 +1,9 @@
 from rest_framework import serializers
+from django.conf import settings
 from django.contrib.auth.models import User
 from .models import (Letter, Word, Challenge, Comment,
                      UserProgress, YesNoQuestion,
-                     FunctionalPhrase)
+                     FunctionalPhrase, AudioSprite, OfflineBundle)
 
 
 class LetterSerializer(serializers.ModelSerializer):
@@ -14,7 +15,33 @@ class LetterSerializer(serializers.ModelSerializer):
 class WordSerializer(serializers.ModelSerializer):
     class Meta:
         model = Word
-        fields = ['id', 'word', 'audio']
+        fields = ['id', 'word', 'audio', 'audio_duration_ms', 'audio_bytes']
+
+
+class AudioSpriteSerializer(serializers.ModelSerializer):
+    # manifest = {"sample_rate", "clips": [{word_id, word, offset_ms, duration_ms, bytes}],
+    #             "missing": [word ids to load from Word.audio instead]}
+    letter_name = serializers.CharField(source='letter.letter', read_only=True)
+
+    class Meta:
+        model = AudioSprite
+        fields = ['letter', 'letter_name', 'url', 'duration_ms', 'bytes',
+                  'manifest', 'built_at']
+
+
+class OfflineBundleSerializer(serializers.ModelSerializer):
+    # Clients keep the hash of each bundle they have and only download
+    # the ones whose hash changed.
+    letter_name = serializers.CharField(source='letter.letter', read_only=True)
+    url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = OfflineBundle
+        fields = ['letter', 'letter_name', 'content_hash', 'url',
+                  'bytes', 'gzip_bytes', 'built_at']
+
+    def get_url(self, obj):
+        return f"{settings.OFFLINE_BUNDLE_URL}{obj.filename}"
 
 
 class ChallengeSerializer(serializers.ModelSerializer):
@@ -61,10 +88,10 @@ class YesNoQuestionSerializer(serializers.ModelSerializer):
     class Meta:
         model = YesNoQuestion
         fields = ['id', 'scene_description',
-                  'question', 'correct_answer', 'visual_url']
+                  'question', 'correct_answer', 'visual_url', 'visual_variants']
 
 
 class FunctionalPhraseSerializer(serializers.ModelSerializer):
     class Meta:
         model = FunctionalPhrase
-        fields = ['id', 'phrase', 'visual_url']
+        fields = ['id', 'phrase', 'visual_url', 'visual_variants']
@@ -0,0 +1,102 @@
+# challenges/signals.py
+# Keep derived data in sync when content is edited (admin, shell, etc).
+# Connected in ChallengesConfig.ready().
+#
+# NOTE: bulk_create / bulk_update / queryset.update() do NOT send signals -
+# code that uses them (e.g. import_catalog) has to rebuild things itself.
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .bundles import build_letter_bundle_by_id, delete_letter_bundles
+from . import scheduler, search
+from .fragments import (build_fragments, build_fragments_for_letter,
+                        build_fragments_for_words)
+from .models import (AudioSprite, Challenge, FunctionalPhrase, Letter, ReviewState,
+                     Word, YesNoQuestion)
+
+
+def rebuild_bundle_later(letter_id):
+    # on_commit: build from the saved data, and not at all if the save rolls back
+    if letter_id:
+        transaction.on_commit(lambda: build_letter_bundle_by_id(letter_id))
+
+
+def update_search_later(instance, **kwargs):
+    # the in-memory search index (search.py) of this worker + a version bump
+    # so the other workers rebuild theirs
+    if kwargs['signal'] is post_save:
+        transaction.on_commit(lambda: search.item_saved(instance))
+    else:
+        kind, item_id = search.kind_of(instance), instance.pk   # pk is None after delete
+        transaction.on_commit(lambda: search.item_deleted(kind, item_id))
+
+
+def forget_reviews(instance, **kwargs):
+    # ReviewState points at items by (type, id), not a foreign key,
+    # so nothing cascades - a deleted item must leave the practice queues
+    if kwargs['signal'] is post_delete:
+        item_type = next(t for t, model in scheduler.ITEM_TYPES.items()
+                         if isinstance(instance, model))
+        ReviewState.objects.filter(item_type=item_type, item_id=instance.pk).delete()
+
+
+@receiver(pre_save, sender=Word)
+def remember_old_letter(sender, instance, **kwargs):
+    # If a word moves to another letter, BOTH letters' bundles change.
+    instance._old_letter_id = None
+    if instance.pk:
+        instance._old_letter_id = (Word.objects.filter(pk=instance.pk)
+                                   .values_list('letter_id', flat=True).first())
+
+
+@receiver(post_save, sender=Word)
+@receiver(post_delete, sender=Word)
+def word_changed(sender, instance, **kwargs):
+    if kwargs.get('created') is False:   # edited (new words have no challenges yet)
+        transaction.on_commit(lambda: build_fragments_for_words([instance.pk]))
+    update_search_later(instance, **kwargs)
+    rebuild_bundle_later(instance.letter_id)
+    old_letter_id = getattr(instance, '_old_letter_id', None)
+    if old_letter_id and old_letter_id != instance.letter_id:
+        rebuild_bundle_later(old_letter_id)
+
+
+@receiver(post_save, sender=Challenge)
+@receiver(post_delete, sender=Challenge)
+def challenge_changed(sender, instance, **kwargs):
+    if kwargs['signal'] is post_save:   # deleting cascades to the fragment
+        transaction.on_commit(lambda: build_fragments([instance.pk]))
+    update_search_later(instance, **kwargs)
+    forget_reviews(instance, **kwargs)
+    letter_id = (Word.objects.filter(pk=instance.word_id)
+                 .values_list('letter_id', flat=True).first())
+    rebuild_bundle_later(letter_id)
+
+
+@receiver(post_save, sender=YesNoQuestion)
+@receiver(post_delete, sender=YesNoQuestion)
+@receiver(post_save, sender=FunctionalPhrase)
+@receiver(post_delete, sender=FunctionalPhrase)
+def question_or_phrase_changed(sender, instance, **kwargs):
+    update_search_later(instance, **kwargs)
+    forget_reviews(instance, **kwargs)
+
+
+@receiver(post_save, sender=AudioSprite)
+def sprite_changed(sender, instance, **kwargs):
+    rebuild_bundle_later(instance.letter_id)
+
+
+@receiver(post_save, sender=Letter)
+def letter_changed(sender, instance, **kwargs):
+    if not kwargs['created']:   # letter_name is in every challenge's JSON
+        transaction.on_commit(lambda: build_fragments_for_letter(instance.pk))
+    rebuild_bundle_later(instance.pk)
+
+
+@receiver(post_delete, sender=Letter)
+def letter_deleted(sender, instance, **kwargs):
+    # the OfflineBundle row goes with the cascade, the files on disk don't
+    letter_id = instance.pk
+    transaction.on_commit(lambda: delete_letter_bundles(letter_id))
@@ -0,0 +1,124 @@
+# challenges/sprites.py
+# Build one "audio sprite" per letter: every word's MP3 glued together,
+# plus a manifest saying where each word starts and how long it is.
+# The app downloads the sprite once and plays word N by seeking to
+# clips[N].offset_ms - one request instead of one per word.
+import hashlib
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from speechfun_backend.metrics import record_cache
+from speechfun_backend.outbound import OutboundUnavailable, outbound_call
+
+from .audio import parse_mp3
+from .fragments import build_fragments_for_words
+from .models import AudioSprite, Word
+from .uploads import upload_audio_sprite
+
+
+def source_hash(words):
+    """Fingerprint of everything the sprite is built from.
+
+    Cloudinary URLs contain a version number that changes on every
+    re-upload, so (id, word, url) changes whenever any clip changes.
+    """
+    source = [[w.id, w.word, w.audio] for w in words]
+    return hashlib.sha256(json.dumps(source).encode()).hexdigest()
+
+
+def download(url):
+    # timeout per clip: OUTBOUND_SERVICES['cloudinary_cdn'] in settings.py
+    with outbound_call('cloudinary_cdn') as policy:
+        response = requests.get(url, timeout=policy.timeout)
+        response.raise_for_status()
+    return response.content
+
+
+def build_letter_sprite(letter, force=False, workers=8):
+    """(Re)build the sprite for one letter if any of its words changed.
+
+    Returns (sprite_or_None, built) - built is False when the existing
+    sprite was already up to date.
+    """
+    words = list(Word.objects.filter(letter=letter).order_by('word', 'id'))
+    current_hash = source_hash(words)
+
+    existing = AudioSprite.objects.filter(letter=letter).first()
+    up_to_date = existing is not None and existing.source_hash == current_hash
+    record_cache('audio_sprite', up_to_date)
+    if up_to_date and not force:
+        return existing, False
+
+    with_audio = [w for w in words if w.audio]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(_safe_download, [w.audio for w in with_audio]))
+
+    sprite = io.BytesIO()
+    clips, missing, changed_words = [], [], []
+    samples_so_far = 0
+    sample_rate = None
+
+    for word, content in zip(with_audio, results):
+        clip = parse_mp3(content) if content else None
+        if clip and (word.audio_bytes != len(content)
+                     or word.audio_duration_ms != clip.duration_ms):
+            word.audio_bytes = len(content)
+            word.audio_duration_ms = clip.duration_ms
+            changed_words.append(word)
+
+        # Frames from different sample rates can't share one stream
+        # (offsets would be wrong) - those words fall back to their own file.
+        if clip is None or (sample_rate and clip.sample_rate != sample_rate):
+            missing.append(word.id)
+            continue
+        sample_rate = clip.sample_rate
+
+        clips.append({
+            'word_id': word.id,
+            'word': word.word,
+            # offsets come from the running sample count, not from adding
+            # up rounded milliseconds, so they never drift
+            'offset_ms': round(samples_so_far * 1000 / sample_rate),
+            'duration_ms': clip.duration_ms,
+            'bytes': len(clip.frames),
+        })
+        samples_so_far += clip.samples
+        sprite.write(clip.frames)
+
+    missing += [w.id for w in words if not w.audio]
+
+    if changed_words:
+        Word.objects.bulk_update(changed_words, ['audio_bytes', 'audio_duration_ms'])
+        # no signals from bulk_update - the challenges' JSON shows these fields
+        build_fragments_for_words([w.id for w in changed_words])
+
+    if not clips:
+        if existing:
+            existing.delete()
+        return None, True
+
+    content = sprite.getvalue()
+    url = upload_audio_sprite(content, letter.letter,
+                              hashlib.sha256(content).hexdigest())
+    sprite_obj, _ = AudioSprite.objects.update_or_create(
+        letter=letter,
+        defaults={
+            'url': url,
+            'source_hash': current_hash,
+            'duration_ms': round(samples_so_far * 1000 / sample_rate),
+            'bytes': len(content),
+            'manifest': {'sample_rate': sample_rate, 'clips': clips,
+                         'missing': sorted(missing)},
+        },
+    )
+    return sprite_obj, True
+
+
+def _safe_download(url):
+    try:
+        return download(url)
+    except (requests.RequestException, OutboundUnavailable) as e:
+        print(f"❌ Could not download {url}: {e}")
+        return None
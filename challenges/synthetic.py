@@ -0,0 +1,239 @@
+# challenges/synthetic.py
+# Production-sized fake data: hundreds of thousands of users, millions of
+# UserProgress rows, comment threads. Used by `manage.py generate_data`.
+#
+# Everything is driven by one random.Random(seed), so the same seed on an
+# empty database gives exactly the same rows.
+#
+# Shapes we try to imitate (real apps are never uniform):
+#   - Zipfian popularity: the most played challenge is played ~N times more
+#     than the N-th most played one. A few items are hot, most are cold.
+#   - Active-user skew: user activity follows a Pareto (80/20) curve - a
+#     small group of kids does most of the practising.
+#   - Comment bursts: comments arrive in short bursts on one challenge
+#     (a class doing the same exercise), not spread evenly over time.
+#
+# Rows are streamed in batches and written with COPY on Postgres (by far the
+# fastest way in) or batched bulk_create on other databases.
+import csv
+import io
+import itertools
+import random
+from bisect import bisect
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+
+from .models import Challenge, YesNoQuestion, FunctionalPhrase
+
+# item kind -> (UserProgress FK column, challenge_type value)
+PROGRESS_KINDS = {
+    'letter': 'challenge_id',
+    'yes_no': 'yes_no_question_id',
+    'functional': 'functional_phrase_id',
+}
+PROGRESS_FIELDS = ['user_id', 'challenge_id', 'yes_no_question_id',
+                   'functional_phrase_id', 'challenge_type', 'completed',
+                   'score', 'updated_at']
+COMMENT_FIELDS = ['user_id', 'challenge_id', 'text', 'created_at']
+USER_FIELDS = ['password', 'is_superuser', 'username', 'first_name',
+               'last_name', 'email', 'is_staff', 'is_active', 'date_joined']
+
+COMMENT_TEXTS = [
+    "My kid loved this one!", "Too hard for us today, will try again.",
+    "We said it ten times in a row 🎉", "Could the audio be slower?",
+    "Best one so far!", "My son finally got the sound right!",
+    "We practise this every morning.", "Great for the car ride.",
+]
+
+
+def zipf_cum_weights(n, s):
+    """Cumulative weights for ranks 1..n with P(rank k) ∝ 1 / k**s."""
+    return list(itertools.accumulate(1 / k ** s for k in range(1, n + 1)))
+
+
+def pick(rng, items, cum_weights):
+    """One weighted choice - like rng.choices(k=1) without the list."""
+    return items[bisect(cum_weights, rng.random() * cum_weights[-1])]
+
+
+# ---------------------------------------------------------------------------
+# Writing rows
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def keep_timestamps(model):
+    """bulk_create would overwrite auto_now/auto_now_add fields with "now" -
+    switch them off while we insert our spread-out historical dates."""
+    fields = [f for f in model._meta.concrete_fields
+              if getattr(f, 'auto_now', False) or getattr(f, 'auto_now_add', False)]
+    saved = [(f, f.auto_now, f.auto_now_add) for f in fields]
+    for f in fields:
+        f.auto_now = f.auto_now_add = False
+    try:
+        yield
+    finally:
+        for f, auto_now, auto_now_add in saved:
+            f.auto_now, f.auto_now_add = auto_now, auto_now_add
+
+
+def copy_batch(model, fields, rows):
+    """Postgres COPY ... FROM STDIN (CSV) for one batch of row tuples."""
+    columns = {f.attname: f.column for f in model._meta.concrete_fields}
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(['\\N' if value is None else value for value in row])
+    buffer.seek(0)
+    sql = (f'COPY "{model._meta.db_table}" '
+           f'({", ".join(columns[f] for f in fields)}) '
+           f"FROM STDIN WITH (FORMAT csv, NULL '\\N')")
+    with connection.cursor() as cursor:
+        raw = cursor.cursor
+        if hasattr(raw, 'copy_expert'):   # psycopg2
+            raw.copy_expert(sql, buffer)
+        else:                             # psycopg 3 (needed for DB_POOL_SIZE)
+            with raw.copy(sql) as copy:
+                copy.write(buffer.getvalue())
+
+
+def insert_rows(model, fields, rows, batch_size=10_000, on_batch=None):
+    """Insert an iterable of tuples (in `fields` order), one transaction per
+    batch. Returns the number of rows written."""
+    use_copy = connection.vendor == 'postgresql'
+    total = 0
+    rows = iter(rows)
+    with keep_timestamps(model):
+        while True:
+            batch = list(itertools.islice(rows, batch_size))
+            if not batch:
+                return total
+            with transaction.atomic():
+                if use_copy:
+                    copy_batch(model, fields, batch)
+                else:
+                    model.objects.bulk_create(
+                        [model(**dict(zip(fields, row))) for row in batch],
+                        batch_size=batch_size)
+            total += len(batch)
+            if on_batch:
+                on_batch(model, total)
+
+
+# ---------------------------------------------------------------------------
+# Generating rows
+# ---------------------------------------------------------------------------
+
+class Generator:
+    """Holds the random state and the weights that every table shares."""
+
+    def __init__(self, seed=0, zipf_s=1.1, pareto_alpha=1.16, days=365,
+                 now=None):
+        self.rng = random.Random(seed)
+        self.zipf_s = zipf_s
+        self.pareto_alpha = pareto_alpha   # 1.16 ≈ the 80/20 rule
+        self.now = now or datetime(2026, 1, 1, tzinfo=timezone.utc)
+        self.start = self.now - timedelta(days=days)
+        self.span = (self.now - self.start).total_seconds()
+
+    def random_time(self):
+        return self.start + timedelta(seconds=self.rng.random() * self.span)
+
+    # --- users ------------------------------------------------------------
+
+    def user_rows(self, count, prefix, password):
+        hashed = make_password(password)   # hashing is slow - do it once
+        for i in range(count):
+            username = f"{prefix}{i}"
+            yield (hashed, False, username, '', '', f"{username}@example.com",
+                   False, True, self.random_time())
+
+    def set_users(self, user_ids):
+        """Give every user an activity weight (Pareto) - heavy users write
+        most of the progress rows and comments."""
+        self.user_ids = list(user_ids)
+        weights = [self.rng.paretovariate(self.pareto_alpha) for _ in self.user_ids]
+        self.user_weights = weights
+        self.user_cum = list(itertools.accumulate(weights))
+
+    # --- catalog popularity -------------------------------------------------
+
+    def set_catalog(self):
+        """Popularity ranks: shuffle the catalog, then weight by Zipf."""
+        items = (
+            [('letter', pk) for pk in Challenge.objects.values_list('id', flat=True)]
+            + [('yes_no', pk) for pk in YesNoQuestion.objects.values_list('id', flat=True)]
+            + [('functional', pk) for pk in FunctionalPhrase.objects.values_list('id', flat=True)]
+        )
+        items.sort()                 # database order must not leak into the seed
+        self.rng.shuffle(items)
+        self.items = items
+        self.item_cum = zipf_cum_weights(len(items), self.zipf_s)
+
+        challenges = sorted(pk for kind, pk in items if kind == 'letter')
+        self.rng.shuffle(challenges)
+        self.challenges = challenges
+        self.challenge_cum = zipf_cum_weights(len(challenges), self.zipf_s)
+
+    # --- progress ------------------------------------------------------------
+
+    def progress_counts(self, total):
+        """Split `total` progress rows over users by activity weight.
+        A user can't have more rows than half the catalog (unique per item)."""
+        cap = max(1, len(self.items) // 2)
+        counts = [0] * len(self.user_ids)
+        # what the capped heavy users can't take is shared among the rest
+        for _ in range(5):
+            open_users = [i for i, c in enumerate(counts) if c < cap]
+            missing = total - sum(counts)
+            if missing <= 0 or not open_users:
+                break
+            weight_sum = sum(self.user_weights[i] for i in open_users)
+            for i in open_users:
+                counts[i] = min(cap, counts[i] + round(
+                    missing * self.user_weights[i] / weight_sum))
+        return counts
+
+    def progress_rows(self, total):
+        """Rows for UserProgress. (user, item) pairs are unique, as the
+        unique_together constraints require."""
+        for user_id, count in zip(self.user_ids, self.progress_counts(total)):
+            seen = set()
+            while len(seen) < count:
+                kind, item_id = pick(self.rng, self.items, self.item_cum)
+                if (kind, item_id) in seen:
+                    continue
+                seen.add((kind, item_id))
+                row = {'challenge_id': None, 'yes_no_question_id': None,
+                       'functional_phrase_id': None}
+                row[PROGRESS_KINDS[kind]] = item_id
+                score = min(100, max(0, int(self.rng.gauss(72, 18))))
+                yield (user_id, row['challenge_id'], row['yes_no_question_id'],
+                       row['functional_phrase_id'], kind, score >= 60, score,
+                       self.random_time())
+
+    # --- comments ---------------------------------------------------------------
+
+    def comment_rows(self, total, mean_burst=25):
+        """Comments come in bursts: pick a (popular) challenge and a moment,
+        then a handful of kids comment within minutes of each other."""
+        made = 0
+        while made < total:
+            challenge_id = pick(self.rng, self.challenges, self.challenge_cum)
+            at = self.random_time()
+            size = min(total - made,
+                       1 + int(self.rng.expovariate(1 / mean_burst)))
+            for _ in range(size):
+                at += timedelta(seconds=self.rng.expovariate(1 / 90))
+                yield (pick(self.rng, self.user_ids, self.user_cum), challenge_id,
+                       self.rng.choice(COMMENT_TEXTS), min(at, self.now))
+            made += size
+
+
+def generated_user_ids(prefix):
+    """Ids of the users we just inserted, in insertion order."""
+    return User.objects.filter(username__startswith=prefix).order_by('id') \
+        .values_list('id', flat=True)
@@ -1,3 +1,1818 @@
-from django.test import TestCase
+import gzip
+import hashlib
+import io
+import json
+import random
+import re
+import tempfile
+import threading
+import unittest
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import StringIO
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import (Client, SimpleTestCase, TestCase, TransactionTestCase,
+                         override_settings, skipUnlessDBFeature)
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+
+from speechfun_backend import batch, db_router, stubs
+from speechfun_backend.db_router import ReplicaRouter, _current_request
+from speechfun_backend.large_admin import EstimatedCountPaginator
+from speechfun_backend.query_budgets import QUERY_BUDGETS, QueryBudgetTestCase
+from .audio import mp3_duration_ms, parse_mp3
+from .bundles import build_letter_bundle
+from .fast_serializers import RowEncoder, row_encoder
+from .images import build_variants
+from .management.commands.bench import percentile
+from .models import (AttemptRollup, AudioSprite, Challenge, ChallengeFragment, Comment,
+                     FunctionalPhrase, ItemStats, Letter, OfflineBundle, ProgressAttempt,
+                     ReviewState, UserProgress, Word, YesNoQuestion)
+from .serializers import (ChallengeSerializer, FunctionalPhraseSerializer,
+                          LetterSerializer, UserProgressSerializer, WordSerializer,
+                          YesNoQuestionSerializer)
+from .seeding import seed_catalog, seed_users, seed_progress, seed_comments
+from .sprites import build_letter_sprite
+from .uploads import upload_visual
+from users.models import Profile
+from users.word_help import remember_explanation
+from . import attempts, db_search, item_stats, scheduler, search, urls as challenges_urls
+
+
+def setUpModule():
+    # Committed letter edits rebuild the offline bundles (signals.py) - in
+    # TransactionTestCases and captureOnCommitCallbacks. Write them to a temp
+    # folder, never into the real STATIC_ROOT.
+    tmp = tempfile.TemporaryDirectory(prefix='speechfun-bundles-')
+    unittest.addModuleCleanup(tmp.cleanup)
+    bundle_root = override_settings(OFFLINE_BUNDLE_ROOT=tmp.name)
+    bundle_root.enable()
+    unittest.addModuleCleanup(bundle_root.disable)
+
+
+# Every endpoint in challenges/urls.py against a realistic amount of data:
+# 26 letters x 30 words x 2 challenges, 200 yes/no questions, 200 phrases,
+# a learner with 500 progress rows and a challenge with 100 comments.
+# Budgets live in speechfun_backend/query_budgets.py.
+class ChallengesQueryBudgetTests(QueryBudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog()
+        cls.users = seed_users(20)
+        cls.user = cls.users[0]
+        cls.token = Token.objects.get(user=cls.user).key
+        seed_progress(cls.user, cls.catalog)
+
+        cls.letter = cls.catalog['letters'][0]
+        cls.challenge = cls.catalog['challenges'][0]
+        cls.comments = seed_comments(cls.challenge, cls.users, count=100)
+        call_command('backfill_review_state', stdout=StringIO())
+        call_command('reconcile_item_stats', stdout=StringIO())
+        # half of them due now
+        ReviewState.objects.filter(user=cls.user, item_id__lte=250).update(
+            due_at=timezone.now() - timedelta(days=1))
+
+        AudioSprite.objects.create(
+            letter=cls.letter, url='https://example.com/sprite.mp3',
+            source_hash='x' * 64, duration_ms=30_000, bytes=400_000,
+            manifest={'clips': [], 'missing': []})
+        OfflineBundle.objects.bulk_create([
+            OfflineBundle(letter=letter, filename=f"letter-{letter.id}.{'0' * 16}.json",
+                          content_hash='0' * 64, bytes=10_000, gzip_bytes=2_000)
+            for letter in cls.catalog['letters']
+        ])
+
+    def auth(self):
+        return {'HTTP_AUTHORIZATION': f'Token {self.token}'}
+
+    def test_every_url_has_a_budget(self):
+        self.assertAllUrlsBudgeted(challenges_urls.urlpatterns)
+
+    def test_letter_list(self):
+        response = self.assertWithinBudget(
+            'letter-list', lambda: self.client.get(reverse('letter-list')))
+        self.assertEqual(len(response.json()), 26)
+
+    def test_words_by_letter(self):
+        url = reverse('words-by-letter', args=[self.letter.id])
+        response = self.assertWithinBudget('words-by-letter', lambda: self.client.get(url))
+        self.assertEqual(len(response.json()), 30)
+
+    def test_word_sprite_by_letter(self):
+        url = reverse('word-sprite-by-letter', args=[self.letter.id])
+        self.assertWithinBudget('word-sprite-by-letter', lambda: self.client.get(url))
+
+    def test_offline_bundle_index(self):
+        response = self.assertWithinBudget(
+            'offline-bundle-index', lambda: self.client.get(reverse('offline-bundle-index')))
+        self.assertEqual(len(response.json()), 26)
+
+    def test_challenges_by_letter(self):
+        url = reverse('challenges-by-letter', args=[self.letter.id])
+        response = self.assertWithinBudget(
+            'challenges-by-letter', lambda: self.client.get(url))
+        self.assertEqual(len(response.json()), 60)
+        self.assertEqual(response.json()[0]['letter_name'], self.letter.letter)
+
+    def test_challenges_by_letter_and_difficulty(self):
+        url = reverse('challenges-by-letter', args=[self.letter.id]) + '?difficulty=hard'
+        response = self.assertWithinBudget(
+            'challenges-by-letter', lambda: self.client.get(url))
+        self.assertTrue(all(c['difficulty'] == 'hard' for c in response.json()))
+
+    def test_challenge_detail(self):
+        url = reverse('challenge-detail', args=[self.challenge.id])
+        self.assertWithinBudget('challenge-detail', lambda: self.client.get(url))
+
+    def test_comment_list(self):
+        url = reverse('comment-list-create', args=[self.challenge.id])
+        response = self.assertWithinBudget('comment-list-create', lambda: self.client.get(url))
+        self.assertEqual(len(response.json()), 100)
+
+    def test_comment_detail(self):
+        url = reverse('comment-detail', args=[self.comments[0].id])
+        self.assertWithinBudget('comment-detail', lambda: self.client.get(url))
+
+    def test_get_user_progress(self):
+        response = self.assertWithinBudget(
+            'get-user-progress',
+            lambda: self.client.get(reverse('get-user-progress'), **self.auth()))
+        self.assertEqual(len(response.json()), 500)
+
+    def test_update_progress(self):
+        # an item the user already has progress for → the update path
+        challenge_id = self.user.userprogress_set.filter(
+            challenge__isnull=False).first().challenge_id
+        self.assertWithinBudget('update-progress', lambda: self.client.post(
+            reverse('update-progress'),
+            {'challenge': challenge_id, 'challenge_type': 'letter',
+             'completed': True, 'score': 90},
+            content_type='application/json', **self.auth()))
+
+    def test_yes_no_questions(self):
+        response = self.assertWithinBudget(
+            'yes-no-questions',
+            lambda: self.client.get(reverse('yes-no-questions'), **self.auth()))
+        self.assertEqual(len(response.json()), 200)
+
+    def test_functional_phrases(self):
+        response = self.assertWithinBudget(
+            'functional-phrases',
+            lambda: self.client.get(reverse('functional-phrases'), **self.auth()))
+        self.assertEqual(len(response.json()), 200)
+
+    def test_unseen_items(self):
+        url = reverse('unseen-items', args=['challenges']) + f'?letter={self.letter.id}&n=20'
+        response = self.assertWithinBudget(
+            'unseen-items', lambda: self.client.get(url, **self.auth()))
+        self.assertEqual(len(response.json()['results']), 20)
+
+    def test_item_stats(self):
+        User.objects.filter(pk=self.user.pk).update(is_staff=True)
+        url = reverse('item-stats', args=['challenges']) + '?ordering=-completion_rate&n=100'
+        response = self.assertWithinBudget(
+            'item-stats', lambda: self.client.get(url, **self.auth()))
+        self.assertEqual(len(response.json()['results']), 100)
+
+    def test_admin_changelists(self):
+        ProgressAttempt.objects.bulk_create(
+            [ProgressAttempt(user=self.user, item_type='letter', item_id=self.challenge.id,
+                             completed=True, score=i) for i in range(200)])
+        admin_user = User.objects.create_superuser('admin', password='x')
+        self.client.force_login(admin_user)
+        for name in ['userprogress', 'comment', 'reviewstate', 'progressattempt', 'challenge']:
+            url_name = f'admin:challenges_{name}_changelist'
+            for query in ['', '?q=kid0', '?o=-1', '?p=2']:
+                with self.subTest(url_name, query=query):
+                    self.assertWithinBudget(
+                        url_name, lambda: self.client.get(reverse(url_name) + query))
+
+    def test_lesson(self):
+        url = reverse('lesson', args=[self.challenge.id])
+        response = self.assertWithinBudget(
+            'lesson', lambda: self.client.get(url, **self.auth()))
+        self.assertEqual(response.json()['comments']['count'], 100)
+
+    def test_progress_attempts(self):
+        ProgressAttempt.objects.bulk_create(
+            [ProgressAttempt(user=self.user, item_type='letter', item_id=self.challenge.id,
+                             completed=i % 2 == 0, score=i) for i in range(100)])
+        url = reverse('progress-attempts') + f'?type=letter&item={self.challenge.id}&n=50'
+        response = self.assertWithinBudget(
+            'progress-attempts', lambda: self.client.get(url, **self.auth()))
+        self.assertEqual(len(response.json()['results']), 50)
+
+    def test_practice_next(self):
+        response = self.assertWithinBudget(
+            'practice-next',
+            lambda: self.client.get(reverse('practice-next') + '?n=20', **self.auth()))
+        self.assertEqual(len(response.json()), 20)
+
+    def test_search(self):
+        search.reset_index()
+        self.addCleanup(search.reset_index)
+        search.get_index()   # built at worker start-up, not per request
+        response = self.assertWithinBudget(
+            'search', lambda: self.client.get(reverse('search') + '?q=scene 1',
+                                              **self.auth()))
+        self.assertEqual(response.json()['results'][0]['type'], 'yes_no')
+
+
+# Which database does each read go to? (speechfun_backend/db_router.py)
+# The replicas' lag is mocked, so no second database is needed.
+@override_settings(REPLICA_DATABASES=['replica1'], REPLICA_MAX_LAG_SECONDS=5)
+class ReplicaRouterTests(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+        db_router.forget_replica_health()
+        self.addCleanup(db_router.forget_replica_health)
+        lag = mock.patch.object(db_router, 'replica_lag', return_value=0.2)
+        self.replica_lag = lag.start()
+        self.addCleanup(lag.stop)
+        self.router = ReplicaRouter()
+        self.request = SimpleNamespace(user=SimpleNamespace(pk=7))
+
+    def db_for_read(self, model, request=None):
+        token = _current_request.set(request)
+        try:
+            return self.router.db_for_read(model)
+        finally:
+            _current_request.reset(token)
+
+    def test_catalog_reads_use_the_replica(self):
+        self.assertEqual(self.db_for_read(Letter, self.request), 'replica1')
+        self.assertEqual(self.db_for_read(UserProgress, self.request), 'replica1')
+
+    def test_no_request_or_other_apps_use_the_primary(self):
+        self.assertEqual(self.db_for_read(Letter), 'default')
+        self.assertEqual(self.db_for_read(User, self.request), 'default')
+
+    def test_writes_always_use_the_primary(self):
+        self.assertEqual(self.router.db_for_write(Letter), 'default')
+
+    def test_own_progress_is_read_from_the_primary_after_a_write(self):
+        db_router.mark_sticky(7)
+        self.assertEqual(self.db_for_read(UserProgress, self.request), 'default')
+        # the catalog itself can still come from the replica
+        self.assertEqual(self.db_for_read(Challenge, self.request), 'replica1')
+        # ...and other kids' requests aren't affected
+        other = SimpleNamespace(user=SimpleNamespace(pk=8))
+        self.assertEqual(self.db_for_read(UserProgress, other), 'replica1')
+
+    def test_request_that_wrote_stays_on_the_primary(self):
+        self.request._db_use_primary = True
+        self.assertEqual(self.db_for_read(Letter, self.request), 'default')
+
+    def test_reads_inside_a_transaction_use_the_primary(self):
+        with mock.patch.object(connections['default'], 'in_atomic_block', True):
+            self.assertEqual(self.db_for_read(Letter, self.request), 'default')
+
+    def test_lagging_or_unreachable_replica_falls_back_to_the_primary(self):
+        self.replica_lag.return_value = 30.0
+        self.assertEqual(self.db_for_read(Letter, self.request), 'default')
+
+        db_router.forget_replica_health()
+        self.replica_lag.return_value = None
+        self.assertEqual(self.db_for_read(Letter, self.request), 'default')
+
+    def test_lag_is_checked_once_per_interval(self):
+        for _ in range(5):
+            self.db_for_read(Letter, self.request)
+        self.assertEqual(self.replica_lag.call_count, 1)
+
+
+
+class ReadYourWritesTests(TestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_progress_update_makes_the_user_sticky(self):
+        catalog = seed_catalog(letters=1, words_per_letter=1)
+        user = seed_users(1)[0]
+        token = Token.objects.get(user=user).key
+        response = self.client.post(
+            reverse('update-progress'),
+            {'challenge': catalog['challenges'][0].id, 'challenge_type': 'letter',
+             'completed': True, 'score': 80},
+            content_type='application/json', HTTP_AUTHORIZATION=f'Token {token}')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(db_router.is_sticky(user.pk))
+
+
+# The async views (async_views.py) must send exactly what the DRF views send,
+# with no more queries.
+class AsyncViewTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog(letters=3, words_per_letter=5,
+                                   yes_no_questions=20, functional_phrases=20)
+        cls.users = seed_users(3)
+        cls.user = cls.users[0]
+        cls.token = Token.objects.get(user=cls.user).key
+        seed_progress(cls.user, cls.catalog, challenges=10,
+                      yes_no_questions=5, functional_phrases=5)
+        cls.challenge = cls.catalog['challenges'][0]
+        seed_comments(cls.challenge, cls.users, count=10)
+        cls.headers = {'Authorization': f'Token {cls.token}'}
+
+    async def assertSameAsSync(self, name, args=(), query='', headers=None):
+        sync = await sync_to_async(self.client.get)(
+            reverse(name, args=args) + query, headers=headers)
+        # the capture reads the connection of the thread the ORM runs in -
+        # from async code that has to go through sync_to_async
+        queries = CaptureQueriesContext(connection)
+        await sync_to_async(queries.__enter__)()
+        response = await self.async_client.get(
+            reverse(f'async-{name}', args=args) + query, headers=headers)
+        await sync_to_async(queries.__exit__)(None, None, None)
+        count = await sync_to_async(len)(queries)
+        self.assertLessEqual(count, QUERY_BUDGETS[name].queries)
+        self.assertEqual(response.status_code, sync.status_code)
+        self.assertEqual(response['Content-Type'], sync['Content-Type'])
+        self.assertEqual(response.content, sync.content)
+        return response
+
+    async def test_catalog_endpoints_match_the_sync_views(self):
+        letter_id = self.catalog['letters'][0].id
+        await self.assertSameAsSync('letter-list')
+        await self.assertSameAsSync('challenges-by-letter', [letter_id])
+        await self.assertSameAsSync('challenges-by-letter', [letter_id], '?difficulty=hard')
+        await self.assertSameAsSync('challenge-detail', [self.challenge.id])
+
+    async def test_comments_match_the_sync_view(self):
+        response = await self.async_client.get(
+            reverse('async-comment-list', args=[self.challenge.id]))
+        sync = await sync_to_async(self.client.get)(
+            reverse('comment-list-create', args=[self.challenge.id]))
+        self.assertEqual(response.content, sync.content)
+        self.assertEqual(len(response.json()), 10)
+
+    async def test_progress_matches_the_sync_view(self):
+        response = await self.assertSameAsSync('get-user-progress', headers=self.headers)
+        self.assertEqual(len(response.json()), 20)
+
+    async def test_progress_needs_a_valid_token(self):
+        for headers in ({}, {'Authorization': 'Token nope'}):
+            sync = await sync_to_async(self.client.get)(
+                reverse('get-user-progress'), headers=headers)
+            response = await self.async_client.get(
+                reverse('async-get-user-progress'), headers=headers)
+            self.assertEqual(response.status_code, 401)
+            self.assertEqual(response.content, sync.content)
+            self.assertEqual(response['WWW-Authenticate'], 'Token')
+
+    async def test_update_progress(self):
+        challenge = self.catalog['challenges'][-1]
+        body = {'challenge': challenge.id, 'challenge_type': 'letter',
+                'completed': True, 'score': 75}
+        for expected_score in (75, 90):
+            body['score'] = expected_score
+            response = await self.async_client.post(
+                reverse('async-update-progress'), body,
+                content_type='application/json', headers=self.headers)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['progress']['score'], expected_score)
+        progress = await UserProgress.objects.aget(user=self.user, challenge=challenge)
+        self.assertEqual(progress.score, 90)
+        review = await ReviewState.objects.aget(user=self.user, item_type='letter',
+                                                item_id=challenge.id)
+        self.assertEqual(review.repetitions, 2)
+
+        missing = await self.async_client.post(
+            reverse('async-update-progress'),
+            {'challenge': 999999, 'challenge_type': 'yes_no'},
+            content_type='application/json', headers=self.headers)
+        self.assertEqual(missing.status_code, 404)
+
+
+# fast_serializers.py must produce exactly what the DRF serializers produce.
+class FastSerializerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog(letters=2, words_per_letter=3,
+                                   yes_no_questions=5, functional_phrases=5)
+        # the awkward values: non-ASCII, JS line separators, NULLs, nested JSON
+        YesNoQuestion.objects.create(
+            scene_description='Zoë is jumping 🐸 \u2028 "high"', question='Is she?',
+            correct_answer='Yes', visual_url=None,
+            visual_variants=[{'url': 'https://x/y.jpg', 'width': 320, 'ok': True}])
+        FunctionalPhrase.objects.create(phrase='Más agua \u2029 por favor', visual_url='')
+        Word.objects.create(word='ñu', letter=cls.catalog['letters'][0], audio='',
+                            difficulty='easy', audio_duration_ms=None)
+        user = seed_users(1)[0]
+        seed_progress(user, cls.catalog, challenges=3, yes_no_questions=2,
+                      functional_phrases=2)
+
+    def assertSameBytes(self, serializer_class, queryset):
+        expected = JSONRenderer().render(serializer_class(queryset, many=True).data)
+        self.assertEqual(row_encoder(serializer_class).render(queryset), expected)
+
+    def test_flat_serializers_match_byte_for_byte(self):
+        self.assertSameBytes(LetterSerializer, Letter.objects.all())
+        self.assertSameBytes(WordSerializer, Word.objects.all())
+        self.assertSameBytes(YesNoQuestionSerializer, YesNoQuestion.objects.all())
+        self.assertSameBytes(FunctionalPhraseSerializer, FunctionalPhrase.objects.all())
+
+    def test_foreign_keys_and_datetimes(self):
+        # challenge/yes_no_question/... are ids, updated_at goes through DRF
+        self.assertSameBytes(UserProgressSerializer, UserProgress.objects.all())
+
+    def test_nested_serializers_are_refused(self):
+        with self.assertRaises(ValueError):
+            RowEncoder(ChallengeSerializer)
+
+    def test_list_endpoint_uses_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(reverse('words-by-letter',
+                                               args=[self.catalog['letters'][0].id]))
+        self.assertEqual([w['word'] for w in response.json()][-1], 'ñu')
+
+
+# Pre-rendered challenge JSON (fragments.py): same bytes as the serializer,
+# and never stale after an edit.
+class ChallengeFragmentTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog(letters=2, words_per_letter=3)
+        cls.challenge = cls.catalog['challenges'][0]
+
+    def detail(self):
+        return self.client.get(reverse('challenge-detail', args=[self.challenge.id]))
+
+    def serialized(self, challenge_id):
+        challenge = Challenge.objects.select_related('word__letter').get(pk=challenge_id)
+        return JSONRenderer().render(ChallengeSerializer(challenge).data)
+
+    def test_list_and_detail_match_the_serializer(self):
+        letter = self.catalog['letters'][0]
+        queryset = (Challenge.objects.select_related('word__letter')
+                    .filter(word__letter=letter).order_by('difficulty', 'title'))
+        response = self.client.get(reverse('challenges-by-letter', args=[letter.id]))
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response.content,
+                         JSONRenderer().render(ChallengeSerializer(queryset, many=True).data))
+        self.assertEqual(self.detail().content, self.serialized(self.challenge.id))
+
+    def test_edits_rebuild_the_fragment(self):
+        word = self.challenge.word
+        with self.captureOnCommitCallbacks(execute=True):
+            word.audio = 'https://res.cloudinary.com/demo/video/upload/new.mp3'
+            word.save()
+        self.assertIn(b'new.mp3', self.detail().content)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            word.letter.letter = 'Z'
+            word.letter.save()
+        self.assertEqual(self.detail().json()['letter_name'], 'Z')
+        self.assertEqual(self.detail().content, self.serialized(self.challenge.id))
+
+    def test_missing_fragment_is_built_on_first_request(self):
+        ChallengeFragment.objects.filter(challenge=self.challenge).delete()
+        self.assertEqual(self.detail().content, self.serialized(self.challenge.id))
+        self.assertTrue(ChallengeFragment.objects.filter(challenge=self.challenge).exists())
+
+    def test_unknown_challenge_is_a_404(self):
+        response = self.client.get(reverse('challenge-detail', args=[999999]))
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json(), {'detail': 'No Challenge matches the given query.'})
+
+
+# In-memory search (search.py): ranking, prefixes, and edits showing up
+# without a rebuild.
+class SearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        letter = Letter.objects.create(letter='a')
+        cls.apple = Word.objects.create(word='Apple', letter=letter, difficulty='easy')
+        cls.applesauce = Word.objects.create(word='Applesauce', letter=letter,
+                                             difficulty='hard')
+        cls.challenge = Challenge.objects.create(
+            title='Say apple', description='A red apple, slowly.',
+            word=cls.apple, difficulty='easy')
+        cls.phrase = FunctionalPhrase.objects.create(phrase='I want an apple')
+
+    def setUp(self):
+        search.reset_index()
+        self.addCleanup(search.reset_index)
+
+    def results(self, query, **params):
+        response = self.client.get(reverse('search'), {'q': query, **params})
+        return [(r['type'], r['id']) for r in response.json()['results']]
+
+    def test_ranking_and_prefixes(self):
+        self.assertEqual(self.results('apple')[:2],
+                         [('word', self.apple.id), ('challenge', self.challenge.id)])
+        # 'app' is a prefix of both words: the shorter one first
+        self.assertEqual(self.results('app', type='word'),
+                         [('word', self.apple.id), ('word', self.applesauce.id)])
+        self.assertEqual(self.results('red app'), [('challenge', self.challenge.id)])
+        self.assertEqual(self.results('ÁPPLESAUCE'), [('word', self.applesauce.id)])
+        self.assertEqual(self.results('banana'), [])
+        self.assertEqual(self.results(''), [])
+
+    def test_bad_limit_is_rejected(self):
+        response = self.client.get(reverse('search'), {'q': 'apple', 'limit': 'lots'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('limit', response.json())
+
+    def test_phrases_only_for_logged_in_users(self):
+        self.assertNotIn(('phrase', self.phrase.id), self.results('want'))
+        user = User.objects.create_user('kid', password='pass')
+        self.client.force_login(user)
+        self.assertEqual(self.results('want'), [('phrase', self.phrase.id)])
+
+    def test_no_queries_once_built(self):
+        search.get_index()
+        with self.assertNumQueries(0):
+            self.results('apple')
+
+    def test_edits_update_the_index_in_place(self):
+        index = search.get_index()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.apple.word = 'Apricot'
+            self.apple.save()
+        self.assertEqual(self.results('apricot'), [('word', self.apple.id)])
+        self.assertNotIn(('word', self.apple.id), self.results('apple'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.phrase.delete()
+        self.assertEqual(index.search('want'), [])
+        self.assertIs(search.get_index(), index)   # updated, not rebuilt
+        self.assertEqual(index.version, search.current_version())
+
+    @override_settings(SEARCH_INDEX_CHECK_INTERVAL=0)
+    def test_changes_from_other_workers_trigger_a_rebuild(self):
+        index = search.get_index()
+        search.catalog_changed()   # e.g. import_catalog in another process
+        self.assertIsNot(search.get_index(), index)
+
+    @override_settings(SEARCH_INDEX_CHECK_INTERVAL=0, SEARCH_INDEX_MAX_AGE=300)
+    def test_old_index_is_rebuilt_even_if_the_version_looks_unchanged(self):
+        # another worker's edit that never reached our (per-process) cache
+        index = search.get_index()
+        Word.objects.filter(pk=self.apple.pk).update(word='Apricot')
+        self.assertIs(search.get_index(), index)
+
+        with mock.patch('challenges.search.time.monotonic',
+                        return_value=index.built_at + 301):
+            rebuilt = search.get_index()
+        self.assertIsNot(rebuilt, index)
+        self.assertEqual(rebuilt.search('apricot'),
+                         [{'type': 'word', 'id': self.apple.id, 'text': 'Apricot',
+                           'score': 6.0}])
+
+
+# Database search (db_search.py): Postgres full-text/trigram, or the
+# portable fallback on SQLite.
+@override_settings(SEARCH_BACKEND='database')
+class DatabaseSearchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        letter = Letter.objects.create(letter='e')
+        cls.elephant = Word.objects.create(word='Elephant', letter=letter, difficulty='easy')
+        cls.egg = Word.objects.create(word='Egg', letter=letter, difficulty='easy')
+        cls.challenge = Challenge.objects.create(
+            title='Say elephant', description='A big grey elephant.',
+            word=cls.elephant, difficulty='hard')
+
+    def results(self, query):
+        response = self.client.get(reverse('search'), {'q': query})
+        return [(r['type'], r['id']) for r in response.json()['results']]
+
+    def test_whole_words_and_prefixes(self):
+        self.assertEqual(self.results('elephant')[:2],
+                         [('word', self.elephant.id), ('challenge', self.challenge.id)])
+        self.assertEqual(self.results('gre'), [('challenge', self.challenge.id)])
+        self.assertEqual(self.results('big elephant'), [('challenge', self.challenge.id)])
+        self.assertEqual(self.results('zebra'), [])
+
+    def test_misspellings(self):
+        if connection.vendor == 'postgresql' and not db_search.has_trigram('default'):
+            self.skipTest("pg_trgm is not installed on this server")
+        self.assertEqual(self.results('elefant')[0], ('word', self.elephant.id))
+
+    def test_one_query_per_type(self):
+        queries = 2   # anonymous: words + challenges
+        if connection.vendor == 'postgresql' and db_search.has_trigram('default'):
+            queries *= 2   # + setting the trigram threshold
+        with self.assertNumQueries(queries):
+            self.results('elephant')
+
+    def test_similarity_threshold_is_used(self):
+        if connection.vendor == 'postgresql' and not db_search.has_trigram('default'):
+            self.skipTest("pg_trgm is not installed on this server")
+        # 'elefant' vs 'elephant': about 0.6 on Postgres (trigrams), 0.8 with difflib
+        with override_settings(SEARCH_SIMILARITY_THRESHOLD=0.4):
+            self.assertEqual(self.results('elefant')[0], ('word', self.elephant.id))
+        with override_settings(SEARCH_SIMILARITY_THRESHOLD=0.95):
+            self.assertEqual(self.results('elefant'), [])
+
+
+# Spaced repetition (scheduler.py): SM-2 intervals, the review state written
+# by update_progress, and the /practice/next/ queue.
+class SchedulerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog(letters=1, words_per_letter=2,
+                                   yes_no_questions=2, functional_phrases=2)
+        cls.user = seed_users(1)[0]
+        cls.token = Token.objects.get(user=cls.user).key
+
+    def practise(self, item, item_type, score, completed=True):
+        response = self.client.post(
+            reverse('update-progress'),
+            {'challenge': item.id, 'challenge_type': item_type,
+             'completed': completed, 'score': score},
+            content_type='application/json', HTTP_AUTHORIZATION=f'Token {self.token}')
+        self.assertEqual(response.status_code, 200)
+        return ReviewState.objects.get(user=self.user, item_type=item_type, item_id=item.id)
+
+    def due(self, days_later=0):
+        with mock.patch('challenges.scheduler.timezone.now',
+                        return_value=timezone.now() + timedelta(days=days_later)):
+            response = self.client.get(reverse('practice-next'),
+                                       HTTP_AUTHORIZATION=f'Token {self.token}')
+        return [(item['type'], item['challenge']) for item in response.json()]
+
+    def test_quality(self):
+        self.assertEqual(scheduler.quality(100, True), 5)
+        self.assertEqual(scheduler.quality(60, True), 3)
+        self.assertEqual(scheduler.quality(100, False), 2)
+        self.assertEqual(scheduler.quality(None, True), 0)
+
+    def test_intervals_grow_and_a_failure_starts_over(self):
+        challenge = self.catalog['challenges'][0]
+        self.assertEqual([self.practise(challenge, 'letter', 100).interval_days
+                          for _ in range(3)], [1, 6, 16.2])   # 6 x ease 2.7
+        state = self.practise(challenge, 'letter', 20)
+        self.assertEqual((state.interval_days, state.repetitions), (1, 0))
+        self.assertLess(state.ease, 2.8)
+        self.assertAlmostEqual((state.due_at - state.reviewed_at).days, 1)
+
+    def test_practice_next_covers_every_type(self):
+        challenge = self.catalog['challenges'][0]
+        question = self.catalog['yes_no_questions'][0]
+        phrase = self.catalog['functional_phrases'][0]
+        self.practise(challenge, 'letter', 100)
+        self.practise(question, 'yes_no', 100)
+        self.practise(phrase, 'functional', 100)
+        self.practise(phrase, 'functional', 100)   # next one in 6 days
+        self.assertEqual(self.due(), [])
+        self.assertEqual(self.due(days_later=2),
+                         [('letter', challenge.id), ('yes_no', question.id)])
+        self.assertEqual(len(self.due(days_later=7)), 3)
+
+        question.delete()   # deleted content leaves the queue
+        self.assertEqual(len(self.due(days_later=7)), 2)
+
+    def test_bad_n_is_rejected(self):
+        response = self.client.get(reverse('practice-next'), {'n': 'ten'},
+                                   HTTP_AUTHORIZATION=f'Token {self.token}')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('n', response.json())
+
+    def test_backfill_from_progress(self):
+        seed_progress(self.user, self.catalog, challenges=4,
+                      yes_no_questions=2, functional_phrases=2)
+        call_command('backfill_review_state', stdout=StringIO())
+        self.assertEqual(ReviewState.objects.filter(user=self.user).count(), 8)
+        self.assertEqual(set(ReviewState.objects.values_list('item_type', flat=True)),
+                         {'letter', 'yes_no', 'functional'})
+        call_command('backfill_review_state', stdout=StringIO())   # re-run: nothing new
+        self.assertEqual(ReviewState.objects.count(), 8)
+
+
+# ?fields= (speechfun_backend/sparse_fields.py): fewer fields in the JSON
+# AND in the SQL.
+class SparseFieldsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog(letters=1, words_per_letter=3,
+                                   yes_no_questions=3, functional_phrases=0)
+        cls.users = seed_users(2)
+        cls.challenge = cls.catalog['challenges'][0]
+        seed_comments(cls.challenge, cls.users, count=3)
+
+    def setUp(self):
+        self.client.force_login(self.users[0])
+
+    def get(self, url, fields):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, {'fields': fields})
+        self.assertEqual(response.status_code, 200)
+        # the last query is the view's own (before it: session + user)
+        return response.json(), queries[-1]['sql']
+
+    def test_challenge_without_joins(self):
+        data, sql = self.get(reverse('challenge-detail', args=[self.challenge.id]), 'id,title')
+        self.assertEqual(data, {'id': self.challenge.id, 'title': self.challenge.title})
+        self.assertNotIn('JOIN', sql)
+        self.assertNotIn('description', sql)
+
+    def test_nested_fields(self):
+        url = reverse('challenges-by-letter', args=[self.catalog['letters'][0].id])
+        data, sql = self.get(url, 'id,word.audio,letter_name')
+        full = self.client.get(url).json()
+        self.assertEqual(data, [{'id': c['id'], 'word': {'audio': c['word']['audio']},
+                                 'letter_name': c['letter_name']} for c in full])
+        self.assertIn('JOIN', sql)
+        self.assertNotIn('"word"', sql.replace('"challenges_word"', ''))
+
+    def test_fast_lists_and_comments(self):
+        data, sql = self.get(reverse('yes-no-questions'), 'id,visual_url')
+        self.assertEqual(data, list(YesNoQuestion.objects.order_by('pk')
+                                    .values('id', 'visual_url')))
+        self.assertNotIn('question', sql.replace('challenges_yesnoquestion', ''))
+
+        data, sql = self.get(reverse('comment-list-create', args=[self.challenge.id]),
+                             'text,user.username')
+        self.assertEqual(set(data[0]), {'text', 'user'})
+        self.assertEqual(set(data[0]['user']), {'username'})
+        self.assertNotIn('email', sql)
+
+    def test_bad_fields_and_writes(self):
+        url = reverse('challenge-detail', args=[self.challenge.id])
+        for fields in ['id,pizza', 'title.x', 'word.pizza', ',']:
+            self.assertEqual(self.client.get(url, {'fields': fields}).status_code, 400)
+        # writes ignore ?fields= (it would drop the fields being validated)
+        response = self.client.post(
+            reverse('comment-list-create', args=[self.challenge.id]) + '?fields=id',
+            {'text': 'Fun!', 'challenge': self.challenge.id}, content_type='application/json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['text'], 'Fun!')
+
+
+# The attempt log (attempts.py): every submission kept, and folded into
+# UserProgress/ReviewState by the rollup when PROGRESS_WRITES='rollup'.
+@override_settings(PROGRESS_ROLLUP_LAG_SECONDS=0)
+class ProgressAttemptTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog(letters=1, words_per_letter=2,
+                                   yes_no_questions=2, functional_phrases=0)
+        cls.users = seed_users(2)
+        cls.challenge = cls.catalog['challenges'][0]
+        cls.question = cls.catalog['yes_no_questions'][0]
+
+    def submit(self, user, item, item_type, score, completed=True):
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse('update-progress'),
+            {'challenge': item.id, 'challenge_type': item_type,
+             'completed': completed, 'score': score}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def review(self, user, item_type, item):
+        state = ReviewState.objects.get(user=user, item_type=item_type, item_id=item.id)
+        return state.repetitions, state.interval_days, state.last_quality
+
+    def test_inline_writes_keep_the_history(self):
+        user = self.users[0]
+        for score in [40, 70, 100]:
+            self.submit(user, self.challenge, 'letter', score)
+        progress = UserProgress.objects.get(user=user, challenge=self.challenge)
+        self.assertEqual(progress.score, 100)
+        history = self.client.get(reverse('progress-attempts'),
+                                  {'type': 'letter', 'item': self.challenge.id}).json()
+        self.assertEqual([a['score'] for a in history['results']], [100, 70, 40])
+        # already applied by the requests - the rollup must not apply them again
+        before = self.review(user, 'letter', self.challenge)
+        self.assertEqual(attempts.roll_up(), 3)
+        self.assertEqual(self.review(user, 'letter', self.challenge), before)
+        self.assertEqual(attempts.roll_up(), 0)
+
+    def test_rollup_writes_match_inline_writes(self):
+        inline, logged = self.users
+        submissions = [(self.challenge, 'letter', 40), (self.challenge, 'letter', 100),
+                       (self.question, 'yes_no', 100), (self.challenge, 'letter', 90)]
+        for item, item_type, score in submissions:
+            self.submit(inline, item, item_type, score)
+        with override_settings(PROGRESS_WRITES='rollup'):
+            for item, item_type, score in submissions:
+                self.submit(logged, item, item_type, score)
+            self.assertFalse(UserProgress.objects.filter(user=logged).exists())
+            self.assertEqual(self.client.post(
+                reverse('update-progress'), {'challenge': 999999, 'score': 1},
+                content_type='application/json').status_code, 404)
+            attempts.roll_up(batch_size=3)   # two batches
+
+        def state(user):
+            return sorted(UserProgress.objects.filter(user=user).values_list(
+                'challenge_type', 'challenge', 'yes_no_question', 'completed', 'score'))
+        self.assertEqual(state(logged), state(inline))
+        self.assertEqual(self.review(logged, 'letter', self.challenge),
+                         self.review(inline, 'letter', self.challenge))
+        self.assertEqual(self.review(logged, 'yes_no', self.question),
+                         self.review(inline, 'yes_no', self.question))
+
+    @override_settings(PROGRESS_WRITES='rollup', PROGRESS_ROLLUP_LAG_SECONDS=60)
+    def test_recent_attempts_wait_for_the_next_rollup(self):
+        self.submit(self.users[0], self.challenge, 'letter', 80)
+        self.assertEqual(attempts.roll_up(), 0)
+        self.assertEqual(attempts.roll_up(now=timezone.now() + timedelta(minutes=2)), 1)
+        self.assertTrue(UserProgress.objects.filter(user=self.users[0]).exists())
+
+    def test_partitions(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest("the attempt log is only partitioned on Postgres")
+        table = ProgressAttempt._meta.db_table
+        today = timezone.now().date()
+        self.assertEqual(attempts.ensure_partitions(), [])   # made by the migration
+        created = attempts.ensure_partitions(months_ahead=5)
+        self.assertEqual(len(created), 3)   # months 3, 4 and 5
+        ProgressAttempt.objects.create(user=self.users[0], item_type='letter', item_id=1,
+                                       completed=True, score=100)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT tableoid::regclass::text FROM {table}")
+            self.assertEqual(cursor.fetchone()[0], f"{table}_y{today:%Y}m{today:%m}")
+
+
+# ItemStats (item_stats.py): kept up to date by every progress write, and
+# always equal to what reconcile_item_stats recomputes from scratch.
+@override_settings(PROGRESS_ROLLUP_LAG_SECONDS=0)
+class ItemStatsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog(letters=2, words_per_letter=2, challenges_per_word=1,
+                                   yes_no_questions=2, functional_phrases=2)
+        cls.users = seed_users(3)
+        cls.staff = User.objects.create_user('teacher', password='x', is_staff=True)
+        cls.challenge = cls.catalog['challenges'][0]
+        cls.question = cls.catalog['yes_no_questions'][0]
+        cls.phrase = cls.catalog['functional_phrases'][0]
+
+    def submit(self, user, item, item_type, score, completed):
+        self.client.force_login(user)
+        response = self.client.post(
+            reverse('update-progress'),
+            {'challenge': item.id, 'challenge_type': item_type,
+             'completed': completed, 'score': score}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+
+    def submit_all(self):
+        kid, other, _ = self.users
+        self.submit(kid, self.challenge, 'letter', 40, False)
+        self.submit(kid, self.challenge, 'letter', 90, True)     # retry: 1 learner
+        self.submit(other, self.challenge, 'letter', 70, True)
+        self.submit(other, self.question, 'yes_no', 100, True)
+        self.submit(kid, self.phrase, 'functional', 30, False)
+        self.submit(kid, self.phrase, 'functional', 20, False)
+
+    def numbers(self):
+        return sorted(ItemStats.objects.filter(attempts__gt=0).values_list(
+            'challenge', 'yes_no_question', 'functional_phrase',
+            'attempts', 'learners', 'completed', 'score_sum'), key=str)
+
+    def test_writes_keep_the_stats_and_reconcile_agrees(self):
+        self.submit_all()
+        stats = ItemStats.objects.get(challenge=self.challenge)
+        self.assertEqual((stats.attempts, stats.learners, stats.completed, stats.score_sum),
+                         (3, 2, 2, 160))
+        self.assertEqual(stats.completion_rate, 1.0)
+        self.assertEqual(stats.average_score, 80)
+        phrase = ItemStats.objects.get(functional_phrase=self.phrase)
+        self.assertEqual((phrase.attempts, phrase.learners, phrase.completed), (2, 1, 0))
+
+        written = self.numbers()
+        self.assertEqual(item_stats.reconcile(attempts.PROGRESS_TARGETS), 0)
+        self.assertEqual(self.numbers(), written)
+        # drift (a failed request, a deleted kid...) is fixed
+        ItemStats.objects.filter(challenge=self.challenge).update(attempts=99, learners=0)
+        UserProgress.objects.filter(yes_no_question=self.question).delete()
+        self.assertEqual(item_stats.reconcile(attempts.PROGRESS_TARGETS), 2)
+        stats = ItemStats.objects.get(yes_no_question=self.question)
+        self.assertEqual((stats.attempts, stats.learners, stats.completion_rate), (1, 0, None))
+        self.assertEqual(ItemStats.objects.get(challenge=self.challenge).attempts, 3)
+
+    def test_reconcile_locks_the_stats_before_counting(self):
+        self.submit_all()
+        with CaptureQueriesContext(connection) as queries:
+            item_stats.reconcile(attempts.PROGRESS_TARGETS)
+        sql = [query['sql'] for query in queries.captured_queries]
+        locks = [n for n, q in enumerate(sql) if 'FROM "challenges_itemstats"' in q]
+        counts = [n for n, q in enumerate(sql) if 'FROM "challenges_userprogress"' in q]
+        self.assertEqual(len(locks), len(attempts.PROGRESS_TARGETS))
+        self.assertEqual(len(counts), len(attempts.PROGRESS_TARGETS))
+        # one transaction per kind: lock its stats rows, then count
+        self.assertTrue(all(lock < count for lock, count in zip(locks, counts)))
+        self.assertTrue(all(count < lock for count, lock in zip(counts, locks[1:])))
+        if connection.features.has_select_for_update:
+            self.assertTrue(all(sql[n].endswith('FOR UPDATE') for n in locks))
+
+    def test_rollup_writes_give_the_same_stats(self):
+        self.submit_all()
+        inline = self.numbers()
+        ItemStats.objects.all().delete()
+        UserProgress.objects.all().delete()
+        ProgressAttempt.objects.all().delete()
+        with override_settings(PROGRESS_WRITES='rollup'):
+            self.submit_all()
+            self.assertFalse(ItemStats.objects.exists())
+            attempts.roll_up(batch_size=4)
+        self.assertEqual(self.numbers(), inline)
+
+    def test_endpoint(self):
+        self.submit_all()
+        self.client.force_login(self.users[0])
+        url = reverse('item-stats', args=['challenges'])
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.client.force_login(self.staff)
+        results = self.client.get(url).json()['results']
+        self.assertEqual(len(results), Challenge.objects.count())
+        self.assertEqual(results[0], {
+            'id': self.challenge.id, 'label': self.challenge.word.word, 'attempts': 3,
+            'learners': 2, 'completed': 2, 'completion_rate': 1.0, 'average_score': 80.0})
+        self.assertEqual(results[-1]['completion_rate'], None)   # untried: last
+
+        other_letter = self.catalog['letters'][1]
+        results = self.client.get(url, {'letter': other_letter.id}).json()['results']
+        self.assertEqual({r['id'] for r in results},
+                         set(Challenge.objects.filter(word__letter=other_letter)
+                             .values_list('id', flat=True)))
+        self.assertEqual(self.client.get(url, {'ordering': 'pizza'}).status_code, 400)
+        phrases = self.client.get(reverse('item-stats', args=['functional-phrases']),
+                                  {'ordering': 'average_score', 'n': 1}).json()['results']
+        self.assertEqual([(p['id'], p['average_score']) for p in phrases], [(self.phrase.id, 20.0)])
+        self.assertEqual(self.client.get(reverse('item-stats', args=['pizzas'])).status_code,
+                         404)
+
+    def test_admin_columns(self):
+        self.submit_all()
+        self.staff.is_superuser = True
+        self.staff.save()
+        self.client.force_login(self.staff)
+        response = self.client.get(reverse('admin:challenges_challenge_changelist'),
+                                   {'o': '-8'})   # sorted by completion rate
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '100%')
+        self.assertContains(response, '80.0')
+
+
+# reconcile_item_stats while kids keep practising: a progress write that
+# lands between the reconcile's lock and its count must be counted exactly
+# once. Needs row locks and a second connection - Postgres, TransactionTestCase.
+@skipUnlessDBFeature('has_select_for_update')
+class ItemStatsReconcileRaceTests(TransactionTestCase):
+
+    def setUp(self):
+        catalog = seed_catalog(letters=1, words_per_letter=2, challenges_per_word=1,
+                               yes_no_questions=0, functional_phrases=0)
+        self.tried, self.untried = catalog['challenges'][:2]
+        self.kid, self.other = seed_users(2)
+
+    def submit(self, user, challenge, score):
+        response = Client().post(
+            reverse('update-progress'),
+            {'challenge': challenge.id, 'challenge_type': 'letter',
+             'completed': True, 'score': score},
+            content_type='application/json',
+            HTTP_AUTHORIZATION=f'Token {Token.objects.get(user=user).key}')
+        return response.status_code
+
+    def reconcile_during(self, user, challenge, score):
+        """Reconcile the challenges; once their stats rows are locked, another
+        thread submits progress. Returns whether that write had to wait."""
+        statuses = []
+
+        def write():
+            try:
+                statuses.append(self.submit(user, challenge, score))
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=write)
+        rollup_position = AttemptRollup.objects.values_list
+
+        def between_lock_and_count(*args, **kwargs):
+            thread.start()
+            thread.join(timeout=1)
+            return rollup_position(*args, **kwargs)
+
+        with mock.patch.object(AttemptRollup.objects, 'values_list',
+                               side_effect=between_lock_and_count):
+            item_stats.reconcile({'letter': attempts.PROGRESS_TARGETS['letter']})
+            blocked = thread.is_alive()
+        thread.join()
+        self.assertEqual(statuses, [200])
+        return blocked
+
+    def stats(self, challenge):
+        stats = ItemStats.objects.get(challenge=challenge)
+        return stats.attempts, stats.learners, stats.completed, stats.score_sum
+
+    def test_write_during_reconcile_is_counted_once(self):
+        self.assertEqual(self.submit(self.kid, self.tried, 60), 200)
+        self.assertTrue(self.reconcile_during(self.other, self.tried, 80))
+        self.assertEqual(self.stats(self.tried), (2, 2, 2, 140))
+        self.assertEqual(item_stats.reconcile(attempts.PROGRESS_TARGETS), 0)
+
+    def test_first_write_of_an_item_during_reconcile(self):
+        self.assertFalse(ItemStats.objects.filter(challenge=self.untried).exists())
+        self.assertTrue(self.reconcile_during(self.kid, self.untried, 90))
+        self.assertEqual(self.stats(self.untried), (1, 1, 1, 90))
+        self.assertEqual(item_stats.reconcile(attempts.PROGRESS_TARGETS), 0)
+
+
+# Admin changelists of big tables (speechfun_backend/large_admin.py): no
+# exact COUNT(*) of millions of rows.
+@override_settings(ADMIN_EXACT_COUNT_LIMIT=10)
+class LargeTableAdminTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog(letters=1, words_per_letter=2, challenges_per_word=1,
+                                   yes_no_questions=0, functional_phrases=0)
+        cls.users = seed_users(2)
+        cls.challenge, cls.other = cls.catalog['challenges']
+        seed_comments(cls.challenge, cls.users, count=25)
+        seed_comments(cls.other, cls.users, count=5)
+
+    def count(self, queryset):
+        return EstimatedCountPaginator(queryset, 100).count
+
+    def test_counts_stop_at_the_limit(self):
+        self.assertEqual(self.count(Comment.objects.filter(challenge=self.other)), 5)
+        self.assertEqual(self.count(Comment.objects.filter(challenge=self.challenge)), 11)
+        if connection.vendor != 'postgresql':
+            self.assertEqual(self.count(Comment.objects.all()), 11)
+
+    def test_postgres_estimate_for_the_whole_table(self):
+        if connection.vendor != 'postgresql':
+            self.skipTest("only Postgres keeps row estimates")
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Comment._meta.db_table}')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.count(Comment.objects.all()), 30)
+
+    def test_comments_of_one_challenge(self):
+        self.client.force_login(User.objects.create_superuser('admin', password='x'))
+        url = reverse('admin:challenges_comment_changelist')
+        response = self.client.get(url)
+        self.assertContains(response, f'href="?challenge__id__exact={self.other.id}"')
+        response = self.client.get(url, {'challenge__id__exact': self.other.id})
+        self.assertEqual(response.context['cl'].result_count, 5)
+
+
+# /lesson/<id>/: the challenge screen's data in one request.
+class LessonTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog(letters=1, words_per_letter=2,
+                                   yes_no_questions=0, functional_phrases=0)
+        cls.users = seed_users(3)
+        cls.user = cls.users[0]
+        cls.challenge = cls.catalog['challenges'][0]
+        cls.comments = seed_comments(cls.challenge, cls.users, count=15)
+        UserProgress.objects.create(user=cls.user, challenge=cls.challenge,
+                                    completed=True, score=80)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def lesson(self, **params):
+        return self.client.get(reverse('lesson', args=[self.challenge.id]), params)
+
+    def test_everything_by_default(self):
+        remember_explanation(self.challenge.word.word, 'A fun word! 🎉')
+        data = self.lesson().json()
+        self.assertEqual(data['challenge'], self.client.get(
+            reverse('challenge-detail', args=[self.challenge.id])).json())
+        self.assertEqual(data['progress'], {'challenge': self.challenge.id, 'type': 'letter',
+                                            'completed': True, 'score': 80})
+        self.assertEqual(data['comments']['count'], 15)
+        newest = (Comment.objects.filter(challenge=self.challenge)
+                  .order_by('-created_at', '-id'))
+        self.assertEqual([c['id'] for c in data['comments']['results']],
+                         [c.id for c in newest[:10]])
+        self.assertEqual(data['explanation'], 'A fun word! 🎉')
+
+    def test_include_picks_the_parts(self):
+        data = self.lesson(include='progress').json()
+        self.assertEqual(set(data), {'challenge', 'progress'})
+        with self.assertNumQueries(3):   # session + user + the challenge
+            self.assertEqual(set(self.lesson(include='').json()), {'challenge'})
+        self.assertIsNone(self.lesson(include='explanation').json()['explanation'])
+
+    def test_anonymous_and_errors(self):
+        self.client.logout()
+        data = self.lesson().json()
+        self.assertIsNone(data['progress'])
+        self.assertEqual(data['comments']['count'], 15)
+        self.assertEqual(self.lesson(include='progress,pizza').status_code, 400)
+        self.assertEqual(self.client.get(reverse('lesson', args=[999999])).status_code, 404)
+        other = self.catalog['challenges'][1]
+        self.assertEqual(self.client.get(reverse('lesson', args=[other.id]))
+                         .json()['comments'], {'count': 0, 'results': []})
+
+
+# /unseen/<kind>/: what the kid hasn't completed, paged by id.
+class UnseenItemsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog(letters=2, words_per_letter=5,
+                                   yes_no_questions=6, functional_phrases=3)
+        cls.user = seed_users(1)[0]
+        cls.challenges = cls.catalog['challenges']   # 20, 10 per letter
+        UserProgress.objects.bulk_create(
+            [UserProgress(user=cls.user, challenge=c, completed=True, score=90)
+             for c in cls.challenges[:6]]
+            + [UserProgress(user=cls.user, challenge=cls.challenges[6], completed=False),
+               UserProgress(user=cls.user, yes_no_question=cls.catalog['yes_no_questions'][0],
+                            challenge_type='yes_no', completed=True)])
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def page(self, kind, **params):
+        response = self.client.get(reverse('unseen-items', args=[kind]), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_completed_items_are_left_out(self):
+        ids = [c['id'] for c in self.page('challenges', n=50)['results']]
+        # started but not completed still counts as unseen
+        self.assertEqual(ids, [c.id for c in self.challenges[6:]])
+        self.assertEqual(len(self.page('yes-no-questions')['results']), 5)
+        self.assertEqual(len(self.page('functional-phrases')['results']), 3)
+
+    def test_keyset_paging(self):
+        seen, after = [], None
+        while True:
+            page = self.page('challenges', n=4, **({'after': after} if after else {}))
+            seen += [c['id'] for c in page['results']]
+            after = page['next_after']
+            if after is None:
+                break
+        self.assertEqual(seen, [c.id for c in self.challenges[6:]])
+
+    def test_filters_and_same_json_as_the_serializer(self):
+        letter = self.catalog['letters'][1]
+        response = self.client.get(reverse('unseen-items', args=['challenges']),
+                                   {'letter': letter.id, 'difficulty': 'easy'})
+        expected = (Challenge.objects.select_related('word__letter')
+                    .filter(word__letter=letter, difficulty='easy').order_by('pk'))
+        self.assertTrue(expected.exists())
+        self.assertEqual(response.content, JSONRenderer().render(
+            {'results': ChallengeSerializer(expected, many=True).data, 'next_after': None}))
+
+    def test_bad_requests(self):
+        self.assertEqual(self.client.get(
+            reverse('unseen-items', args=['pizzas'])).status_code, 404)
+        self.assertEqual(self.client.get(
+            reverse('unseen-items', args=['challenges']), {'after': 'x'}).status_code, 400)
+        self.client.logout()
+        self.assertEqual(self.client.get(
+            reverse('unseen-items', args=['challenges'])).status_code, 401)
+
+
+# /api/batch/ (speechfun_backend/batch.py): the same answers as separate
+# calls, with the caller authenticated once.
+class BatchTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog(letters=2, words_per_letter=2,
+                                   yes_no_questions=2, functional_phrases=0)
+        cls.user = seed_users(1)[0]
+        cls.token = Token.objects.get(user=cls.user).key
+        Profile.objects.create(user=cls.user, bio='Loves the letter S')
+
+    def batch(self, body, **extra):
+        return self.client.post(reverse('batch'), body, content_type='application/json',
+                                **extra)
+
+    def test_same_bodies_and_one_authentication(self):
+        auth = {'HTTP_AUTHORIZATION': f'Token {self.token}'}
+        urls = ['/api/challenges/letters/',
+                f"/api/challenges/challenges/{self.catalog['challenges'][0].id}/",
+                '/api/challenges/yes-no-questions/?fields=id',
+                '/api/users/profile/?fields=bio']
+        # token + one query per sub-request (alone, each would be 2)
+        with self.assertNumQueries(1 + 4):
+            response = self.batch({'requests': urls}, **auth)
+        self.assertEqual(response.status_code, 200)
+        responses = response.json()['responses']
+        self.assertEqual([r['url'] for r in responses], urls)
+        for url, result in zip(urls, responses):
+            alone = self.client.get(url, **auth)
+            self.assertEqual((result['status'], result['body']),
+                             (alone.status_code, alone.json()))
+
+    def test_errors_stay_in_their_slot(self):
+        responses = self.batch({'requests': [
+            '/api/challenges/letters/',
+            '/admin/',                           # not batchable
+            'https://evil.example/api/users/profile/',
+            '/api/challenges/nothing-here/',
+            '/api/challenges/yes-no-questions/',  # needs a login
+        ]}).json()['responses']
+        self.assertEqual([r['status'] for r in responses], [200, 400, 400, 404, 401])
+
+    def test_limits(self):
+        self.assertEqual(self.batch({'requests': '/api/challenges/letters/'}).status_code, 400)
+        with override_settings(BATCH_MAX_REQUESTS=2):
+            self.assertEqual(self.batch(
+                {'requests': ['/api/challenges/letters/'] * 3}).status_code, 400)
+        with override_settings(BATCH_TIMEOUT_SECONDS=0):
+            responses = self.batch(
+                {'requests': ['/api/challenges/letters/'] * 2}).json()['responses']
+        self.assertEqual([r['status'] for r in responses], [504, 504])
+
+
+# "parallel": true runs the sub-requests in threads, each with its own
+# database connection - they only see committed data, hence TransactionTestCase.
+class ParallelBatchTests(TransactionTestCase):
+    databases = '__all__'   # read replicas (mirrors of default) included
+
+    def test_parallel_matches_sequential(self):
+        catalog = seed_catalog(letters=3, words_per_letter=2,
+                               yes_no_questions=0, functional_phrases=0)
+        urls = [f'/api/challenges/letters/{letter.id}/challenges/'
+                for letter in catalog['letters']] + ['/api/challenges/letters/']
+        results = {}
+        for parallel in (False, True):
+            response = self.client.post(reverse('batch'),
+                                        {'requests': urls, 'parallel': parallel},
+                                        content_type='application/json')
+            results[parallel] = response.json()['responses']
+        self.assertEqual(results[True], results[False])
+        self.assertEqual([len(r['body']) for r in results[True]], [4, 4, 4, 3])
+
+
+# Slow parallel sub-requests: 504 at the deadline, finished in the
+# background with their answers thrown away, and never more threads than
+# BATCH_MAX_WORKERS however many slow batches come in.
+@override_settings(BATCH_MAX_WORKERS=2, BATCH_TIMEOUT_SECONDS=0.2)
+class BatchTimeoutTests(SimpleTestCase):
+
+    def setUp(self):
+        batch.reset_executor()
+        self.addCleanup(batch.reset_executor)
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+        self.lock = threading.Lock()
+        self.running = self.most_running = 0
+        self.finished = []
+
+    def slow(self, request, url):
+        with self.lock:
+            self.running += 1
+            self.most_running = max(self.most_running, self.running)
+        self.release.wait(timeout=5)
+        with self.lock:
+            self.running -= 1
+            self.finished.append(url)
+        return 200, b'{}'
+
+    def post(self, urls):
+        response = self.client.post(reverse('batch'), {'requests': urls, 'parallel': True},
+                                    content_type='application/json')
+        return [r['status'] for r in response.json()['responses']]
+
+    def test_slow_batches_share_the_pool(self):
+        first = [f'/api/challenges/letters/{n}/' for n in range(3)]
+        second = [f'/api/challenges/letters/{n}/' for n in range(3, 6)]
+        with mock.patch('speechfun_backend.batch.run_one', side_effect=self.slow):
+            self.assertEqual(self.post(first), [504, 504, 504])
+            self.assertEqual(self.post(second), [504, 504, 504])   # pool still busy
+            self.release.set()
+            batch.executor().shutdown(wait=True)   # let the started ones end
+        # the two that had started ran to the end; the queued ones never ran
+        self.assertEqual(self.most_running, 2)
+        self.assertEqual(sorted(self.finished), first[:2])
+
+
+# bench / bench_asgi report nearest-rank percentiles - checked by hand.
+class BenchPercentileTests(SimpleTestCase):
+
+    def test_nearest_rank(self):
+        ten = list(range(1, 11))
+        self.assertEqual(percentile(ten, 50), 5)
+        self.assertEqual(percentile(ten, 95), 10)
+        self.assertEqual(percentile(ten, 10), 1)
+        twenty = list(range(1, 21))
+        self.assertEqual(percentile(twenty, 95), 19)
+        self.assertEqual(percentile(twenty, 99), 20)
+        self.assertEqual(percentile(twenty, 50), 10)
+        self.assertEqual(percentile([7], 99), 7)
+        self.assertEqual(percentile([3, 4], 50), 3)
+        self.assertIsNone(percentile([], 50))
+
+
+# import_catalog / export_catalog (catalog.py): matched by natural key, so
+# importing twice changes nothing, and an export imports back unchanged.
+class CatalogImportTests(TestCase):
+
+    CATALOG = {
+        'letters': [{'letter': 'a'}],
+        'words': [
+            {'letter': 'a', 'word': 'apple', 'difficulty': 'easy',
+             'audio': 'https://example.com/apple.mp3'},
+            {'letter': 'a', 'word': 'ant', 'difficulty': 'easy', 'audio_file': 'ant.mp3'},
+            {'letter': 'b', 'word': 'ball', 'difficulty': 'medium'},
+            {'letter': 'b', 'word': 'bat', 'difficulty': 'hard'},
+            {'letter': 'b', 'word': 'bee', 'difficulty': 'easy'},
+        ],
+        'challenges': [
+            {'letter': 'a', 'word': 'apple', 'title': 'Say apple',
+             'description': 'Slowly', 'difficulty': 'easy'},
+            {'letter': 'b', 'word': 'ball', 'title': 'Say ball',
+             'description': 'Loudly', 'difficulty': 'medium'},
+        ],
+        'yes_no_questions': [
+            {'question': 'Is she jumping?', 'scene_description': 'Girl jumping',
+             'correct_answer': 'Yes', 'visual_file': 'jump.png'},
+        ],
+        'functional_phrases': [{'phrase': 'I want water', 'visual_url': ''}],
+    }
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dir = Path(self.tmp.name)
+        for name in ['ant.mp3', 'jump.png']:
+            (self.dir / name).write_bytes(b'media')
+        settings_override = override_settings(OFFLINE_BUNDLE_ROOT=str(self.dir / 'bundles'))
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        patches = {
+            'upload_word_audio': {'audio': 'https://example.com/ant.mp3'},
+            'upload_yes_no_visual': {'visual_url': 'https://example.com/jump.png'},
+            'upload_phrase_visual': {'visual_url': 'https://example.com/phrase.png'},
+        }
+        self.uploads = {}
+        for name, result in patches.items():
+            patcher = mock.patch(f'challenges.management.commands.import_catalog.{name}',
+                                 return_value=result)
+            self.uploads[name] = patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def write(self, catalog, name='catalog.json'):
+        path = self.dir / name
+        path.write_text(json.dumps(catalog))
+        return str(path)
+
+    def run_import(self, path, *args):
+        call_command('import_catalog', path, '--media-dir', str(self.dir), *args,
+                     stdout=StringIO())
+
+    def counts(self):
+        return [model.objects.count() for model in
+                (Letter, Word, Challenge, YesNoQuestion, FunctionalPhrase)]
+
+    def test_importing_twice_only_applies_changes(self):
+        path = self.write(self.CATALOG)
+        self.run_import(path)
+        self.assertEqual(self.counts(), [2, 5, 2, 1, 1])
+        self.assertEqual(Word.objects.get(word='ant').audio, 'https://example.com/ant.mp3')
+        uploaded = self.uploads['upload_word_audio'].call_count
+
+        changed = json.loads(json.dumps(self.CATALOG))
+        changed['words'][2]['difficulty'] = 'hard'
+        changed['challenges'][0]['description'] = 'Very slowly'
+        changed['letters'] = [{'letter': 'A'}]   # same letter, other case
+        self.run_import(self.write(changed))
+        self.assertEqual(self.counts(), [2, 5, 2, 1, 1])
+        self.assertEqual(Word.objects.get(word='ball').difficulty, 'hard')
+        self.assertEqual(Challenge.objects.get(title='Say apple').description, 'Very slowly')
+        # ant already has its audio URL - not uploaded again
+        self.assertEqual(self.uploads['upload_word_audio'].call_count, uploaded)
+
+    def test_writes_in_batches(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.run_import(self.write(self.CATALOG), '--batch-size', '2')
+        inserts = [q['sql'] for q in ctx.captured_queries
+                   if q['sql'].startswith('INSERT INTO "challenges_word"')]
+        self.assertEqual(len(inserts), 3)   # 5 words, 2 per batch
+
+    def test_dry_run_saves_and_uploads_nothing(self):
+        out = StringIO()
+        call_command('import_catalog', self.write(self.CATALOG), '--media-dir', str(self.dir),
+                     '--dry-run', stdout=out)
+        self.assertEqual(self.counts(), [0, 0, 0, 0, 0])
+        for upload in self.uploads.values():
+            upload.assert_not_called()
+        self.assertIn('dry run', out.getvalue())
+
+    def test_export_imports_back_unchanged(self):
+        self.run_import(self.write(self.CATALOG))
+
+        def snapshot():
+            return (
+                sorted(Word.objects.values_list('letter__letter', 'word', 'difficulty', 'audio')),
+                sorted(Challenge.objects.values_list('word__word', 'title', 'description',
+                                                     'difficulty')),
+                sorted(YesNoQuestion.objects.values_list('question', 'scene_description',
+                                                         'correct_answer', 'visual_url')),
+                sorted(FunctionalPhrase.objects.values_list('phrase', 'visual_url')),
+            )
+        before = snapshot()
+        exported = self.dir / 'export.json'
+        call_command('export_catalog', '--output', str(exported))
+        for model in (Challenge, Word, Letter, YesNoQuestion, FunctionalPhrase):
+            model.objects.all().delete()
+
+        self.run_import(str(exported))
+        self.assertEqual(snapshot(), before)
+        # and a re-import of the export is a no-op
+        out = StringIO()
+        call_command('import_catalog', str(exported), stdout=out)
+        written = re.findall(r'(\d+) created, (\d+) updated', out.getvalue())
+        self.assertEqual(len(written), 5)
+        self.assertEqual(set(written), {('0', '0')})
+
+
+def mp3_frames(count, rate_index=0, first=b''):
+    """`count` silent MPEG-1 Layer III frames, 128 kbps. rate_index 0 = 44.1 kHz
+    (417-byte frames), 1 = 48 kHz (384-byte frames). `first` goes into the
+    first frame's body (e.g. a Xing header)."""
+    header = bytes([0xFF, 0xFB, 0x90 | rate_index << 2, 0x00])
+    length = 144 * 128_000 // (44_100, 48_000)[rate_index]
+    frames = [header + first.ljust(length - 4, b'\x00')]
+    frames += [header + bytes(length - 4) for _ in range(count - 1)]
+    return b''.join(frames)
+
+
+# The MP3 frame reader (audio.py) behind the audio sprites.
+class Mp3ParserTests(SimpleTestCase):
+
+    def assertClip(self, data, frames, sample_rate=44_100, frame_bytes=417):
+        clip = parse_mp3(data)
+        self.assertEqual(len(clip.frames), frames * frame_bytes)
+        self.assertEqual(clip.samples, frames * 1152)
+        self.assertEqual(clip.sample_rate, sample_rate)
+        self.assertEqual(clip.duration_ms, round(frames * 1152 * 1000 / sample_rate))
+
+    def test_plain_frames(self):
+        self.assertClip(mp3_frames(10), 10)   # 261 ms
+        self.assertEqual(mp3_duration_ms(mp3_frames(10)), 261)
+        self.assertClip(mp3_frames(3, rate_index=1), 3, sample_rate=48_000, frame_bytes=384)
+
+    def test_tags_are_skipped(self):
+        # ID3v2: 10-byte header with a syncsafe size of 200 (1 << 7 | 72)
+        id3v2 = b'ID3\x03\x00\x00\x00\x00\x01\x48' + b'\xff' * 200
+        id3v1 = b'TAG' + b'\x00' * 125
+        self.assertClip(id3v2 + mp3_frames(4) + id3v1, 4)
+
+    def test_xing_header_frame_is_dropped(self):
+        self.assertClip(mp3_frames(5, first=b'\x00' * 32 + b'Xing'), 4)
+
+    def test_truncated_or_garbage_tail(self):
+        self.assertClip(mp3_frames(6) + mp3_frames(1)[:100], 6)
+        self.assertClip(mp3_frames(6) + b'not audio at all' * 10, 6)
+        self.assertClip(b'junk' + mp3_frames(2), 2)
+
+    def test_not_an_mp3(self):
+        self.assertIsNone(parse_mp3(b'RIFF....WAVEfmt ' * 20))
+        self.assertIsNone(parse_mp3(b''))
+        self.assertIsNone(mp3_duration_ms(b'\xff\xfb'))
+
+
+# build_letter_sprite (sprites.py) with downloads and the upload mocked.
+class AudioSpriteBuildTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.letter = Letter.objects.create(letter='s')
+        audio = {'sun': mp3_frames(10), 'sea': mp3_frames(5),
+                 'sock': mp3_frames(4, rate_index=1)}   # other sample rate
+        cls.files = {f'https://example.com/{word}.mp3': data for word, data in audio.items()}
+        cls.words = {word: Word.objects.create(letter=cls.letter, word=word, difficulty='easy',
+                                               audio=f'https://example.com/{word}.mp3')
+                     for word in audio}
+        cls.words['sit'] = Word.objects.create(letter=cls.letter, word='sit', difficulty='easy')
+
+    def build(self, **kwargs):
+        with mock.patch('challenges.sprites.download', side_effect=self.files.__getitem__), \
+                mock.patch('challenges.sprites.upload_audio_sprite',
+                           return_value='https://example.com/sprite-s.mp3') as upload:
+            sprite, built = build_letter_sprite(self.letter, **kwargs)
+        return sprite, built, upload
+
+    def test_manifest_and_word_sizes(self):
+        sprite, built, upload = self.build()
+        self.assertTrue(built)
+        # words in name order: sea, sit (no audio), sock (48 kHz), sun
+        self.assertEqual(
+            [(c['word'], c['offset_ms'], c['duration_ms'], c['bytes'])
+             for c in sprite.manifest['clips']],
+            [('sea', 0, 131, 5 * 417), ('sun', 131, 261, 10 * 417)])
+        self.assertEqual(sprite.manifest['missing'],
+                         sorted([self.words['sit'].id, self.words['sock'].id]))
+        self.assertEqual(sprite.bytes, 15 * 417)
+        self.assertEqual(sprite.duration_ms, round(15 * 1152 * 1000 / 44_100))
+        self.assertEqual(len(upload.call_args.args[0]), 15 * 417)
+
+        sun = Word.objects.get(pk=self.words['sun'].pk)
+        self.assertEqual((sun.audio_duration_ms, sun.audio_bytes), (261, 10 * 417))
+        sock = Word.objects.get(pk=self.words['sock'].pk)
+        self.assertEqual((sock.audio_duration_ms, sock.audio_bytes), (96, 4 * 384))
+
+    def test_unchanged_words_skip_the_rebuild(self):
+        first, _, _ = self.build()
+        sprite, built, upload = self.build()
+        self.assertFalse(built)
+        self.assertEqual(sprite.pk, first.pk)
+        upload.assert_not_called()
+
+        Word.objects.filter(pk=self.words['sea'].pk).update(
+            audio='https://example.com/sun.mp3')
+        _, built, upload = self.build()
+        self.assertTrue(built)
+        upload.assert_called_once()
+
+
+# Offline bundles (bundles.py): content-hashed names, old files pruned, and
+# served with cache-forever headers (speechfun_backend/middleware.py).
+class OfflineBundleFileTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.catalog = seed_catalog(letters=2, words_per_letter=2,
+                                   yes_no_questions=0, functional_phrases=0)
+        cls.letter = cls.catalog['letters'][0]
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+        settings_override = override_settings(OFFLINE_BUNDLE_ROOT=tmp.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def files(self, letter):
+        return sorted(p.name for p in self.dir.glob(f'letter-{letter.id}.*'))
+
+    def rename_first_word(self, word):
+        Word.objects.filter(letter=self.letter).order_by('id').update(word=word)
+
+    def test_name_is_the_content_hash(self):
+        bundle, built = build_letter_bundle(self.letter)
+        self.assertTrue(built)
+        raw = (self.dir / bundle.filename).read_bytes()
+        self.assertEqual(bundle.content_hash, hashlib.sha256(raw).hexdigest())
+        self.assertEqual(bundle.filename,
+                         f'letter-{self.letter.id}.{bundle.content_hash[:16]}.json')
+        self.assertEqual(gzip.decompress((self.dir / (bundle.filename + '.gz')).read_bytes()),
+                         raw)
+        self.assertEqual(build_letter_bundle(self.letter), (bundle, False))
+
+        self.rename_first_word('zebra')
+        changed, built = build_letter_bundle(self.letter)
+        self.assertTrue(built)
+        self.assertNotEqual(changed.filename, bundle.filename)
+
+    def test_old_files_are_pruned(self):
+        names = []
+        for word in ['one', 'two', 'three']:
+            self.rename_first_word(word)
+            names.append(build_letter_bundle(self.letter)[0].filename)
+        # the current file and the one it replaced, each with its .gz
+        self.assertEqual(self.files(self.letter),
+                         sorted([names[1], names[1] + '.gz', names[2], names[2] + '.gz']))
+
+    def test_deleting_a_letter_deletes_its_files(self):
+        other = self.catalog['letters'][1]
+        build_letter_bundle(self.letter)
+        build_letter_bundle(other)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.letter.delete()
+        self.assertEqual(self.files(self.letter), [])
+        self.assertEqual(len(self.files(other)), 2)
+        self.assertFalse(OfflineBundle.objects.filter(letter_id=self.letter.id).exists())
+
+    def test_served_with_cache_forever_headers(self):
+        bundle, _ = build_letter_bundle(self.letter)
+        response = self.client.get(settings.OFFLINE_BUNDLE_URL + bundle.filename,
+                                   HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Cache-Control'], 'max-age=315360000, public, immutable')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        response.close()
+        # not a bundle name: not served (and no ../ tricks)
+        self.assertEqual(self.client.get(settings.OFFLINE_BUNDLE_URL + 'notes.json')
+                         .status_code, 404)
+
+
+# /metrics/ (speechfun_backend/views.py) is for Prometheus and staff only;
+# MetricsMiddleware labels every request by URL name.
+@override_settings(METRICS_TOKEN='scrape-secret')
+class MetricsTests(TestCase):
+
+    def test_needs_the_token_or_staff(self):
+        url = reverse('metrics')
+        self.assertEqual(self.client.get(url).status_code, 403)
+        self.assertEqual(self.client.get(url, HTTP_AUTHORIZATION='Bearer wrong').status_code,
+                         403)
+        self.client.force_login(User.objects.create_user('kid', password='x'))
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        response = self.client.get(url, HTTP_AUTHORIZATION='Bearer scrape-secret')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], CONTENT_TYPE_LATEST)
+        self.assertIn(b'speechfun_request_duration_seconds', response.content)
+
+        self.client.force_login(User.objects.create_user('teacher', password='x',
+                                                         is_staff=True))
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_no_token_configured_means_no_token_access(self):
+        self.assertEqual(self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer ')
+                         .status_code, 403)
+
+    def test_requests_are_labelled_by_url_name(self):
+        def count(view, status):
+            return REGISTRY.get_sample_value('speechfun_request_duration_seconds_count',
+                                             {'view': view, 'method': 'GET',
+                                              'status': str(status)}) or 0
+        letters, missing = count('letter-list', 200), count('challenge-detail', 404)
+        queries = REGISTRY.get_sample_value('speechfun_db_queries_per_request_count',
+                                            {'view': 'letter-list'}) or 0
+        self.client.get(reverse('letter-list'))
+        self.client.get(reverse('letter-list'))
+        self.client.get(reverse('challenge-detail', args=[999999]))
+        self.assertEqual(count('letter-list', 200), letters + 2)
+        self.assertEqual(count('challenge-detail', 404), missing + 1)
+        self.assertEqual(REGISTRY.get_sample_value('speechfun_db_queries_per_request_count',
+                                                   {'view': 'letter-list'}), queries + 2)
+
+
+def photo(width, height, orientation=None):
+    """A JPEG like a phone makes: with EXIF (camera, GPS-ish tags, rotation)."""
+    exif = Image.Exif()
+    exif[0x010F] = 'PhoneMaker'   # Make
+    exif[0x0131] = 'Camera 1.0'   # Software
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = io.BytesIO()
+    Image.new('RGB', (width, height), (200, 80, 40)).save(buffer, 'JPEG', exif=exif.tobytes())
+    buffer.seek(0)
+    return buffer
+
+
+# Admin picture uploads (images.py / uploads.py): resized variants, no EXIF.
+@override_settings(VISUAL_VARIANT_WIDTHS=[320, 640, 1024],
+                   VISUAL_VARIANT_FORMATS=['webp', 'jpeg'])
+class ImageVariantTests(SimpleTestCase):
+
+    def test_downscales_to_the_target_widths(self):
+        variants = build_variants(photo(2000, 1000))
+        self.assertEqual([(v['width'], v['height'], v['format']) for v in variants],
+                         [(320, 160, 'webp'), (320, 160, 'jpeg'), (640, 320, 'webp'),
+                          (640, 320, 'jpeg'), (1024, 512, 'webp'), (1024, 512, 'jpeg')])
+        for variant in variants:
+            image = Image.open(io.BytesIO(variant['content']))
+            self.assertEqual(image.size, (variant['width'], variant['height']))
+            self.assertEqual(image.format, variant['format'].upper())
+
+    def test_never_upscales(self):
+        self.assertEqual({v['width'] for v in build_variants(photo(200, 100))}, {200})
+        self.assertEqual({v['width'] for v in build_variants(photo(800, 400))}, {320, 640, 800})
+
+    def test_strips_exif_after_rotating(self):
+        # orientation 6: stored sideways, shown rotated 90° - 100x200 on screen
+        variants = build_variants(photo(200, 100, orientation=6))
+        self.assertEqual({(v['width'], v['height']) for v in variants}, {(100, 200)})
+        for variant in variants:
+            image = Image.open(io.BytesIO(variant['content']))
+            self.assertEqual(dict(image.getexif()), {})
+            self.assertNotIn('exif', image.info)
+
+    def test_not_an_image(self):
+        self.assertIsNone(build_variants(io.BytesIO(b'not a picture')))
+
+    @override_settings(VISUAL_UPLOAD_WORKERS=2)
+    def test_upload_records_each_variant(self):
+        def fake_upload(file, public_id, **options):
+            return {'secure_url': f'https://example.com/{public_id}.{options["format"]}'}
+        with mock.patch('challenges.uploads.cloudinary_upload', side_effect=fake_upload), \
+                mock.patch('challenges.uploads.ThreadPoolExecutor',
+                           wraps=ThreadPoolExecutor) as pool:
+            result = upload_visual(photo(700, 350), 'tests', 'pic')
+        pool.assert_called_once_with(max_workers=2)
+        expected = build_variants(photo(700, 350))
+        self.assertEqual(
+            [(v['width'], v['height'], v['format'], v['bytes'], v['kind'])
+             for v in result['visual_variants']],
+            [(v['width'], v['height'], v['format'], len(v['content']), 'image')
+             for v in expected])
+        self.assertEqual(result['visual_url'], 'https://example.com/pic_700w_jpeg.jpg')
+
+
+# The service stubs (speechfun_backend/stubs.py): a seeded run is reproducible,
+# also after its behaviour is changed through POST /_stubs/config.
+class ServiceStubTests(SimpleTestCase):
+
+    def setUp(self):
+        self.server = stubs.start_in_thread(seed=1, config={
+            'groq': {'latency': 'fixed:0', 'errors': 0.3},
+            'sendgrid': {'latency': 'fixed:0', 'rps': 1},
+            'cloudinary': {'latency': 'fixed:0'},
+        })
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def post(self, path, body):
+        request = urllib.request.Request(self.server.url + path, json.dumps(body).encode(),
+                                         {'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request, timeout=5) as response:
+                return response.status, dict(response.headers)
+        except urllib.error.HTTPError as e:
+            return e.code, dict(e.headers)
+
+    def groq_statuses(self, count):
+        return [self.post('/openai/v1/chat/completions',
+                          {'messages': [{'content': 'hi'}]})[0] for _ in range(count)]
+
+    def test_seeded_error_rate(self):
+        expected_rng = random.Random('1:groq')
+        expected = [503 if expected_rng.random() < 0.3 else 200 for _ in range(50)]
+        self.assertEqual(self.groq_statuses(50), expected)
+        self.assertEqual(self.server.state.stats()['groq']['errors'], expected.count(503))
+
+        # changing the profile at runtime starts the same seeded stream again
+        status, _ = self.post('/_stubs/config', {'groq': {'errors': 0.5}})
+        self.assertEqual(status, 200)
+        expected_rng = random.Random('1:groq')
+        self.assertEqual(self.groq_statuses(20),
+                         [503 if expected_rng.random() < 0.5 else 200 for _ in range(20)])
+
+    def test_services_draw_different_streams(self):
+        rngs = [b.rng.random() for b in self.server.state.behaviours.values()]
+        self.assertEqual(len(set(rngs)), 3)
+
+    def test_rate_limit_answers_429(self):
+        results = [self.post('/v3/mail/send', {}) for _ in range(5)]
+        self.assertEqual([status for status, _ in results], [202, 429, 429, 429, 429])
+        self.assertEqual(results[-1][1]['Retry-After'], '1')
+        self.assertEqual(self.server.state.stats()['sendgrid']['throttled'], 4)
+
+
+# generate_data (synthetic.py): the same --seed gives the same rows.
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class SyntheticDataTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog(letters=2, words_per_letter=3, yes_no_questions=5, functional_phrases=5)
+
+    def generate(self, seed):
+        User.objects.filter(username__startswith='synth').delete()   # cascades
+        call_command('generate_data', '--users', '30', '--progress', '200',
+                     '--comments', '40', '--seed', str(seed), '--batch-size', '50',
+                     '--noinput', stdout=StringIO())
+        # by username, not id: ids differ between runs. The password hashes
+        # differ too (random salt) and are left out.
+        return (
+            list(User.objects.filter(username__startswith='synth').order_by('username')
+                 .values_list('username', 'email', 'date_joined', 'is_active')),
+            list(UserProgress.objects.filter(user__username__startswith='synth')
+                 .order_by('user__username', 'challenge_type', 'challenge',
+                           'yes_no_question', 'functional_phrase')
+                 .values_list('user__username', 'challenge', 'yes_no_question',
+                              'functional_phrase', 'challenge_type', 'completed',
+                              'score', 'updated_at')),
+            list(Comment.objects.filter(user__username__startswith='synth')
+                 .order_by('user__username', 'created_at', 'challenge', 'text')
+                 .values_list('user__username', 'challenge', 'text', 'created_at')),
+        )
+
+    def test_same_seed_same_rows(self):
+        first = self.generate(seed=3)
+        self.assertEqual([len(rows) for rows in first][::2], [30, 40])
+        self.assertGreater(len(first[1]), 150)
+        self.assertEqual(self.generate(seed=3), first)
+        self.assertNotEqual(self.generate(seed=4), first)
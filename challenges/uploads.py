@@ -0,0 +1,139 @@
+# challenges/uploads.py
+# One place that knows how our media is named and stored in Cloudinary.
+# The admin forms upload one file at a time; the import_catalog command
+# uploads thousands in parallel. Both go through these helpers so a word
+# uploaded from either place ends up with the same public_id / folder.
+#
+# Every upload_* helper returns a dict of model field values
+# (e.g. {'audio': url}) so callers can just setattr() them onto the instance.
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import cloudinary.uploader
+import cloudinary.utils
+from django.conf import settings
+from speechfun_backend.outbound import outbound_call
+
+from .audio import mp3_duration_ms
+from .images import build_variants
+
+
+def cloudinary_upload(file, **options):
+    """cloudinary.uploader.upload with a timeout, bulkhead and circuit
+    breaker (speechfun_backend/outbound.py)"""
+    with outbound_call('cloudinary') as policy:
+        return cloudinary.uploader.upload(file, timeout=policy.timeout, **options)
+
+
+def safe_public_id(text):
+    """Turn a question/phrase/word into something Cloudinary accepts as an id"""
+    return (
+        text.lower()
+        .replace('?', '')
+        .replace(' ', '_')
+        .replace('/', '_')
+        .replace('\\', '_')
+    )[:50]
+
+
+def upload_word_audio(file, word):
+    """Upload an MP3 for a Word (plus its size and duration)."""
+    content = file.read()
+    file.seek(0)
+    upload_result = cloudinary_upload(
+        file,
+        resource_type="auto",
+        folder="speechfun-kids/audios",
+        public_id=f"{word.lower().replace(' ', '_')}"
+    )
+    return {
+        'audio': upload_result['secure_url'],
+        'audio_bytes': len(content),
+        'audio_duration_ms': mp3_duration_ms(content),
+    }
+
+
+def upload_audio_sprite(content, letter, content_hash):
+    """Upload a letter's audio sprite (see challenges/sprites.py).
+
+    The hash is part of the public_id so every rebuild gets a new URL and
+    no CDN/browser cache can ever hand out an old sprite with a new manifest.
+    """
+    upload_result = cloudinary_upload(
+        io.BytesIO(content),
+        resource_type="video",  # Cloudinary files audio under "video"
+        folder="speechfun-kids/audio-sprites",
+        public_id=f"letter_{letter.lower()}_{content_hash[:12]}",
+        overwrite=True,
+    )
+    return upload_result['secure_url']
+
+
+def upload_yes_no_visual(file, question):
+    """Upload the image/video for a YesNoQuestion."""
+    return upload_visual(file, "speechfun-kids/yesno-visuals",
+                         f"q_{safe_public_id(question)}")
+
+
+def upload_phrase_visual(file, phrase):
+    """Upload the image/video for a FunctionalPhrase."""
+    return upload_visual(file, "speechfun-kids/functional-visuals",
+                         f"phrase_{safe_public_id(phrase)}")
+
+
+def upload_visual(file, folder, public_id):
+    """Upload a visual as a set of resized variants (see challenges/images.py).
+
+    Returns {'visual_url': ..., 'visual_variants': [...]}. visual_url stays
+    a single URL for older app versions: the biggest JPEG if we made one.
+    Each variant is {url, width, height, bytes, format, kind}.
+    """
+    variants = build_variants(file)
+
+    if variants is None:
+        # Video (or something Pillow can't read) - upload as-is and let
+        # Cloudinary cut poster frames at our target widths on request.
+        upload_result = cloudinary_upload(
+            file,
+            resource_type="auto",  # auto-detect image or video
+            folder=folder,
+            public_id=public_id,
+            overwrite=True,
+            quality="auto",
+            fetch_format="auto",
+        )
+        posters = []
+        if upload_result.get('resource_type') == 'video':
+            for width in settings.VISUAL_VARIANT_WIDTHS:
+                url, _ = cloudinary.utils.cloudinary_url(
+                    upload_result['public_id'], resource_type='video',
+                    format='jpg', width=width, crop='scale',
+                    version=upload_result.get('version'), secure=True)
+                posters.append({'url': url, 'width': width, 'height': None,
+                                'bytes': None, 'format': 'jpeg', 'kind': 'poster'})
+        return {'visual_url': upload_result['secure_url'], 'visual_variants': posters}
+
+    def upload_one(variant):
+        upload_result = cloudinary_upload(
+            io.BytesIO(variant['content']),
+            resource_type="image",
+            folder=folder,
+            public_id=f"{public_id}_{variant['width']}w_{variant['format']}",
+            format='jpg' if variant['format'] == 'jpeg' else variant['format'],
+            overwrite=True,
+        )
+        return {
+            'url': upload_result['secure_url'],
+            'width': variant['width'],
+            'height': variant['height'],
+            'bytes': len(variant['content']),
+            'format': variant['format'],
+            'kind': 'image',
+        }
+
+    # A handful of small uploads - do them side by side instead of one by one.
+    with ThreadPoolExecutor(max_workers=settings.VISUAL_UPLOAD_WORKERS) as pool:
+        stored = list(pool.map(upload_one, variants))
+
+    fallback = [v for v in stored if v['format'] == 'jpeg'] or stored
+    return {'visual_url': fallback[-1]['url'], 'visual_variants': stored}
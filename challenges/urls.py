@@ -1,10 +1,12 @@
 from django.urls import path
 from .views import (
-    LetterList, WordListByLetter,
+    LetterList, WordListByLetter, WordSpriteByLetter, OfflineBundleIndex,
     ChallengeListByLetterAndDifficulty, ChallengeDetail,
     CommentListCreate, CommentDetail,
     UserProgressList, UserProgressCreateOrUpdate,
-    get_user_progress, update_progress, YesNoQuestionList, FunctionalPhraseList
+    get_user_progress, update_progress, YesNoQuestionList, FunctionalPhraseList,
+    UnseenItems, item_stats_list, lesson, practice_next, progress_attempts,
+    search_content
 )
 
 
@@ -12,8 +14,11 @@ urlpatterns = [
     path('letters/', LetterList.as_view(), name='letter-list'),
     path('letters/<int:letter_id>/words/',
          WordListByLetter.as_view(), name='words-by-letter'),
+    path('letters/<int:letter_id>/words/sprite/',
+         WordSpriteByLetter.as_view(), name='word-sprite-by-letter'),
     path('letters/<int:letter_id>/challenges/',
          ChallengeListByLetterAndDifficulty.as_view(), name='challenges-by-letter'),
+    path('bundles/', OfflineBundleIndex.as_view(), name='offline-bundle-index'),
     path('challenges/<int:pk>/', ChallengeDetail.as_view(), name='challenge-detail'),
     path('challenges/<int:challenge_id>/comments/',
          CommentListCreate.as_view(), name='comment-list-create'),
@@ -21,6 +26,7 @@ urlpatterns = [
     # NEW function-based views for Token auth
     path('progress/', get_user_progress, name='get-user-progress'),
     path('progress/update/', update_progress, name='update-progress'),
+    path('progress/attempts/', progress_attempts, name='progress-attempts'),
     # Old class-based views (keep for backwards compatibility if needed)
     #     path('progress/', UserProgressList.as_view(), name='user-progress-list'),
     #     path('progress/update/', UserProgressCreateOrUpdate.as_view(),
@@ -28,4 +34,11 @@ urlpatterns = [
     path('yes-no-questions/', YesNoQuestionList.as_view(), name='yes-no-questions'),
     path('functional-phrases/', FunctionalPhraseList.as_view(),
          name='functional-phrases'),
+    path('lesson/<int:challenge_id>/', lesson, name='lesson'),
+    # ?letter= &difficulty= (challenges only) &n= &after=
+    path('unseen/<slug:kind>/', UnseenItems.as_view(), name='unseen-items'),
+    # staff only: ?letter= &difficulty= (challenges only) &ordering= &n= &offset=
+    path('stats/<slug:kind>/', item_stats_list, name='item-stats'),
+    path('practice/next/', practice_next, name='practice-next'),
+    path('search/', search_content, name='search'),
 ]
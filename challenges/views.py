@@ -1,25 +1,40 @@
+import json
 import traceback
 from rest_framework import generics, permissions, status
+from rest_framework.exceptions import NotFound, ValidationError
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import IsAuthenticated
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Window
 from django.shortcuts import get_object_or_404
+from speechfun_backend.sparse_fields import SparseFieldsMixin
+from . import attempts, db_search, fragments, item_stats, scheduler, search
+from users.word_help import cached_explanation
+from .fast_serializers import FastListMixin, row_encoder
 from .models import (Letter, Word, Challenge, Comment,
-                     UserProgress, YesNoQuestion, FunctionalPhrase)
+                     UserProgress, YesNoQuestion, FunctionalPhrase,
+                     AudioSprite, OfflineBundle, ProgressAttempt)
 from .serializers import (LetterSerializer, WordSerializer,
                           ChallengeSerializer, CommentSerializer,
                           UserProgressSerializer, YesNoQuestionSerializer,
-                          FunctionalPhraseSerializer)
+                          FunctionalPhraseSerializer, AudioSpriteSerializer,
+                          OfflineBundleSerializer)
 
 
-class LetterList(generics.ListAPIView):
+# FastListMixin: these lists only dump a few columns, so they skip the
+# per-row serializer work (same JSON) - see fast_serializers.py
+# SparseFieldsMixin (FastListMixin includes it): ?fields=id,title returns
+# and SELECTs only those fields - see speechfun_backend/sparse_fields.py
+class LetterList(FastListMixin, generics.ListAPIView):
     queryset = Letter.objects.all()
     serializer_class = LetterSerializer
     permission_classes = [permissions.AllowAny]
 
 
-class WordListByLetter(generics.ListAPIView):
+class WordListByLetter(FastListMixin, generics.ListAPIView):
     serializer_class = WordSerializer
     permission_classes = [permissions.AllowAny]
 
@@ -30,7 +45,26 @@ class WordListByLetter(generics.ListAPIView):
         return Word.objects.filter(letter_id=letter_id)
 
 
-class ChallengeListByLetterAndDifficulty(generics.ListAPIView):
+class WordSpriteByLetter(SparseFieldsMixin, generics.RetrieveAPIView):
+    # Manifest for the letter's audio sprite (one mp3 with every word in it).
+    # 404 until `manage.py build_audio_sprites` has run for this letter -
+    # the app then just falls back to the per-word audio URLs.
+    queryset = AudioSprite.objects.select_related('letter')
+    serializer_class = AudioSpriteSerializer
+    lookup_field = 'letter_id'
+    permission_classes = [permissions.AllowAny]
+
+
+class OfflineBundleIndex(SparseFieldsMixin, generics.ListAPIView):
+    # One entry per letter: content hash + URL of its offline bundle.
+    # The app compares hashes with what it already has and only downloads
+    # the bundles that changed.
+    queryset = OfflineBundle.objects.select_related('letter').order_by('letter__letter')
+    serializer_class = OfflineBundleSerializer
+    permission_classes = [permissions.AllowAny]
+
+
+class ChallengeListByLetterAndDifficulty(SparseFieldsMixin, generics.ListAPIView):
     serializer_class = ChallengeSerializer
     permission_classes = [permissions.AllowAny]
 # Uses BOTH URL parameter (letter_id) and query parameter (?difficulty=medium)
@@ -44,31 +78,50 @@ class ChallengeListByLetterAndDifficulty(generics.ListAPIView):
         letter_id = self.kwargs.get('letter_id')
         # .get() instead of [] → safer (won't raise KeyError)
         difficulty = self.request.query_params.get('difficulty', None)
-        queryset = Challenge.objects.filter(word__letter_id=letter_id)
+        # select_related: the serializer shows word + letter for every challenge,
+        # without it that's 2 extra queries PER challenge
+        queryset = Challenge.objects.select_related(
+            'word__letter').filter(word__letter_id=letter_id)
         if difficulty in ['easy', 'medium', 'hard']:
             queryset = queryset.filter(difficulty=difficulty)
         return queryset.order_by('difficulty', 'title')
 
+    def list(self, request, *args, **kwargs):
+        # JSON clients get the pre-rendered challenges glued together
+        # (fragments.py); the browsable API and ?fields= still use the
+        # serializer (with a trimmed queryset)
+        if request.accepted_renderer.format != 'json' or self.sparse_fields() is not None:
+            return super().list(request, *args, **kwargs)
+        return fragments.list_response(self.get_queryset())
+
 
-class ChallengeDetail(generics.RetrieveAPIView):
-    queryset = Challenge.objects.all()
+class ChallengeDetail(SparseFieldsMixin, generics.RetrieveAPIView):
+    queryset = Challenge.objects.select_related('word__letter')
     serializer_class = ChallengeSerializer
     # looks for primary key in URL (default anyway)
     lookup_field = 'pk'
     permission_classes = [permissions.AllowAny]
 
+    def retrieve(self, request, *args, **kwargs):
+        # pre-rendered JSON, like the list above
+        if request.accepted_renderer.format != 'json' or self.sparse_fields() is not None:
+            return super().retrieve(request, *args, **kwargs)
+        return fragments.detail_response(self.get_queryset().filter(pk=kwargs['pk']))
+
 # Two behaviors in one class:
 # GET → list all comments for a challenge (newest first)
 # POST → create new comment
 
 
-class CommentListCreate(generics.ListCreateAPIView):
+class CommentListCreate(SparseFieldsMixin, generics.ListCreateAPIView):
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
 
     def get_queryset(self):
         challenge_id = self.kwargs['challenge_id']
-        return Comment.objects.filter(challenge_id=challenge_id).order_by('-created_at')
+        return (Comment.objects.filter(challenge_id=challenge_id)
+                .select_related('user')  # nested user → 1 query, not 1 per comment
+                .order_by('-created_at'))
 
 # perform_create() is very important:
 # Automatically sets user = logged-in user
@@ -90,8 +143,8 @@ class CommentListCreate(generics.ListCreateAPIView):
 # DELETE (only owner)
 
 
-class CommentDetail(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Comment.objects.all()
+class CommentDetail(SparseFieldsMixin, generics.RetrieveUpdateDestroyAPIView):
+    queryset = Comment.objects.select_related('user')
     serializer_class = CommentSerializer
     permission_classes = [permissions.IsAuthenticatedOrReadOnly]
     lookup_field = 'pk'
@@ -141,12 +194,14 @@ def get_user_progress(request):
         result = []
         for item in progress_items:
             # Determine which ID to return
-            if item.challenge:
-                challenge_id = item.challenge.id
-            elif item.yes_no_question:
-                challenge_id = item.yes_no_question.id
-            elif item.functional_phrase:
-                challenge_id = item.functional_phrase.id
+            # (the *_id columns are already on the row - item.challenge.id
+            # would load the whole Challenge, one query per row)
+            if item.challenge_id:
+                challenge_id = item.challenge_id
+            elif item.yes_no_question_id:
+                challenge_id = item.yes_no_question_id
+            elif item.functional_phrase_id:
+                challenge_id = item.functional_phrase_id
             else:
                 continue
 
@@ -184,86 +239,116 @@ def update_progress(request):
     if not challenge_id:
         return Response({'error': 'Challenge ID required'}, status=status.HTTP_400_BAD_REQUEST)
 
+    saved = {
+        'success': True,
+        'progress': {
+            'challenge': challenge_id,
+            'type': challenge_type,
+            'completed': completed,
+            'score': score
+        }
+    }
+
     try:
-        if challenge_type == 'yes_no':
-            # Handle Yes/No questions
-            try:
-                yes_no_q = YesNoQuestion.objects.get(id=challenge_id)
-            except YesNoQuestion.DoesNotExist:
-                return Response({'error': 'Yes/No question not found'}, status=status.HTTP_404_NOT_FOUND)
-
-            progress, created = UserProgress.objects.get_or_create(
-                user=request.user,
-                yes_no_question=yes_no_q,
-                defaults={
-                    'completed': completed,
-                    'score': score,
-                    'challenge_type': 'yes_no'
-                }
-            )
-
-            if not created:
-                progress.completed = completed
-                progress.score = score
-                progress.save()
-
-            print(f"✅ Yes/No progress saved: {progress}")
-
-        elif challenge_type == 'functional':
-            # Handle functional language phrases
-            try:
-                func_phrase = FunctionalPhrase.objects.get(id=challenge_id)
-            except FunctionalPhrase.DoesNotExist:
-                return Response({'error': 'Functional phrase not found'}, status=status.HTTP_404_NOT_FOUND)
-
-            progress, created = UserProgress.objects.update_or_create(
-                user=request.user,
-                functional_phrase=func_phrase,
-                defaults={
-                    'completed': completed,
-                    'score': score,
-                    'challenge_type': 'functional'
-                }
-            )
-
-            if not created:
-                progress.completed = completed
-                progress.score = score
-                progress.save()
-
-        else:  # 'letter' type (default)
-            # Handle regular letter challenges
-            try:
-                challenge = Challenge.objects.get(id=challenge_id)
-            except Challenge.DoesNotExist:
-                return Response({'error': 'Challenge not found'}, status=status.HTTP_404_NOT_FOUND)
-
-            progress, created = UserProgress.objects.get_or_create(
-                user=request.user,
-                challenge=challenge,
-                defaults={
-                    'completed': completed,
-                    'score': score,
-                    'challenge_type': 'letter'
-                }
-            )
-
-            if not created:
-                progress.completed = completed
-                progress.score = score
-                progress.save()
-
-            print(f"✅ Letter progress saved: {progress}")
-
-        return Response({
-            'success': True,
-            'progress': {
-                'challenge': challenge_id,
-                'type': challenge_type,
-                'completed': completed,
-                'score': score
-            }
-        }, status=status.HTTP_200_OK)
+        if settings.PROGRESS_WRITES == 'rollup':
+            # only the attempt is written (one INSERT, no hot row updated);
+            # `manage.py rollup_attempts` applies it - see attempts.py
+            stored_type = challenge_type if challenge_type in attempts.PROGRESS_TARGETS else 'letter'
+            model, _, missing = attempts.PROGRESS_TARGETS[stored_type]
+            if not model.objects.filter(id=challenge_id).exists():
+                return Response({'error': missing}, status=status.HTTP_404_NOT_FOUND)
+            attempts.record_attempt(request.user, stored_type, challenge_id, completed, score,
+                                    applied=False)
+            return Response(saved, status=status.HTTP_200_OK)
+
+        # one transaction: a reconcile_item_stats run sees this kid's progress,
+        # attempt and stats delta all together or none of them (item_stats.py)
+        with transaction.atomic():
+            if challenge_type == 'yes_no':
+                # Handle Yes/No questions
+                try:
+                    yes_no_q = YesNoQuestion.objects.get(id=challenge_id)
+                except YesNoQuestion.DoesNotExist:
+                    return Response({'error': 'Yes/No question not found'}, status=status.HTTP_404_NOT_FOUND)
+                item_type, item = 'yes_no', yes_no_q
+
+                progress, created = UserProgress.objects.get_or_create(
+                    user=request.user,
+                    yes_no_question=yes_no_q,
+                    defaults={
+                        'completed': completed,
+                        'score': score,
+                        'challenge_type': 'yes_no'
+                    }
+                )
+
+                previous = None if created else (progress.completed, progress.score)
+                if not created:
+                    progress.completed = completed
+                    progress.score = score
+                    progress.save()
+
+                print(f"✅ Yes/No progress saved: {progress}")
+
+            elif challenge_type == 'functional':
+                # Handle functional language phrases
+                try:
+                    func_phrase = FunctionalPhrase.objects.get(id=challenge_id)
+                except FunctionalPhrase.DoesNotExist:
+                    return Response({'error': 'Functional phrase not found'}, status=status.HTTP_404_NOT_FOUND)
+                item_type, item = 'functional', func_phrase
+
+                progress, created = UserProgress.objects.get_or_create(
+                    user=request.user,
+                    functional_phrase=func_phrase,
+                    defaults={
+                        'completed': completed,
+                        'score': score,
+                        'challenge_type': 'functional'
+                    }
+                )
+
+                previous = None if created else (progress.completed, progress.score)
+                if not created:
+                    progress.completed = completed
+                    progress.score = score
+                    progress.save()
+
+            else:  # 'letter' type (default)
+                # Handle regular letter challenges
+                try:
+                    challenge = Challenge.objects.get(id=challenge_id)
+                except Challenge.DoesNotExist:
+                    return Response({'error': 'Challenge not found'}, status=status.HTTP_404_NOT_FOUND)
+                item_type, item = 'letter', challenge
+
+                progress, created = UserProgress.objects.get_or_create(
+                    user=request.user,
+                    challenge=challenge,
+                    defaults={
+                        'completed': completed,
+                        'score': score,
+                        'challenge_type': 'letter'
+                    }
+                )
+
+                previous = None if created else (progress.completed, progress.score)
+                if not created:
+                    progress.completed = completed
+                    progress.score = score
+                    progress.save()
+
+                print(f"✅ Letter progress saved: {progress}")
+
+            # when should the kid see this again? (spaced repetition, scheduler.py)
+            scheduler.record_review(request.user, item_type, item.pk, score, completed)
+            # and the history: every attempt is kept (attempts.py)
+            attempts.record_attempt(request.user, item_type, item.pk, completed, score)
+            # and the item's attempts/completion rate/average score (item_stats.py)
+            item_stats.apply_delta(attempts.PROGRESS_TARGETS[item_type][1], item.pk,
+                                   item_stats.progress_delta(previous, completed, score))
+
+        return Response(saved, status=status.HTTP_200_OK)
 
     except Exception as e:
         print(f"❌ Progress update error: {type(e).__name__}: {e}")
@@ -341,18 +426,263 @@ class UserProgressCreateOrUpdate(APIView):
         return Response(serializer.data, status=status_code)
 
 
-class YesNoQuestionList(generics.ListAPIView):
+class YesNoQuestionList(FastListMixin, generics.ListAPIView):
     queryset = YesNoQuestion.objects.all()
     serializer_class = YesNoQuestionSerializer
     permission_classes = [permissions.IsAuthenticated]  # Not public read
 
 
-class FunctionalPhraseList(generics.ListAPIView):
+class FunctionalPhraseList(FastListMixin, generics.ListAPIView):
     queryset = FunctionalPhrase.objects.all()
     serializer_class = FunctionalPhraseSerializer
     permission_classes = [permissions.IsAuthenticated]
 
 
+LESSON_PARTS = ('progress', 'comments', 'explanation')
+LESSON_COMMENTS = 10   # first page; the rest via /challenges/<id>/comments/
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def lesson(request, challenge_id):
+    """Everything the challenge screen shows, in one request:
+
+        GET /lesson/12/                              → all of it
+        GET /lesson/12/?include=progress,comments    → only what's asked for
+
+    challenge    same JSON as /challenges/12/ (pre-rendered, fragments.py)
+    progress     the caller's progress on it, like /progress/ (null if none
+                 or not logged in)
+    comments     {"count", "results": newest LESSON_COMMENTS}
+    explanation  the AI helper's explanation of the word, if someone already
+                 asked for it (null otherwise - Groq is never called here)
+
+    At most 4 queries (token, challenge, progress, comments with their
+    count) instead of 4 round trips.
+    """
+    include = request.query_params.get('include')
+    parts = set(LESSON_PARTS) if include is None else {p for p in include.split(',') if p}
+    unknown = parts - set(LESSON_PARTS)
+    if unknown:
+        raise ValidationError({'include': f"Unknown part(s): {', '.join(sorted(unknown))}. "
+                                          f"Choose from {', '.join(LESSON_PARTS)}."})
+
+    rows = fragments.fragment_rows(Challenge.objects.filter(pk=challenge_id))
+    if not rows:
+        raise NotFound('No Challenge matches the given query.')
+    data = {'challenge': json.loads(rows[0][1])}
+
+    if 'progress' in parts:
+        data['progress'] = None
+        if request.user.is_authenticated:
+            row = (UserProgress.objects.filter(user=request.user, challenge_id=challenge_id)
+                   .values_list('challenge_type', 'completed', 'score').first())
+            if row:
+                data['progress'] = {'challenge': challenge_id, 'type': row[0],
+                                    'completed': row[1], 'score': row[2]}
+
+    if 'comments' in parts:
+        # COUNT(*) OVER () - the total rides along with the page, no 2nd query
+        page = list(Comment.objects.filter(challenge_id=challenge_id)
+                    .select_related('user')
+                    .annotate(total=Window(Count('id')))
+                    .order_by('-created_at', '-id')[:LESSON_COMMENTS])
+        data['comments'] = {'count': page[0].total if page else 0,
+                            'results': CommentSerializer(page, many=True).data}
+
+    if 'explanation' in parts:
+        data['explanation'] = cached_explanation(data['challenge']['word']['word'])
+
+    return Response(data)
+
+
+# /unseen/<kind>/ → (model, its UserProgress field, serializer)
+UNSEEN_KINDS = {
+    'challenges': (Challenge, 'challenge', ChallengeSerializer),
+    'yes-no-questions': (YesNoQuestion, 'yes_no_question', YesNoQuestionSerializer),
+    'functional-phrases': (FunctionalPhrase, 'functional_phrase', FunctionalPhraseSerializer),
+}
+
+
+def int_param(request, name, default=None):
+    value = request.query_params.get(name)
+    if value in (None, ''):
+        return default
+    try:
+        return int(value)
+    except ValueError:
+        raise ValidationError({name: 'A whole number is required.'})
+
+
+class UnseenItems(APIView):
+    """The next items the kid hasn't completed yet, lowest id first:
+
+        GET /unseen/challenges/?letter=3&difficulty=easy&n=20
+        GET /unseen/challenges/?letter=3&after=<next_after of the last page>
+        GET /unseen/yes-no-questions/      GET /unseen/functional-phrases/
+
+    Instead of the app downloading a whole list AND all its progress to
+    filter them, the database does it: NOT EXISTS (a completed progress row)
+    is checked with the (user, item) unique index for each candidate, and
+    `after` continues from the last id (keyset paging, no OFFSET). A page
+    costs about n index lookups, however big the catalog or the history.
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, kind):
+        if kind not in UNSEEN_KINDS:
+            raise NotFound(f"Unknown item kind '{kind}'.")
+        model, field, serializer_class = UNSEEN_KINDS[kind]
+        n = min(max(int_param(request, 'n', 20), 1), 50)
+
+        completed = UserProgress.objects.filter(
+            user=request.user, completed=True, **{field: OuterRef('pk')})
+        queryset = model.objects.filter(~Exists(completed),
+                                        pk__gt=int_param(request, 'after', 0))
+        if model is Challenge:
+            letter_id = int_param(request, 'letter')
+            if letter_id is not None:
+                queryset = queryset.filter(word__letter_id=letter_id)
+            difficulty = request.query_params.get('difficulty')
+            if difficulty in ['easy', 'medium', 'hard']:
+                queryset = queryset.filter(difficulty=difficulty)
+        queryset = queryset.order_by('pk')[:n]
+
+        if model is Challenge and request.accepted_renderer.format == 'json':
+            # pre-rendered challenge JSON (fragments.py), glued into the page
+            rows = fragments.fragment_rows(queryset)
+            next_after = rows[-1][0] if len(rows) == n else None
+            return fragments.json_response(
+                '{"results":[' + ','.join(fragment for _, fragment in rows) + '],'
+                '"next_after":' + json.dumps(next_after) + '}')
+        if model is Challenge:
+            results = serializer_class(queryset.select_related('word__letter'), many=True).data
+        else:
+            results = row_encoder(serializer_class).rows(queryset)
+        next_after = results[-1]['id'] if len(results) == n else None
+        return Response({'results': results, 'next_after': next_after})
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def practice_next(request):
+    """What should the kid practise now? /practice/next/?n=10
+
+    Their most overdue items of every type, oldest first (see scheduler.py).
+    Empty = nothing due: new content, or come back later.
+    """
+    n = min(max(int_param(request, 'n', 10), 1), 50)
+    return Response(scheduler.due_items(request.user, limit=n))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def progress_attempts(request):
+    """The kid's attempt history, newest first (attempts.py):
+
+        GET /progress/attempts/?n=50
+        GET /progress/attempts/?type=letter&item=12      → one item's tries
+        GET /progress/attempts/?before=<next_before of the last page>
+
+    /progress/ only has the latest result per item; this has every try.
+    Keyset pages on the (user, id) / (user, item, id) indexes.
+    """
+    n = min(max(int_param(request, 'n', 50), 1), 200)
+    queryset = ProgressAttempt.objects.filter(user=request.user)
+    item_id = int_param(request, 'item')
+    if item_id is not None:
+        queryset = queryset.filter(item_type=request.query_params.get('type', 'letter'),
+                                   item_id=item_id)
+    before = int_param(request, 'before')
+    if before is not None:
+        queryset = queryset.filter(id__lt=before)
+    rows = list(queryset.order_by('-id').values_list(
+        'id', 'item_type', 'item_id', 'completed', 'score', 'created_at')[:n])
+    return Response({
+        'results': [{'id': pk, 'type': item_type, 'item': item, 'completed': completed,
+                     'score': score, 'created_at': created_at}
+                    for pk, item_type, item, completed, score, created_at in rows],
+        'next_before': rows[-1][0] if len(rows) == n else None,
+    })
+
+
+# /stats/<kind>/ → (model, what to show as its label)
+STATS_LABELS = {Challenge: 'word__word', YesNoQuestion: 'question', FunctionalPhrase: 'phrase'}
+STATS_ORDERINGS = {'attempts': 'stats_attempts', 'learners': 'stats_learners',
+                   'completion_rate': 'completion_rate', 'average_score': 'average_score'}
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def item_stats_list(request, kind):
+    """How each item is doing, for the team (item_stats.py):
+
+        GET /stats/challenges/?letter=3&difficulty=hard&ordering=completion_rate
+        GET /stats/yes-no-questions/?ordering=-average_score&n=100&offset=100
+        GET /stats/functional-phrases/
+
+    ordering: attempts, learners, completion_rate or average_score, '-' for
+    descending (default -attempts). Items nobody tried yet come last.
+    The numbers are stored, so a page is one query whatever the history's size.
+    """
+    if kind not in UNSEEN_KINDS:
+        raise NotFound(f"Unknown item kind '{kind}'.")
+    model = UNSEEN_KINDS[kind][0]
+    n = min(max(int_param(request, 'n', 50), 1), 500)
+    offset = max(int_param(request, 'offset', 0), 0)
+    ordering = request.query_params.get('ordering', '-attempts')
+    if ordering.lstrip('-') not in STATS_ORDERINGS:
+        raise ValidationError({'ordering': f"One of {', '.join(STATS_ORDERINGS)}, "
+                                           f"optionally with a leading '-'."})
+    order = F(STATS_ORDERINGS[ordering.lstrip('-')])
+    order = (order.desc(nulls_last=True) if ordering.startswith('-')
+             else order.asc(nulls_last=True))
+
+    queryset = item_stats.annotate(model.objects.all())
+    if model is Challenge:
+        letter_id = int_param(request, 'letter')
+        if letter_id is not None:
+            queryset = queryset.filter(word__letter_id=letter_id)
+        difficulty = request.query_params.get('difficulty')
+        if difficulty in ['easy', 'medium', 'hard']:
+            queryset = queryset.filter(difficulty=difficulty)
+    rows = queryset.order_by(order, 'pk').values_list(
+        'pk', STATS_LABELS[model], 'stats_attempts', 'stats_learners', 'stats_completed',
+        'completion_rate', 'average_score')[offset:offset + n]
+    return Response({'results': [
+        {'id': pk, 'label': label, 'attempts': attempts, 'learners': learners,
+         'completed': completed,
+         'completion_rate': None if rate is None else round(rate, 3),
+         'average_score': None if average is None else round(average, 1)}
+        for pk, label, attempts, learners, completed, rate, average in rows]})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.AllowAny])
+def search_content(request):
+    """Type-ahead search: /search/?q=app&type=word,challenge&limit=10
+
+    Answered from the in-memory index (search.py) - no database queries
+    apart from the token lookup - or, with SEARCH_BACKEND=database, by
+    db_search.py (one query per type, finds misspellings). Yes/no questions
+    and phrases are only searched for logged-in users, like their list
+    endpoints.
+    """
+    query = request.query_params.get('q', '')
+    limit = min(max(int_param(request, 'limit', 20), 1), 50)
+    kinds = search.KINDS if request.user.is_authenticated else search.PUBLIC_KINDS
+    wanted = request.query_params.get('type')
+    if wanted:
+        kinds = tuple(kind for kind in kinds if kind in wanted.split(','))
+    if not kinds:
+        results = []
+    elif settings.SEARCH_BACKEND == 'database':
+        results = db_search.search(query, limit=limit, kinds=kinds)
+    else:
+        results = search.get_index().search(query, limit=limit, kinds=kinds)
+    return Response({'query': query, 'results': results})
+
+
 # The flow when someone sends POST → /comments/
 
 # ListCreateAPIView.post() is called (you didn't write it — it's inherited)
@@ -0,0 +1,34 @@
+# gunicorn.conf.py - picked up automatically by `gunicorn speechfun_backend.wsgi`
+# Only hooks live here; workers/bind stay on the start command.
+import os
+import shutil
+
+
+def on_starting(server):
+    # Prometheus multiprocess mode: start each deploy with an empty metrics
+    # directory, otherwise numbers from the previous run get added in.
+    path = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def post_worker_init(worker):
+    # Build the in-memory search index now rather than on the first search.
+    # (Not fatal: without a database the worker starts and builds it later.)
+    try:
+        from challenges.search import get_index
+        get_index()
+    except Exception as e:
+        print(f"❌ Search index not built at start-up: {type(e).__name__}: {e}")
+    finally:
+        from django.db import connections
+        connections.close_all()
+
+
+def child_exit(server, worker):
+    # Drop the live gauges of a worker that died/was recycled
+    # (its counters and histograms are kept, as they should be).
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(worker.pid)
@@ -5,6 +5,13 @@ It exposes the ASGI callable as a module-level variable named ``application``.
 
 For more information on this file, see
 https://docs.djangoproject.com/en/6.0/howto/deployment/asgi/
+
+Run with uvicorn workers (the async views live under /api/async/):
+    uvicorn speechfun_backend.asgi:application --workers 4 --port 8000
+
+With psycopg 3 installed (pip install "psycopg[binary,pool]"), add a
+connection pool per worker (see DB_POOL_SIZE in settings.py):
+    DB_POOL_SIZE=8 uvicorn speechfun_backend.asgi:application --workers 4 --port 8000
 """
 
 import os
@@ -12,5 +19,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'speechfun_backend.settings')
+# tells settings.py we're under ASGI (no persistent DB connections there)
+os.environ.setdefault('SPEECHFUN_ASGI', '1')
 
 application = get_asgi_application()
@@ -0,0 +1,167 @@
+# speechfun_backend/batch.py
+# /api/batch/ - several GETs in one HTTP call.
+#
+# On a slow mobile connection the round trip costs more than the request
+# itself: opening a letter screen used to be 4-5 sequential calls. Now the
+# app can send them together:
+#
+#   POST /api/batch/
+#   {"requests": ["/api/challenges/letters/3/challenges/?difficulty=easy",
+#                 "/api/challenges/letters/3/words/sprite/",
+#                 "/api/users/profile/?fields=bio"],
+#    "parallel": true}
+#
+#   → {"responses": [{"url": "...", "status": 200, "body": [...]}, ...]}
+#
+# in the same order. Each URL is resolved and run in-process by its normal
+# view (permissions, ?fields=, query budgets... all as usual) - no extra
+# HTTP, and the caller is authenticated ONCE for the whole batch (the token
+# lookup isn't repeated for every sub-request).
+#
+# Limits (settings.py):
+#   BATCH_MAX_REQUESTS      more URLs than this → 400 for the whole batch
+#   BATCH_TIMEOUT_SECONDS   sub-requests not done by then → 504 each
+#   BATCH_MAX_WORKERS       threads for "parallel": true - ONE pool per
+#                           process, shared by all batches, so slow batches
+#                           can't pile up threads (each holds a DB connection)
+#
+# A sub-request that misses the deadline still runs to completion in its
+# thread (Python can't stop it); its answer is thrown away. The ones that
+# hadn't started yet are cancelled.
+#
+# Only GETs under /api/challenges/ and /api/users/; anything else gets a 400
+# in its own slot, the rest of the batch still runs.
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from contextvars import copy_context
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+from django.http import HttpRequest, HttpResponse, QueryDict
+from django.urls import Resolver404, resolve
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.exceptions import ValidationError
+
+BATCH_PREFIXES = ('/api/challenges/', '/api/users/')
+# not copied to the sub-requests: they have no body, and are authenticated
+# as the batch's caller already
+DROPPED_HEADERS = ('CONTENT_LENGTH', 'CONTENT_TYPE', 'HTTP_AUTHORIZATION', 'HTTP_COOKIE')
+
+
+def sub_request(request, path, query):
+    """A GET for `path` as the same (already authenticated) caller."""
+    outer = request._request
+    sub = HttpRequest()
+    sub.method = 'GET'
+    sub.path = sub.path_info = path
+    sub.META = {key: value for key, value in outer.META.items()
+                if key not in DROPPED_HEADERS and not key.startswith('wsgi.')}
+    sub.META.update(REQUEST_METHOD='GET', PATH_INFO=path, QUERY_STRING=query,
+                    HTTP_ACCEPT='application/json')
+    sub.GET = QueryDict(query)
+    sub.user = request.user
+    if request.user.is_authenticated:
+        # DRF skips its authentication classes for a request carrying these
+        # (anonymous callers go through them - with no credentials left, so
+        # a login-only view answers 401 like it would on its own)
+        sub._force_auth_user = request.user
+        sub._force_auth_token = request.auth
+    return sub
+
+
+def run_one(request, url):
+    """(status, JSON bytes) of one sub-request."""
+    parts = urlsplit(url) if isinstance(url, str) else None
+    if parts is None or parts.scheme or parts.netloc or not parts.path.startswith(BATCH_PREFIXES):
+        return 400, json.dumps({'error': f"Only GET URLs under {' or '.join(BATCH_PREFIXES)} "
+                                         f"can be batched."}).encode()
+    try:
+        match = resolve(parts.path)
+    except Resolver404:
+        return 404, b'{"detail":"Not found."}'
+    sub = sub_request(request, parts.path, parts.query)
+    sub.resolver_match = match
+    try:
+        response = match.func(sub, *match.args, **match.kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+    except Exception as e:
+        print(f"❌ Batch sub-request {url} failed: {type(e).__name__}: {e}")
+        return 500, b'{"error":"Internal server error"}'
+    if response.get('Content-Type', '').startswith('application/json'):
+        return response.status_code, response.content   # already JSON, used as is
+    return response.status_code, json.dumps(response.content.decode('utf-8', 'replace')).encode()
+
+
+def run_in_thread(request, url):
+    try:
+        return run_one(request, url)
+    finally:
+        connections.close_all()   # this thread's own connections
+
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def executor():
+    """The process's pool for parallel sub-requests (created on first use)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=settings.BATCH_MAX_WORKERS,
+                                           thread_name_prefix='batch')
+        return _executor
+
+
+def reset_executor():
+    """Forget the pool; the next parallel batch makes a new one (tests)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def run_batch(request, urls, parallel):
+    """[(status, body)] in the order of `urls`, within BATCH_TIMEOUT_SECONDS."""
+    deadline = time.monotonic() + settings.BATCH_TIMEOUT_SECONDS
+    timed_out = (504, b'{"error":"Batch time limit reached"}')
+    if not parallel or len(urls) < 2:
+        results = []
+        for url in urls:
+            results.append(run_one(request, url) if time.monotonic() < deadline else timed_out)
+        return results
+
+    pool = executor()
+    # copy_context(): the sub-requests see the same current request as
+    # this thread (the replica router reads it to stick to the primary)
+    futures = [pool.submit(copy_context().run, run_in_thread, request, url)
+               for url in urls]
+    wait(futures, timeout=max(0, deadline - time.monotonic()))
+    for future in futures:
+        future.cancel()   # still queued → never runs; running → can't be stopped
+    return [f.result() if f.done() and not f.cancelled() else timed_out for f in futures]
+
+
+@api_view(['POST'])
+@permission_classes([permissions.AllowAny])   # each sub-request checks its own
+def batch(request):
+    urls = request.data.get('requests') if isinstance(request.data, dict) else None
+    if not isinstance(urls, list) or not urls:
+        raise ValidationError({'requests': 'A list of URLs is required.'})
+    if len(urls) > settings.BATCH_MAX_REQUESTS:
+        raise ValidationError({'requests': f"At most {settings.BATCH_MAX_REQUESTS} "
+                                           f"URLs per batch."})
+
+    results = run_batch(request, urls, bool(request.data.get('parallel')))
+    # the bodies are JSON already - glue them in instead of parsing and
+    # encoding them again (like challenges/fragments.py)
+    items = [b'{"url":%s,"status":%d,"body":%s}' % (json.dumps(url).encode(), status, body)
+             for url, (status, body) in zip(urls, results)]
+    return HttpResponse(b'{"responses":[' + b','.join(items) + b']}',
+                        content_type='application/json')
@@ -0,0 +1,198 @@
+# speechfun_backend/db_router.py
+# Send catalog reads to read replicas, everything else to the primary.
+#
+# Replicas are configured with DATABASE_REPLICA_URLS (settings.py). Without
+# any, this router does nothing and every query goes to "default".
+#
+# Rules for a read (writes ALWAYS go to the primary):
+#   1. only models of the `challenges` app may use a replica - users, tokens
+#      and sessions are read right after they're written (register → verify
+#      → login) and stay on the primary
+#   2. outside a web request (management commands, shell) → primary
+#   3. admin requests, and any request that has already written something
+#      → primary for the rest of that request
+#   4. UserProgress / Comment / ReviewState of a user who wrote one of
+#      them in the last REPLICA_STICKY_SECONDS → primary ("read your own
+#      writes": the kid finishes a challenge and immediately sees it ticked,
+#      even if the replica is a second behind). The marker lives in the cache, so it
+#      works across gunicorn workers when CACHES is shared (Redis etc).
+#   5. inside transaction.atomic() → primary
+#   6. otherwise a random replica whose lag is under REPLICA_MAX_LAG_SECONDS;
+#      if none is healthy, the primary.
+import random
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models.signals import post_delete, post_save
+
+from .metrics import DB_REPLICA_FALLBACKS, DB_REPLICA_LAG
+
+STICKY_MODELS = {'challenges.userprogress', 'challenges.comment', 'challenges.reviewstate',
+                 'challenges.progressattempt'}
+
+# The request being handled by this thread / asyncio task (set by the middleware)
+_current_request = ContextVar('speechfun_current_request', default=None)
+
+_lag_lock = threading.Lock()
+_lag_checked = {}   # alias -> (monotonic time of check, lag in seconds or None)
+
+LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        -- nothing left to replay: caught up, however old the last write is
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END
+"""
+
+
+def sticky_key(user_id):
+    return f'db-sticky:{user_id}'
+
+
+def mark_sticky(user_id):
+    """Read this user's progress/comments from the primary for a while."""
+    cache.set(sticky_key(user_id), True, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_sticky(user_id):
+    return bool(user_id) and cache.get(sticky_key(user_id), False)
+
+
+def replica_lag(alias):
+    """Seconds the replica is behind the primary, or None if unreachable."""
+    try:
+        conn = connections[alias]
+        if conn.vendor != 'postgresql':
+            return 0.0   # e.g. a SQLite copy in local tests: no replication
+        with conn.cursor() as cursor:
+            cursor.execute(LAG_SQL)
+            lag = cursor.fetchone()[0]
+        return float(lag or 0)
+    except Exception as e:
+        print(f"❌ Replica {alias} unreachable: {type(e).__name__}: {e}")
+        return None
+
+
+def replica_is_healthy(alias):
+    """Lag check, cached per process for REPLICA_LAG_CHECK_INTERVAL seconds
+    so we don't ask the replica before every single query."""
+    now = time.monotonic()
+    with _lag_lock:
+        checked = _lag_checked.get(alias)
+    if checked is None or now - checked[0] >= settings.REPLICA_LAG_CHECK_INTERVAL:
+        lag = replica_lag(alias)
+        with _lag_lock:
+            _lag_checked[alias] = (now, lag)
+        if lag is not None:
+            DB_REPLICA_LAG.labels(alias).set(lag)
+    else:
+        lag = checked[1]
+
+    if lag is None:
+        DB_REPLICA_FALLBACKS.labels(alias, 'unreachable').inc()
+        return False
+    if lag > settings.REPLICA_MAX_LAG_SECONDS:
+        DB_REPLICA_FALLBACKS.labels(alias, 'lagging').inc()
+        return False
+    return True
+
+
+def forget_replica_health():
+    """Re-check every replica on next use (tests)."""
+    with _lag_lock:
+        _lag_checked.clear()
+
+
+class ReplicaRouter:
+    """See the rules at the top of this file."""
+
+    def db_for_read(self, model, **hints):
+        replicas = settings.REPLICA_DATABASES
+        if not replicas:
+            return None
+
+        instance = hints.get('instance')
+        if instance is not None and instance._state.db:
+            return instance._state.db   # follow relations on the same database
+
+        if model._meta.app_label != 'challenges':
+            return DEFAULT_DB_ALIAS
+
+        request = _current_request.get()
+        if request is None or getattr(request, '_db_use_primary', False):
+            return DEFAULT_DB_ALIAS
+
+        if model._meta.label_lower in STICKY_MODELS:
+            user = getattr(request, 'user', None)
+            if user is not None and is_sticky(user.pk):
+                return DEFAULT_DB_ALIAS
+
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+
+        healthy = [alias for alias in replicas if replica_is_healthy(alias)]
+        return random.choice(healthy) if healthy else DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # replicas hold the same rows as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # replicas get their schema through replication
+        return db == DEFAULT_DB_ALIAS
+
+
+def _after_write(sender, instance, **kwargs):
+    request = _current_request.get()
+    if request is not None:
+        request._db_use_primary = True
+    user_id = getattr(instance, 'user_id', None)
+    if sender._meta.label_lower in STICKY_MODELS and user_id:
+        mark_sticky(user_id)
+
+
+class ReplicaRoutingMiddleware:
+    """Makes the current request visible to ReplicaRouter."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        post_save.connect(_after_write, dispatch_uid='speechfun_replica_after_save')
+        post_delete.connect(_after_write, dispatch_uid='speechfun_replica_after_delete')
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        token = self.start(request)
+        try:
+            return self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+    async def __acall__(self, request):
+        # the async ORM copies this context into its worker thread,
+        # so the router sees the request there too
+        token = self.start(request)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current_request.reset(token)
+
+    @staticmethod
+    def start(request):
+        if request.path_info.startswith('/admin/'):
+            request._db_use_primary = True   # staff edit and re-read content
+        return _current_request.set(request)
@@ -0,0 +1,63 @@
+# speechfun_backend/large_admin.py
+# Admin changelists for tables with millions of rows (UserProgress, the
+# attempt log, comments, review states).
+#
+# The stock changelist runs an exact COUNT(*) of the filtered rows AND of
+# the whole table on every page - a full scan each time on Postgres. With
+# LargeTableAdmin:
+#
+#   no filter       → the row count Postgres keeps for the planner (pg_class,
+#                     updated by ANALYZE/autovacuum): no scan, a bit off
+#   filtered        → counted up to ADMIN_EXACT_COUNT_LIMIT rows, then it
+#                     stops - "10,001 results" means "at least that many"
+#   the "(N total)" next to the result count is not shown (no 2nd COUNT)
+#
+# The rest is up to each ModelAdmin - see challenges/admin.py:
+#   list_select_related   every FK shown in the list, or it's one query per row
+#   autocomplete_fields   instead of a <select> with every user/challenge in it
+#   list_filter           only fields on the row itself with a handful of
+#                         values (no FK sidebars listing a whole table)
+#   no date_hierarchy     it runs SELECT DISTINCT over the dates of all rows
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimated_rows(queryset):
+    """Postgres' own estimate of the table's rows (partitions added up),
+    or None - other databases, or never analyzed."""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return None
+    table = queryset.model._meta.db_table
+    with connection.cursor() as cursor:
+        # reltuples is -1 for a table never analyzed
+        cursor.execute("""
+            SELECT SUM(c.reltuples) FROM pg_class c
+            WHERE c.relkind <> 'p' AND c.reltuples >= 0
+              AND (c.oid = %s::regclass
+                   OR c.oid IN (SELECT inhrelid FROM pg_inherits
+                                WHERE inhparent = %s::regclass))""", [table, table])
+        estimate = cursor.fetchone()[0]
+    return None if estimate is None else int(estimate)
+
+
+class EstimatedCountPaginator(Paginator):
+
+    @cached_property
+    def count(self):
+        limit = settings.ADMIN_EXACT_COUNT_LIMIT
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimated_rows(queryset)
+            if estimate is not None and estimate > limit:
+                return estimate
+        # SELECT COUNT(*) FROM (SELECT id ... LIMIT n): stops after n rows
+        return queryset.order_by().values('pk')[:limit + 1].count()
+
+
+class LargeTableAdmin:
+    """Mix into a ModelAdmin (before admin.ModelAdmin)."""
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,142 @@
+# speechfun_backend/metrics.py
+# Prometheus metrics for the whole project.
+#
+# Gunicorn runs several worker processes; each one only sees its own
+# requests. When PROMETHEUS_MULTIPROC_DIR is set, prometheus_client writes
+# every worker's numbers to files in that directory and /metrics/ adds
+# them all up (see metrics_view below and gunicorn.conf.py).
+import os
+import time
+from contextlib import contextmanager
+
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry,
+                               Counter, Gauge, Histogram, generate_latest,
+                               multiprocess)
+
+REQUEST_LATENCY = Histogram(
+    'speechfun_request_duration_seconds',
+    'Time spent handling a request, by URL name and status',
+    ['view', 'method', 'status'],
+)
+DB_QUERIES = Histogram(
+    'speechfun_db_queries_per_request',
+    'Number of SQL queries run by one request',
+    ['view'],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89, 144, float('inf')),
+)
+DB_TIME = Histogram(
+    'speechfun_db_seconds_per_request',
+    'Total time one request spent waiting on SQL',
+    ['view'],
+)
+DB_CONNECTIONS_OPENED = Counter(
+    'speechfun_db_connections_opened_total',
+    'New database connections - stays flat with persistent connections or a pool',
+    ['alias'],
+)
+# Only when the psycopg pool is on (DB_POOL_SIZE in settings.py)
+DB_POOL_CONNECTIONS = Gauge(
+    'speechfun_db_pool_connections',
+    'Pool connections: open = in_use + idle, max = size + overflow',
+    ['alias', 'state'],
+    multiprocess_mode='livesum',
+)
+DB_POOL_REQUESTS = Counter(
+    'speechfun_db_pool_requests_total',
+    'Connections asked from the pool, by result (error = timed out waiting)',
+    ['alias', 'result'],
+)
+DB_POOL_WAIT = Counter(
+    'speechfun_db_pool_wait_seconds_total',
+    'Total time requests spent waiting for a free pool connection',
+    ['alias'],
+)
+DB_REPLICA_LAG = Gauge(
+    'speechfun_db_replica_lag_seconds',
+    'How far each read replica is behind the primary (last check)',
+    ['alias'],
+    multiprocess_mode='livemax',
+)
+DB_REPLICA_FALLBACKS = Counter(
+    'speechfun_db_replica_fallbacks_total',
+    'Reads sent to the primary because a replica was lagging or unreachable',
+    ['alias', 'reason'],
+)
+EXTERNAL_LATENCY = Histogram(
+    'speechfun_external_call_duration_seconds',
+    'Latency of calls to outside services (groq, sendgrid, cloudinary)',
+    ['service', 'outcome'],
+)
+CACHE_REQUESTS = Counter(
+    'speechfun_cache_requests_total',
+    'Cache lookups by result - hit ratio = hit / (hit + miss)',
+    ['cache', 'result'],
+)
+
+# Circuit breakers / bulkheads (speechfun_backend/outbound.py). Every worker
+# has its own breakers: "livemax" shows the worst state among live workers.
+OUTBOUND_BREAKER_STATE = Gauge(
+    'speechfun_outbound_breaker_state',
+    'Circuit breaker state per service: 0 closed, 1 half-open, 2 open',
+    ['service'],
+    multiprocess_mode='livemax',
+)
+OUTBOUND_IN_FLIGHT = Gauge(
+    'speechfun_outbound_in_flight',
+    'Calls to an outside service currently running',
+    ['service'],
+    multiprocess_mode='livesum',
+)
+OUTBOUND_REJECTED = Counter(
+    'speechfun_outbound_rejected_total',
+    'Calls refused without touching the network (breaker open / bulkhead full)',
+    ['service', 'reason'],
+)
+
+
+@contextmanager
+def observe_external(service):
+    """Time a call to an outside service:
+
+        with observe_external('groq'):
+            client.chat.completions.create(...)
+    """
+    started = time.perf_counter()
+    outcome = 'error'
+    try:
+        yield
+        outcome = 'ok'
+    finally:
+        EXTERNAL_LATENCY.labels(service, outcome).observe(
+            time.perf_counter() - started)
+
+
+def record_cache(cache, hit):
+    CACHE_REQUESTS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def record_pool_stats(alias, pool):
+    """Copy a psycopg_pool's counters into Prometheus (called after each request)."""
+    stats = pool.pop_stats()   # counters reset, so we only add what's new
+    size, idle = stats.get('pool_size', 0), stats.get('pool_available', 0)
+    DB_POOL_CONNECTIONS.labels(alias, 'open').set(size)
+    DB_POOL_CONNECTIONS.labels(alias, 'idle').set(idle)
+    DB_POOL_CONNECTIONS.labels(alias, 'in_use').set(size - idle)
+    DB_POOL_CONNECTIONS.labels(alias, 'max').set(stats.get('pool_max', 0))
+    errors = stats.get('requests_errors', 0)
+    DB_POOL_REQUESTS.labels(alias, 'ok').inc(stats.get('requests_num', 0) - errors)
+    DB_POOL_REQUESTS.labels(alias, 'error').inc(errors)
+    DB_POOL_WAIT.labels(alias).inc(stats.get('requests_wait_ms', 0) / 1000)
+    DB_CONNECTIONS_OPENED.labels(alias).inc(stats.get('connections_num', 0))
+
+
+def render_latest():
+    """Return (body, content_type) for the /metrics/ endpoint."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        # Fresh registry each time: MultiProcessCollector reads the files
+        # of every worker (alive or dead) and merges them.
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -0,0 +1,161 @@
+# speechfun_backend/middleware.py
+import os
+import re
+import time
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from .metrics import (DB_CONNECTIONS_OPENED, DB_QUERIES, DB_TIME,
+                      REQUEST_LATENCY, record_pool_stats)
+
+# letter-<id>.<16 hex chars of sha256>.json - see challenges/bundles.py
+BUNDLE_NAME = re.compile(r'^letter-\d+\.[0-9a-f]{16}\.json$')
+
+
+class SpeechFunWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """WhiteNoise + offline bundles.
+
+    Two additions to the stock middleware:
+    - bundle files are content-hashed, so they get the same "cache forever"
+      headers as collectstatic's hashed files
+    - WhiteNoise only indexes STATIC_ROOT when the worker starts; bundles
+      rebuilt after that (admin edits) are added to its index on first
+      request instead of 404ing until the next restart
+    """
+
+    # async-capable, so under ASGI an API request doesn't hop to a thread
+    # just to find out it isn't a static file
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, settings=settings):
+        super().__init__(get_response, settings)
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        path = request.path_info
+        if (not self.autorefresh and path not in self.files
+                and path.startswith(settings.OFFLINE_BUNDLE_URL)):
+            name = path[len(settings.OFFLINE_BUNDLE_URL):]
+            file_path = os.path.join(settings.OFFLINE_BUNDLE_ROOT, name)
+            # the name check also rules out ../ tricks
+            if BUNDLE_NAME.match(name) and os.path.isfile(file_path):
+                self.add_file_to_dictionary(path, file_path)
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        # WhiteNoiseMiddleware.__call__, with the file opened in a thread
+        if self.autorefresh:
+            static_file = self.find_file(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(
+                static_file, request)
+        return await self.get_response(request)
+
+    def immutable_file_test(self, path, url):
+        if url.startswith(settings.OFFLINE_BUNDLE_URL):
+            return bool(BUNDLE_NAME.match(url[len(settings.OFFLINE_BUNDLE_URL):]))
+        return super().immutable_file_test(path, url)
+
+
+def count_new_connection(sender, connection, **kwargs):
+    # with a pool this fires on every checkout - record_pool_stats() counts
+    # the pool's real new connections instead
+    if getattr(connection, 'pool', None) is None:
+        DB_CONNECTIONS_OPENED.labels(connection.alias).inc()
+
+
+class MetricsMiddleware:
+    """Record latency + SQL query count/time for every request.
+
+    Goes first in MIDDLEWARE so the timing covers the whole stack.
+    Requests are labelled by URL *name* (e.g. 'challenges-by-letter'),
+    never the raw path, so /letters/1/ and /letters/2/ share one series.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        connection_created.connect(count_new_connection,
+                                   dispatch_uid='speechfun_count_new_connection')
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        started = time.perf_counter()
+        stack, stats = self.count_queries()
+        try:
+            response = self.get_response(request)
+        finally:
+            self.stop_counting(stack)
+        self.observe(request, response, time.perf_counter() - started, stats)
+        return response
+
+    async def __acall__(self, request):
+        # Under ASGI the ORM runs in a worker thread (one per request) with
+        # its own connection objects - the query counter goes on those.
+        started = time.perf_counter()
+        stack, stats = await sync_to_async(self.count_queries)()
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(self.stop_counting)(stack)
+        self.observe(request, response, time.perf_counter() - started, stats)
+        return response
+
+    @staticmethod
+    def count_queries():
+        """Count queries on this thread's connections until the stack is closed."""
+        stats = {'queries': 0, 'seconds': 0.0}
+
+        def count_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats['queries'] += 1
+                stats['seconds'] += time.perf_counter() - started
+
+        stack = ExitStack()
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(count_query))
+        return stack, stats
+
+    @staticmethod
+    def stop_counting(stack):
+        stack.close()
+        for conn in connections.all(initialized_only=True):
+            pool = getattr(conn, 'pool', None)   # postgres + DB_POOL_SIZE only
+            if pool is not None:
+                record_pool_stats(conn.alias, pool)
+
+    def observe(self, request, response, elapsed, stats):
+        view = self.view_label(request)
+        REQUEST_LATENCY.labels(view, request.method, response.status_code).observe(elapsed)
+        DB_QUERIES.labels(view).observe(stats['queries'])
+        DB_TIME.labels(view).observe(stats['seconds'])
+
+    @staticmethod
+    def view_label(request):
+        match = getattr(request, 'resolver_match', None)
+        if match is not None:
+            return match.view_name or match.route
+        if request.path_info.startswith(settings.STATIC_URL):
+            return 'static'  # served by WhiteNoise, never reaches a view
+        return 'unmatched'  # 404s - don't let random paths create new series
@@ -0,0 +1,200 @@
+# speechfun_backend/outbound.py
+# Every call to an outside service (Groq, SendGrid, Cloudinary) goes through
+# outbound_call(), so one slow/broken dependency can't take the whole app down.
+#
+#   with outbound_call('groq') as policy:
+#       client.chat.completions.create(..., timeout=policy.timeout)
+#
+# Three protections, configured per service in settings.OUTBOUND_SERVICES:
+#
+#   timeout         how long one call may take. Callers pass policy.timeout
+#                   to their client library - without it a hung Groq request
+#                   holds a gunicorn worker forever.
+#   bulkhead        at most `max_concurrent` calls to a service at once (per
+#                   process). Extra calls wait up to `queue_timeout` seconds,
+#                   then get OutboundUnavailable instead of piling up.
+#   circuit breaker after `failure_threshold` failures in a row the service is
+#                   "open": calls fail immediately (no network at all) for
+#                   `reset_timeout` seconds. Then ONE trial call is let through
+#                   ("half-open"); if it works the breaker closes again.
+#
+# Breaker state, in-flight calls and rejections are exported to /metrics/,
+# and /health/outbound/ shows this process's breakers as JSON.
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+from django.conf import settings
+
+from .metrics import (OUTBOUND_BREAKER_STATE, OUTBOUND_IN_FLIGHT,
+                      OUTBOUND_REJECTED, observe_external)
+
+CLOSED, HALF_OPEN, OPEN = 'closed', 'half_open', 'open'
+STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}   # for the Prometheus gauge
+
+Policy = namedtuple('Policy', ['timeout', 'retries'])
+
+
+class OutboundUnavailable(Exception):
+    """Raised instead of calling a service that is known to be unhealthy
+    (breaker open) or already saturated (bulkhead full)."""
+
+    def __init__(self, service, reason):
+        super().__init__(f"{service} unavailable: {reason}")
+        self.service = service
+        self.reason = reason
+
+
+def counts_as_failure(error):
+    """Only the dependency's problems should trip the breaker - timeouts,
+    connection errors, 5xx, rate limiting. A 400 caused by our own bad
+    request would fail the same way on a healthy service."""
+    status = getattr(error, 'status_code', None) or getattr(error, 'status', None)
+    if status is None:   # requests.HTTPError keeps it on the response
+        status = getattr(getattr(error, 'response', None), 'status_code', None)
+    if isinstance(status, int) and 400 <= status < 500:
+        return status in (408, 420, 429)
+    return True
+
+
+class ServiceGuard:
+    """Bulkhead + circuit breaker for one service."""
+
+    def __init__(self, service, timeout, max_concurrent, failure_threshold,
+                 reset_timeout, queue_timeout=0, retries=0):
+        self.service = service
+        self.policy = Policy(timeout, retries)
+        self.max_concurrent = max_concurrent
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.queue_timeout = queue_timeout
+        self.slots = threading.BoundedSemaphore(max_concurrent)
+        self.lock = threading.Lock()
+        self.state = CLOSED
+        self.failures = 0            # in a row
+        self.opened_at = None
+        self.trial_running = False
+        self.in_flight = 0
+        self.rejected = {'breaker_open': 0, 'bulkhead_full': 0}
+        OUTBOUND_BREAKER_STATE.labels(service).set(STATE_VALUES[CLOSED])
+
+    # --- breaker ------------------------------------------------------------
+
+    def _set_state(self, state):
+        self.state = state
+        OUTBOUND_BREAKER_STATE.labels(self.service).set(STATE_VALUES[state])
+        print(f"⚡ {self.service} circuit breaker → {state}")
+
+    def _reject(self, reason):
+        # call with self.lock held - request threads get here concurrently
+        self.rejected[reason] += 1
+        OUTBOUND_REJECTED.labels(self.service, reason).inc()
+        raise OutboundUnavailable(self.service, reason)
+
+    def _allow(self):
+        """Decide (under the lock) whether this call may go out."""
+        with self.lock:
+            if self.state == OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    self._reject('breaker_open')
+                self._set_state(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self.trial_running:    # only one trial call at a time
+                    self._reject('breaker_open')
+                self.trial_running = True
+                return True
+            return False
+
+    def _record(self, ok, trial):
+        with self.lock:
+            if trial:
+                self.trial_running = False
+            if ok:
+                self.failures = 0
+                if self.state != CLOSED:
+                    self._set_state(CLOSED)
+                return
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+                if self.state != OPEN:
+                    self._set_state(OPEN)
+
+    # --- the call -------------------------------------------------------------
+
+    @contextmanager
+    def call(self):
+        trial = self._allow()
+        if self.queue_timeout:
+            got_slot = self.slots.acquire(timeout=self.queue_timeout)
+        else:
+            got_slot = self.slots.acquire(blocking=False)
+        if not got_slot:
+            with self.lock:
+                if trial:
+                    self.trial_running = False
+                self._reject('bulkhead_full')
+
+        with self.lock:
+            self.in_flight += 1
+        OUTBOUND_IN_FLIGHT.labels(self.service).inc()
+        try:
+            with observe_external(self.service):
+                yield self.policy
+        except Exception as e:
+            self._record(not counts_as_failure(e), trial)
+            raise
+        else:
+            self._record(True, trial)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+            OUTBOUND_IN_FLIGHT.labels(self.service).dec()
+            self.slots.release()
+
+    def snapshot(self):
+        with self.lock:
+            retry_in = None
+            if self.state == OPEN:
+                retry_in = max(0.0, round(
+                    self.reset_timeout - (time.monotonic() - self.opened_at), 1))
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'retry_in_seconds': retry_in,
+                'in_flight': self.in_flight,
+                'max_concurrent': self.max_concurrent,
+                'timeout_seconds': self.policy.timeout,
+                'rejected': dict(self.rejected),
+            }
+
+
+_guards = {}
+_guards_lock = threading.Lock()
+
+
+def guard(service):
+    """The (per-process) ServiceGuard of a service in OUTBOUND_SERVICES."""
+    with _guards_lock:
+        if service not in _guards:
+            _guards[service] = ServiceGuard(service, **settings.OUTBOUND_SERVICES[service])
+        return _guards[service]
+
+
+def outbound_call(service):
+    """Context manager around one call to `service` - see the top of this file.
+    Yields the Policy (timeout, retries) to hand to the client library."""
+    return guard(service).call()
+
+
+def snapshot():
+    """Breaker state of every configured service, for /health/outbound/."""
+    return {service: guard(service).snapshot()
+            for service in settings.OUTBOUND_SERVICES}
+
+
+def reset_guards():
+    """Forget all breaker state (tests, or after changing the settings)."""
+    with _guards_lock:
+        _guards.clear()
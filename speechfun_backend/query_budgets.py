@@ -0,0 +1,125 @@
+# speechfun_backend/query_budgets.py
+# Performance budgets for every API endpoint (and the admin pages of the
+# big tables), in ONE table.
+#
+# challenges/tests.py and users/tests.py call every URL against a seeded,
+# realistic-sized database and fail if an endpoint runs more SQL queries
+# (or takes longer) than allowed here. Adding an N+1 to a list endpoint
+# blows the query budget immediately, whatever the data size.
+#
+# If you add a URL, add its budget here - assertAllUrlsBudgeted()
+# fails until you do. Raising a budget should be a deliberate, reviewed change.
+import tempfile
+import time
+from collections import namedtuple
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver
+
+Budget = namedtuple('Budget', ['queries', 'ms'])
+
+QUERY_BUDGETS = {
+    # url name                      max SQL queries, max wall-clock ms
+    # --- challenges/urls.py ---
+    'letter-list':                  Budget(1, 150),
+    'words-by-letter':              Budget(1, 150),
+    'word-sprite-by-letter':        Budget(1, 100),
+    'offline-bundle-index':         Budget(1, 100),
+    'challenges-by-letter':         Budget(1, 200),
+    'challenge-detail':             Budget(1, 100),
+    'comment-list-create':          Budget(1, 200),   # GET, anonymous
+    'comment-detail':               Budget(1, 100),
+    'get-user-progress':            Budget(2, 200),   # token + progress
+    'update-progress':              Budget(10, 150),  # token + item + get + update
+                                                      # + review state get + save
+                                                      # + attempt insert + stats update
+                                                      # + SAVEPOINT/RELEASE (the write's
+                                                      # transaction, inside the test's)
+    'progress-attempts':            Budget(2, 100),   # token + one page of history
+    'yes-no-questions':             Budget(2, 200),
+    'functional-phrases':           Budget(2, 200),
+    'lesson':                       Budget(4, 150),   # token + challenge + progress
+                                                      # + comments page with count
+    'unseen-items':                 Budget(2, 100),   # token + one anti-join page
+    'item-stats':                   Budget(2, 150),   # token + one page of stats
+    'practice-next':                Budget(2, 100),   # token + due items
+    'search':                       Budget(1, 50),    # token; the index is in memory
+    # --- users/urls.py ---
+    'register':                     Budget(8, 300),   # email sending is mocked
+    'login':                        Budget(2, 300),
+    'profile':                      Budget(2, 100),
+    'get-or-create-token':          Budget(2, 150),
+    'verify-email':                 Budget(4, 150),
+    'ai-help':                      Budget(0, 100),   # Groq is mocked
+    # --- admin changelists (challenges/admin.py), a page of 100 rows ---
+    # session + user + the page + the count (large_admin.py): Postgres'
+    # estimate, and a capped COUNT when the table is small or filtered
+    'admin:challenges_userprogress_changelist':     Budget(5, 400),
+    'admin:challenges_comment_changelist':          Budget(5, 400),
+    'admin:challenges_reviewstate_changelist':      Budget(5, 400),
+    'admin:challenges_progressattempt_changelist':  Budget(5, 400),
+    # + the letter filter's letters + 2 for the date_hierarchy (the catalog
+    # is small enough for it)
+    'admin:challenges_challenge_changelist':        Budget(8, 400),
+}
+
+
+def url_names(patterns):
+    """All named URLs in a urlpatterns list (recursing into include())."""
+    names = set()
+    for pattern in patterns:
+        if isinstance(pattern, URLResolver):
+            names |= url_names(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern) and pattern.name:
+            names.add(pattern.name)
+    return names
+
+
+class QueryBudgetTestCase(TestCase):
+    """TestCase with budget assertions:
+
+        response = self.assertWithinBudget('letter-list', lambda: self.client.get(url))
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        # don't write offline bundles into the real static folder
+        cls._bundle_dir = tempfile.TemporaryDirectory(prefix='speechfun-bundles-')
+        cls.addClassCleanup(cls._bundle_dir.cleanup)
+        cls._budget_settings = override_settings(
+            # hashing passwords properly takes ~0.3s per call - not what we measure
+            PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+            OFFLINE_BUNDLE_ROOT=cls._bundle_dir.name,
+        )
+        cls._budget_settings.enable()
+        cls.addClassCleanup(cls._budget_settings.disable)
+        super().setUpClass()
+
+    def assertWithinBudget(self, url_name, make_request):
+        budget = QUERY_BUDGETS[url_name]
+
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            response = make_request()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+        self.assertLess(response.status_code, 400,
+                        f"{url_name} returned {response.status_code}: "
+                        f"{getattr(response, 'content', b'')[:300]}")
+
+        if len(ctx.captured_queries) > budget.queries:
+            sql = "\n".join(f"  {i + 1}. {q['sql']}"
+                            for i, q in enumerate(ctx.captured_queries))
+            self.fail(f"{url_name} ran {len(ctx.captured_queries)} queries, "
+                      f"budget is {budget.queries}:\n{sql}")
+
+        self.assertLessEqual(
+            elapsed_ms, budget.ms,
+            f"{url_name} took {elapsed_ms:.0f}ms, budget is {budget.ms}ms")
+        return response
+
+    def assertAllUrlsBudgeted(self, urlpatterns):
+        missing = url_names(urlpatterns) - set(QUERY_BUDGETS)
+        self.assertFalse(missing, f"URLs with no entry in QUERY_BUDGETS: {sorted(missing)}")
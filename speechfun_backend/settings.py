@@ -26,11 +26,52 @@ CLOUD_NAME = os.getenv('CLOUDINARY_CLOUD_NAME')
 API_KEY = os.getenv('CLOUDINARY_API_KEY')
 API_SECRET = os.getenv('CLOUDINARY_API_SECRET')
 
+# Outside services can be swapped for local stand-ins (python manage.py
+# run_service_stubs) for benchmarks / offline work. SERVICE_STUBS_URL points
+# all three at the stubs; the per-service variables win if both are set.
+SERVICE_STUBS_URL = os.getenv('SERVICE_STUBS_URL', '')
+GROQ_BASE_URL = os.getenv('GROQ_BASE_URL', SERVICE_STUBS_URL) or None
+SENDGRID_HOST = os.getenv(
+    'SENDGRID_HOST', SERVICE_STUBS_URL or 'https://api.sendgrid.com')
+CLOUDINARY_UPLOAD_PREFIX = os.getenv(
+    'CLOUDINARY_UPLOAD_PREFIX', SERVICE_STUBS_URL) or None
+
+
+
+def outbound_policy(service, timeout, max_concurrent, queue_timeout=0,
+                    retries=0, failure_threshold=5, reset_timeout=30):
+    """Timeout / bulkhead / circuit breaker settings of one outside service
+    (see speechfun_backend/outbound.py). Each value can be overridden with
+    an env var, e.g. OUTBOUND_GROQ_TIMEOUT=5"""
+    def env(name, default, cast):
+        return cast(os.getenv(f'OUTBOUND_{service.upper()}_{name}', default))
+    return {
+        'timeout': env('TIMEOUT', timeout, float),                # seconds per call
+        'max_concurrent': env('MAX_CONCURRENT', max_concurrent, int),
+        'queue_timeout': env('QUEUE_TIMEOUT', queue_timeout, float),  # 0 = fail fast
+        'retries': env('RETRIES', retries, int),
+        'failure_threshold': env('FAILURE_THRESHOLD', failure_threshold, int),
+        'reset_timeout': env('RESET_TIMEOUT', reset_timeout, float),
+    }
+
+
+OUTBOUND_SERVICES = {
+    # user-facing: fail fast so the kid gets an answer quickly
+    'groq': outbound_policy('groq', timeout=10, max_concurrent=4, retries=1),
+    'sendgrid': outbound_policy('sendgrid', timeout=5, max_concurrent=4),
+    # admin / import_catalog / sprite builds: big files, so wait in line
+    'cloudinary': outbound_policy('cloudinary', timeout=60, max_concurrent=16,
+                                  queue_timeout=60),
+    'cloudinary_cdn': outbound_policy('cloudinary_cdn', timeout=10,
+                                      max_concurrent=16, queue_timeout=30),
+}
+
 cloudinary.config(
     cloud_name=CLOUD_NAME,
     api_key=API_KEY,
     api_secret=API_SECRET,
-    secure=True
+    secure=True,
+    upload_prefix=CLOUDINARY_UPLOAD_PREFIX,  # None = the real api.cloudinary.com
 )
 
 #     print("CLOUDINARY SUCCESS: Activated with cloud name:", CLOUD_NAME)
@@ -47,6 +88,15 @@ CLOUDINARY_STORAGE = {
     'PREFIX': 'speechfun-kids',
 }
 
+# Admin-uploaded pictures are resized to these widths (px) and re-encoded
+# in these formats before upload - see challenges/images.py
+VISUAL_VARIANT_WIDTHS = [
+    int(w) for w in os.getenv('VISUAL_VARIANT_WIDTHS', '320,640,1024').split(',')]
+VISUAL_VARIANT_FORMATS = os.getenv(
+    'VISUAL_VARIANT_FORMATS', 'webp,jpeg').split(',')
+# the variants of one picture are uploaded side by side, this many at once
+VISUAL_UPLOAD_WORKERS = int(os.getenv('VISUAL_UPLOAD_WORKERS', '4'))
+
 # print("DEBUG: DB_HOST from env =", os.getenv(
 #     'DB_HOST'))          # ← add these 4 lines
 # print("DEBUG: Loaded env file?", os.path.exists('.env'))
@@ -100,14 +150,19 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # first, so request timings cover every other middleware too
+    'speechfun_backend.middleware.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    # WhiteNoise + cache-forever headers for offline bundles
+    'speechfun_backend.middleware.SpeechFunWhiteNoiseMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'allauth.account.middleware.AccountMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # lets the DB router see who is asking (read replicas / stickiness)
+    'speechfun_backend.db_router.ReplicaRoutingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -149,12 +204,112 @@ WSGI_APPLICATION = 'speechfun_backend.wsgi.application'
 #     }
 # }
 
+# Keep each worker's connection open between requests instead of a new TLS
+# handshake to Neon every time (0 = close after each request).
+# Not under ASGI (asgi.py sets SPEECHFUN_ASGI): there the queries of each
+# request run in a new thread, so a "persistent" connection is never reused,
+# it just stays open - use DB_POOL_SIZE instead.
+DB_CONN_MAX_AGE = 0 if os.getenv('SPEECHFUN_ASGI') else int(os.getenv('DB_CONN_MAX_AGE', '600'))
+
 DATABASES = {
     "default": dj_database_url.config(
-        default=os.environ.get("DATABASE_URL")  # pull from env vars
+        default=os.environ.get("DATABASE_URL"),  # pull from env vars
+        conn_max_age=DB_CONN_MAX_AGE,
+        # ...and check a reused connection still works before the request uses it
+        conn_health_checks=os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
     )
 }
 
+# Optional in-process connection pool (psycopg 3 only: pip install
+# "psycopg[binary,pool]" - requirements.txt has psycopg2, without it the
+# setting is ignored with a warning). DB_POOL_SIZE connections are kept open,
+# up to DB_POOL_OVERFLOW more are opened under load, and a request waits at
+# most DB_POOL_TIMEOUT seconds for a free one. Useful with threaded/async
+# workers; replaces persistent connections (Django doesn't allow both).
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '0'))
+if DB_POOL_SIZE and DATABASES['default'].get('ENGINE', '').endswith('postgresql'):
+    try:
+        import psycopg_pool  # noqa: F401 - comes with psycopg[pool]
+    except ImportError:
+        print('❌ DB_POOL_SIZE needs psycopg 3 (pip install "psycopg[binary,pool]") '
+              '- running without a connection pool')
+    else:
+        DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+            'min_size': DB_POOL_SIZE,
+            'max_size': DB_POOL_SIZE + int(os.getenv('DB_POOL_OVERFLOW', '0')),
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT', '10')),
+        }
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+
+# Read replicas, comma-separated: DATABASE_REPLICA_URLS=postgres://...,postgres://...
+# Catalog reads are spread over them - see speechfun_backend/db_router.py.
+# In tests they mirror "default", so no extra test databases are created.
+REPLICA_DATABASES = []
+for number, url in enumerate(
+        [u.strip() for u in os.getenv('DATABASE_REPLICA_URLS', '').split(',') if u.strip()],
+        start=1):
+    DATABASES[f'replica{number}'] = dj_database_url.parse(
+        url,
+        conn_max_age=DB_CONN_MAX_AGE,
+        conn_health_checks=os.getenv('DB_CONN_HEALTH_CHECKS', 'True') == 'True',
+        test_options={'MIRROR': 'default'},
+    )
+    REPLICA_DATABASES.append(f'replica{number}')
+
+DATABASE_ROUTERS = ['speechfun_backend.db_router.ReplicaRouter']
+# a replica further behind than this is skipped (reads go to the primary)
+REPLICA_MAX_LAG_SECONDS = float(os.getenv('REPLICA_MAX_LAG_SECONDS', '5'))
+# how often each worker re-checks replica lag
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv('REPLICA_LAG_CHECK_INTERVAL', '5'))
+# after a kid saves progress/comments, read them from the primary for this long
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS', '15'))
+
+# Cache - holds the replica "sticky" markers, the search index version,
+# AI helper explanations (and other short-lived data). The default is
+# per-process memory; with several gunicorn workers, use a shared backend, e.g.
+#   CACHE_BACKEND=django.core.cache.backends.redis.RedisCache CACHE_LOCATION=redis://...
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND',
+                             'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# AI helper answers are cached per word this long (users/word_help.py)
+WORD_HELP_CACHE_SECONDS = int(os.getenv('WORD_HELP_CACHE_SECONDS', str(7 * 24 * 3600)))
+
+# Search: 'memory' = per-worker index (challenges/search.py), 'database' =
+# Postgres full-text + trigram with a SQLite fallback (challenges/db_search.py)
+SEARCH_BACKEND = os.getenv('SEARCH_BACKEND', 'memory')
+# each worker checks this often whether another worker changed the catalog
+SEARCH_INDEX_CHECK_INTERVAL = float(os.getenv('SEARCH_INDEX_CHECK_INTERVAL', '10'))
+# ...and rebuilds its index at least this often - the only way it sees other
+# workers' edits when CACHE_BACKEND is the per-process default
+SEARCH_INDEX_MAX_AGE = float(os.getenv('SEARCH_INDEX_MAX_AGE', '300'))
+# 0..1, how close a misspelling must be ('database' backend)
+SEARCH_SIMILARITY_THRESHOLD = float(os.getenv('SEARCH_SIMILARITY_THRESHOLD', '0.5'))
+
+# Progress writes (challenges/attempts.py): 'inline' = the request updates
+# UserProgress itself, 'rollup' = it only appends to the attempt log and
+# `manage.py rollup_attempts` applies it
+PROGRESS_WRITES = os.getenv('PROGRESS_WRITES', 'inline')
+# the rollup leaves attempts younger than this for its next run
+PROGRESS_ROLLUP_LAG_SECONDS = int(os.getenv('PROGRESS_ROLLUP_LAG_SECONDS', '30'))
+# Postgres: monthly partitions of the attempt log created this far ahead
+ATTEMPT_PARTITIONS_AHEAD = int(os.getenv('ATTEMPT_PARTITIONS_AHEAD', '2'))
+
+# /api/batch/: several GETs in one call (speechfun_backend/batch.py)
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '20'))
+BATCH_TIMEOUT_SECONDS = float(os.getenv('BATCH_TIMEOUT_SECONDS', '10'))
+# threads for "parallel": true, shared by all batches of a process - each
+# holds a DB connection while it runs (count them in DB_POOL_SIZE)
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', '4'))
+
+# admin changelists of big tables (speechfun_backend/large_admin.py) count
+# filtered rows up to this many, then stop
+ADMIN_EXACT_COUNT_LIMIT = int(os.getenv('ADMIN_EXACT_COUNT_LIMIT', '10000'))
+
 # Password validation
 # https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
 
@@ -213,6 +368,11 @@ DEFAULT_FROM_EMAIL = os.getenv('EMAIL_FROM', os.getenv('EMAIL_HOST_USER'))
 # Site URL for verification links
 SITE_URL = os.getenv('SITE_URL', 'http://localhost:3000')
 
+# Prometheus: /metrics/ needs "Authorization: Bearer <METRICS_TOKEN>" (or a
+# staff login). Under gunicorn also set PROMETHEUS_MULTIPROC_DIR to an empty
+# directory so all workers' numbers are added up - see gunicorn.conf.py
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '')
+
 
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
@@ -243,6 +403,11 @@ STATICFILES_FINDERS = [
 # Optional but recommended for better performance (compression + caching)
 STATICFILES_STORAGE = 'whitenoise.storage.CompressedManifestStaticFilesStorage'
 
+# Offline bundles (challenges/bundles.py) are written straight into
+# STATIC_ROOT so WhiteNoise serves them (gzipped, cached forever).
+OFFLINE_BUNDLE_ROOT = os.path.join(STATIC_ROOT, 'bundles')
+OFFLINE_BUNDLE_URL = STATIC_URL + 'bundles/'
+
 # cors
 CORS_ALLOWED_ORIGINS = os.environ.get("CORS_ALLOWED_ORIGINS", "").split(",")
 
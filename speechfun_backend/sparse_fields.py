@@ -0,0 +1,147 @@
+# speechfun_backend/sparse_fields.py
+# Sparse fieldsets: ?fields= picks which serializer fields a GET returns.
+#
+#   GET /api/challenges/challenges/12/?fields=id,title
+#   GET /api/challenges/letters/3/challenges/?fields=id,title,word.audio
+#   GET /api/challenges/yes-no-questions/?fields=id,visual_url
+#
+# A dotted name picks fields of a nested serializer ("word.audio" → the
+# word object with only its audio). Unknown names are a 400.
+#
+# It's not only less JSON: the fields left over decide the SQL, too -
+#
+#   only()            loads just the columns those fields read
+#   select_related()  joins only the relations they go through
+#                     (?fields=id,title on a challenge → no word/letter join)
+#
+# so a client asking for two columns doesn't pay for the whole row and
+# every nested object. If a picked field can't be traced back to columns
+# (a SerializerMethodField, a property...) the queryset is left as it was.
+#
+# Use it on generic views:
+#
+#   class WordList(SparseFieldsMixin, generics.ListAPIView): ...
+#
+# (FastListMixin in challenges/fast_serializers.py already includes it.)
+# Writes (POST/PUT/PATCH) ignore ?fields= - trimming a serializer would
+# also drop the fields it validates.
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import ValidationError
+
+
+def parse_fields(value):
+    """'id,word.audio,word.id' → {'id': None, 'word': {'audio': None, 'id': None}}
+
+    None = the whole field (for a nested serializer: all of its fields).
+    """
+    tree = {}
+    for path in value.split(','):
+        path = path.strip()
+        if not path:
+            continue
+        node = tree
+        *parents, leaf = path.split('.')
+        for name in parents:
+            if name in node and node[name] is None:
+                break   # the whole object is already asked for
+            node = node.setdefault(name, {})
+        else:
+            node[leaf] = None
+    return tree
+
+
+def trim_serializer(serializer, tree, prefix=''):
+    """Drop every field of `serializer` (and its nested serializers) not in `tree`."""
+    serializer = getattr(serializer, 'child', serializer)   # many=True
+    fields = serializer.fields
+    readable = [name for name, field in fields.items() if not field.write_only]
+    unknown = [prefix + name for name in tree if name not in readable]
+    if unknown:
+        raise ValidationError({'fields': f"Unknown field(s): {', '.join(unknown)}. "
+                                         f"Choose from {', '.join(prefix + n for n in readable)}."})
+    for name in list(fields):
+        if name not in tree:
+            fields.pop(name)
+    for name, subtree in tree.items():
+        if subtree is None:
+            continue
+        if not isinstance(fields[name], serializers.BaseSerializer):
+            raise ValidationError({'fields': f"{prefix}{name} has no fields of its own."})
+        trim_serializer(fields[name], subtree, prefix=f'{prefix}{name}.')
+    return serializer
+
+
+def _columns(serializer, model, prefix, only, related):
+    """Add the columns/joins `serializer` reads to `only`/`related`.
+    False if some field can't be traced back to model columns."""
+    serializer = getattr(serializer, 'child', serializer)
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if field.source == '*':
+            return False   # SerializerMethodField & co: could read anything
+        current, path = model, prefix
+        for position, attr in enumerate(field.source_attrs):
+            try:
+                model_field = current._meta.get_field(attr)
+            except FieldDoesNotExist:
+                return False   # a property or method
+            only.add(path + attr)
+            last = position == len(field.source_attrs) - 1
+            if not model_field.is_relation:
+                if not last:
+                    return False
+                continue
+            if model_field.many_to_many or model_field.one_to_many:
+                return False
+            if last and not isinstance(field, serializers.BaseSerializer):
+                break   # just the foreign key id (PrimaryKeyRelatedField)
+            related.add(path + attr)
+            current, path = model_field.related_model, f'{path}{attr}__'
+        else:
+            if isinstance(field, serializers.BaseSerializer):
+                if not _columns(field, current, path, only, related):
+                    return False
+    return True
+
+
+def sparse_queryset(queryset, serializer):
+    """`queryset` loading only what the (trimmed) `serializer` shows."""
+    only, related = set(), set()
+    if not _columns(serializer, queryset.model, '', only, related):
+        return queryset
+    queryset = queryset.select_related(None)
+    if related:
+        queryset = queryset.select_related(*sorted(related))
+    return queryset.only(*sorted(only))
+
+
+class SparseFieldsMixin:
+    """For generic views: ?fields= trims the serializer AND the queryset."""
+    fields_param = 'fields'
+
+    def sparse_fields(self):
+        """The parsed ?fields= of a read request, or None (= every field)."""
+        if self.request.method not in permissions.SAFE_METHODS:
+            return None
+        value = self.request.query_params.get(self.fields_param)
+        if value is None:
+            return None
+        tree = parse_fields(value)
+        if not tree:
+            raise ValidationError({'fields': 'Name at least one field.'})
+        return tree
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        tree = self.sparse_fields()
+        if tree is not None:
+            trim_serializer(serializer, tree)
+        return serializer
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.sparse_fields() is None:
+            return queryset
+        return sparse_queryset(queryset, self.get_serializer())
@@ -0,0 +1,347 @@
+# speechfun_backend/stubs.py
+# Local stand-ins for Groq, SendGrid and Cloudinary - for benchmarks, soak
+# tests and working offline. Start them with:
+#
+#   python manage.py run_service_stubs --port 8765
+#
+# and point the app at them (settings.py reads these):
+#
+#   SERVICE_STUBS_URL=http://127.0.0.1:8765   # all three at once, or one by one:
+#   GROQ_BASE_URL=...  SENDGRID_HOST=...  CLOUDINARY_UPLOAD_PREFIX=...
+#
+# One HTTP server answers all three APIs (their URL paths don't overlap):
+#   POST /openai/v1/chat/completions          Groq chat completion
+#   POST /v3/mail/send                        SendGrid mail send (202)
+#   POST /v1_1/<cloud>/<type>/upload          Cloudinary upload (multipart)
+#   GET  /<cloud>/<type>/upload/...           the uploaded bytes, like the CDN
+#   GET  /_stubs/stats                        request/error counts per service
+#   POST /_stubs/config                       change behaviour while running
+#
+# Each service has a behaviour you can tune (env STUB_<SERVICE>_<KEY>,
+# command flags, or POST /_stubs/config):
+#   latency   fixed:MS | uniform:MIN:MAX | lognormal:MEDIAN:SIGMA   (ms)
+#   errors    fraction of requests answered with a 5xx      (0.05 = 5%)
+#   throttle  fraction of requests answered with a 429/420
+#   rps       hard rate limit - requests above it get a 429/420 (0 = none)
+#   hang      fraction of requests that sleep 120s (client timeouts!)
+import email.parser
+import email.policy
+import io
+import json
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+SERVICES = ('groq', 'sendgrid', 'cloudinary')
+
+# Roughly what we see from the real services on a good day
+DEFAULTS = {
+    'groq':       {'latency': 'lognormal:700:0.5', 'errors': 0.0, 'throttle': 0.0,
+                   'rps': 0.0, 'hang': 0.0},
+    'sendgrid':   {'latency': 'lognormal:150:0.4', 'errors': 0.0, 'throttle': 0.0,
+                   'rps': 0.0, 'hang': 0.0},
+    'cloudinary': {'latency': 'lognormal:400:0.6', 'errors': 0.0, 'throttle': 0.0,
+                   'rps': 0.0, 'hang': 0.0},
+}
+HANG_SECONDS = 120
+
+# Cloudinary answers rate limiting with 420, the others with 429
+THROTTLE_STATUS = {'groq': 429, 'sendgrid': 429, 'cloudinary': 420}
+
+
+def parse_latency(spec):
+    """'lognormal:700:0.5' -> function returning a delay in seconds."""
+    kind, *args = str(spec).split(':')
+    args = [float(a) for a in args]
+    if kind == 'fixed':
+        return lambda rng: args[0] / 1000
+    if kind == 'uniform':
+        return lambda rng: rng.uniform(args[0], args[1]) / 1000
+    if kind == 'lognormal':
+        mu, sigma = math.log(args[0]), args[1]
+        return lambda rng: rng.lognormvariate(mu, sigma) / 1000
+    if kind in ('0', 'none'):
+        return lambda rng: 0
+    raise ValueError(f"Unknown latency spec '{spec}' "
+                     f"(use fixed:MS, uniform:MIN:MAX or lognormal:MEDIAN:SIGMA)")
+
+
+def config_from_env(environ=os.environ):
+    """DEFAULTS, overridden by STUB_<SERVICE>_<KEY> environment variables."""
+    config = {service: dict(values) for service, values in DEFAULTS.items()}
+    for service, values in config.items():
+        for key, default in values.items():
+            raw = environ.get(f"STUB_{service.upper()}_{key.upper()}")
+            if raw is not None:
+                values[key] = type(default)(raw)
+    return config
+
+
+class Behaviour:
+    """Latency / faults / rate limit of one stubbed service."""
+
+    def __init__(self, service, latency, errors, throttle, rps, hang, seed=None):
+        self.service = service
+        self.settings = {'latency': latency, 'errors': float(errors),
+                         'throttle': float(throttle), 'rps': float(rps),
+                         'hang': float(hang)}
+        self.delay = parse_latency(latency)
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.tokens = self.settings['rps']
+        self.refilled = time.monotonic()
+        self.stats = {'requests': 0, 'ok': 0, 'errors': 0, 'throttled': 0, 'hung': 0}
+
+    def _rate_limited(self):
+        rps = self.settings['rps']
+        if not rps:
+            return False
+        # token bucket, burst = one second's worth
+        now = time.monotonic()
+        self.tokens = min(rps, self.tokens + (now - self.refilled) * rps)
+        self.refilled = now
+        if self.tokens < 1:
+            return True
+        self.tokens -= 1
+        return False
+
+    def decide(self):
+        """Returns (delay_seconds, outcome) with outcome in
+        'ok' / 'error' / 'throttled' / 'hung'."""
+        with self.lock:
+            self.stats['requests'] += 1
+            roll = self.rng.random()
+            if self._rate_limited() or roll < self.settings['throttle']:
+                outcome = 'throttled'
+            elif roll < self.settings['throttle'] + self.settings['errors']:
+                outcome = 'error'
+            elif roll < (self.settings['throttle'] + self.settings['errors']
+                         + self.settings['hang']):
+                outcome = 'hung'
+            else:
+                outcome = 'ok'
+            self.stats['ok' if outcome == 'ok' else
+                       'errors' if outcome == 'error' else outcome] += 1
+            delay = HANG_SECONDS if outcome == 'hung' else self.delay(self.rng)
+        # throttling answers come back fast, like the real APIs
+        return (0 if outcome == 'throttled' else delay), outcome
+
+
+class StubState:
+    """Everything the request handler threads share."""
+
+    def __init__(self, config, seed=None):
+        self.seed = seed
+        self.behaviours = {}
+        self.configure(config)
+        self.assets = {}            # CDN path -> (content_type, bytes)
+        self.assets_lock = threading.Lock()
+
+    def configure(self, config):
+        for service in SERVICES:
+            merged = dict(DEFAULTS[service])
+            if service in self.behaviours:
+                merged.update(self.behaviours[service].settings)
+            merged.update(config.get(service, {}))
+            # same seed → same run, also after a POST /_stubs/config; one
+            # stream per service so they don't all fail on the same requests
+            seed = None if self.seed is None else f"{self.seed}:{service}"
+            behaviour = Behaviour(service, seed=seed, **merged)
+            if service in self.behaviours:   # keep counting across changes
+                behaviour.stats = self.behaviours[service].stats
+            self.behaviours[service] = behaviour
+
+    def stats(self):
+        return {service: {'config': b.settings, **b.stats}
+                for service, b in self.behaviours.items()}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server_version = 'SpeechFunStubs/1.0'
+    protocol_version = 'HTTP/1.1'   # keep-alive, like the real APIs
+
+    @property
+    def state(self):
+        return self.server.state
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    # --- helpers ------------------------------------------------------------
+
+    def read_body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def send(self, status, body=b'', content_type='application/json', headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def simulate(self, service):
+        """Apply latency and faults. Returns True if a fault was already sent."""
+        delay, outcome = self.state.behaviours[service].decide()
+        time.sleep(delay)
+        if outcome == 'throttled':
+            self.send(THROTTLE_STATUS[service], self.error_body(service, 'Rate limit exceeded'),
+                      headers={'Retry-After': '1'})
+            return True
+        if outcome == 'error':
+            self.send(503, self.error_body(service, 'Service unavailable (stub)'))
+            return True
+        return False
+
+    @staticmethod
+    def error_body(service, message):
+        if service == 'groq':
+            return {'error': {'message': message, 'type': 'stub_error'}}
+        if service == 'sendgrid':
+            return {'errors': [{'message': message, 'field': None}]}
+        return {'error': {'message': message}}
+
+    # --- routing --------------------------------------------------------------
+
+    def do_GET(self):
+        if self.path.startswith('/_stubs/stats'):
+            return self.send(200, self.state.stats())
+        path = self.path.split('?')[0]
+        with self.state.assets_lock:
+            asset = self.state.assets.get(path)
+        if asset is None:
+            return self.send(404, {'error': {'message': 'Resource not found'}})
+        self.send(200, asset[1], content_type=asset[0])
+
+    def do_POST(self):
+        path = self.path.split('?')[0]
+        body = self.read_body()
+        if path == '/_stubs/config':
+            self.state.configure(json.loads(body or b'{}'))
+            return self.send(200, self.state.stats())
+        if path.endswith('/chat/completions'):
+            return self.groq_chat(body)
+        if path == '/v3/mail/send':
+            return self.sendgrid_send(body)
+        parts = path.strip('/').split('/')
+        if len(parts) == 4 and parts[0] == 'v1_1' and parts[3] == 'upload':
+            return self.cloudinary_upload(parts[1], parts[2], body)
+        self.send(404, {'error': {'message': f'No stub for POST {path}'}})
+
+    # --- the three services -------------------------------------------------------
+
+    def groq_chat(self, body):
+        if self.simulate('groq'):
+            return
+        request = json.loads(body or b'{}')
+        prompt = (request.get('messages') or [{}])[-1].get('content', '')
+        content = ("🌟 This is a stub answer! It's a fun word that kids love to say. "
+                   f"(prompt was {len(prompt)} characters)")
+        self.send(200, {
+            'id': f'chatcmpl-{uuid.uuid4().hex}',
+            'object': 'chat.completion',
+            'created': int(time.time()),
+            'model': request.get('model', 'stub-model'),
+            'choices': [{'index': 0, 'finish_reason': 'stop',
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': len(prompt) // 4, 'completion_tokens': 30,
+                      'total_tokens': len(prompt) // 4 + 30},
+        })
+
+    def sendgrid_send(self, body):
+        if self.simulate('sendgrid'):
+            return
+        self.send(202, headers={'X-Message-Id': uuid.uuid4().hex})
+
+    def cloudinary_upload(self, cloud_name, resource_type, body):
+        if self.simulate('cloudinary'):
+            return
+        fields, content, filename = self.parse_multipart(body)
+        ext = os.path.splitext(filename or '')[1].lstrip('.').lower() or 'bin'
+        if resource_type == 'auto':
+            resource_type = ('image' if ext in ('jpg', 'jpeg', 'png', 'gif', 'webp')
+                             else 'video' if ext in ('mp3', 'wav', 'm4a', 'mp4', 'webm', 'mov')
+                             else 'raw')
+        public_id = fields.get('public_id') or uuid.uuid4().hex[:20]
+        if fields.get('folder'):
+            public_id = f"{fields['folder']}/{public_id}"
+        version = int(time.time())
+        cdn_path = f"/{cloud_name}/{resource_type}/upload/v{version}/{public_id}.{ext}"
+        with self.state.assets_lock:
+            self.state.assets[cdn_path] = (self.guess_type(resource_type, ext), content)
+
+        result = {
+            'public_id': public_id, 'version': version, 'format': ext,
+            'resource_type': resource_type, 'type': 'upload', 'bytes': len(content),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            'url': f"http://{self.headers.get('Host')}{cdn_path}",
+            'secure_url': f"http://{self.headers.get('Host')}{cdn_path}",
+        }
+        if resource_type == 'image':
+            try:
+                from PIL import Image
+                with Image.open(io.BytesIO(content)) as image:
+                    result['width'], result['height'] = image.size
+            except Exception:
+                pass
+        self.send(200, result)
+
+    def parse_multipart(self, body):
+        """Returns ({field: value}, file_bytes, filename) of a multipart upload."""
+        message = email.parser.BytesParser(policy=email.policy.HTTP).parsebytes(
+            f"Content-Type: {self.headers.get('Content-Type')}\r\n\r\n".encode() + body)
+        fields, content, filename = {}, b'', None
+        for part in message.iter_parts():
+            name = part.get_param('name', header='content-disposition')
+            payload = part.get_payload(decode=True) or b''
+            if name == 'file':
+                content, filename = payload, part.get_filename()
+            elif name:
+                fields[name] = payload.decode('utf-8', 'replace')
+        return fields, content, filename
+
+    @staticmethod
+    def guess_type(resource_type, ext):
+        if ext == 'mp3':
+            return 'audio/mpeg'
+        if ext == 'jpg':
+            return 'image/jpeg'
+        if resource_type in ('image', 'video'):
+            return f"{resource_type}/{ext}"
+        return 'application/octet-stream'
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, config=None, seed=None, verbose=False):
+        super().__init__(address, StubHandler)
+        self.state = StubState(config or config_from_env(), seed)
+        self.verbose = verbose
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+
+def start_in_thread(host='127.0.0.1', port=0, config=None, seed=None):
+    """Run the stubs in a background thread (port=0 picks a free port).
+    Handy in tests and benchmarks:
+
+        server = start_in_thread(config={'groq': {'latency': 'fixed:50'}})
+        ... use server.url ...
+        server.shutdown()
+    """
+    server = StubServer((host, port), config, seed)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
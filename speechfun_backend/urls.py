@@ -18,13 +18,19 @@ from django.contrib import admin
 from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
-from .views import health
+from .batch import batch
+from .views import health, health_outbound, metrics
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('health/', health),  # ✅ health endpoint here
+    path('health/outbound/', health_outbound, name='health-outbound'),  # circuit breakers
+    path('metrics/', metrics, name='metrics'),  # Prometheus (token or staff only)
     path('api/challenges/', include('challenges.urls')),
+    # async versions of the hot endpoints, for uvicorn workers (see asgi.py)
+    path('api/async/challenges/', include('challenges.async_urls')),
     path('api/users/', include('users.urls')),
+    path('api/batch/', batch, name='batch'),  # several GETs in one call (batch.py)
     path('accounts/', include('allauth.urls')),  # For Google/social auth.
 
 ]
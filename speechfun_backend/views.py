@@ -1,6 +1,33 @@
-from django.http import JsonResponse
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
+
+from . import outbound
+from .metrics import render_latest
 # for ping on uptime robot so my free tier service doesnt sleep!
 
 
 def health(request):
     return JsonResponse({"status": "ok"})
+
+
+# Circuit breakers of the outside services, as seen by THIS worker process
+# (each gunicorn worker has its own - /metrics/ has all of them).
+def health_outbound(request):
+    return JsonResponse(outbound.snapshot())
+
+
+# Prometheus scrapes this. Not public: either send
+#   Authorization: Bearer <METRICS_TOKEN>
+# or be logged into the admin as staff (handy for a quick look in the browser).
+def metrics(request):
+    auth = request.headers.get('Authorization', '')
+    token_ok = bool(settings.METRICS_TOKEN) and hmac.compare_digest(
+        auth, f"Bearer {settings.METRICS_TOKEN}")
+    staff_ok = request.user.is_authenticated and request.user.is_staff
+    if not (token_ok or staff_ok):
+        return JsonResponse({"detail": "Forbidden"}, status=403)
+
+    body, content_type = render_latest()
+    return HttpResponse(body, content_type=content_type)
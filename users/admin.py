@@ -6,6 +6,8 @@ from .models import Profile
 class ProfileAdmin(admin.ModelAdmin):
     list_display = ('user', 'bio_short')
     search_fields = ('user__username', 'user__email', 'bio')
+    list_select_related = ('user',)
+    autocomplete_fields = ('user',)
 
     def bio_short(self, obj):
         return obj.bio[:50] + '...' if len(obj.bio) > 50 else obj.bio
@@ -2,6 +2,7 @@ import traceback
 from sendgrid import SendGridAPIClient
 from sendgrid.helpers.mail import Mail
 from django.conf import settings
+from speechfun_backend.outbound import outbound_call
 
 
 def send_verification_email(user, token):
@@ -74,8 +75,11 @@ def send_verification_email(user, token):
     )
 
     try:
-        sg = SendGridAPIClient(settings.EMAIL_HOST_PASSWORD)
-        response = sg.send(message)
+        sg = SendGridAPIClient(settings.EMAIL_HOST_PASSWORD, host=settings.SENDGRID_HOST)
+        # timeout + circuit breaker: a slow SendGrid must not hang registration
+        with outbound_call('sendgrid') as policy:
+            sg.client.timeout = policy.timeout
+            response = sg.send(message)
 
         print(f"✅ SendGrid accepted email")
         print(f"   Status code: {response.status_code}")
@@ -1,3 +1,196 @@
-from django.test import TestCase
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+
+from challenges.seeding import seed_catalog, seed_users
+from speechfun_backend.outbound import OutboundUnavailable, guard, reset_guards
+from speechfun_backend.query_budgets import QueryBudgetTestCase
+from .models import Profile, EmailVerificationToken
+from . import urls as users_urls
+
+
+# Every endpoint in users/urls.py, with a catalog and 200 other accounts in
+# the database. SendGrid and Groq are mocked - we measure our code, not theirs.
+# Budgets live in speechfun_backend/query_budgets.py.
+class UsersQueryBudgetTests(QueryBudgetTestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        seed_catalog()
+        cls.users = seed_users(200)
+        cls.user = cls.users[0]
+        cls.token = Token.objects.get(user=cls.user).key
+        Profile.objects.create(user=cls.user, bio='Loves the letter S')
+
+    def auth(self):
+        return {'HTTP_AUTHORIZATION': f'Token {self.token}'}
+
+    def test_every_url_has_a_budget(self):
+        self.assertAllUrlsBudgeted(users_urls.urlpatterns)
+
+    @mock.patch('users.views.send_verification_email', return_value=True)
+    def test_register(self, send_email):
+        self.assertWithinBudget('register', lambda: self.client.post(
+            reverse('register'),
+            {'username': 'newkid', 'email': 'newkid@example.com',
+             'password': 'a-long-password-123'},
+            content_type='application/json'))
+        send_email.assert_called_once()
+
+    def test_login(self):
+        response = self.assertWithinBudget('login', lambda: self.client.post(
+            reverse('login'),
+            {'username': self.user.username, 'password': 'speechfun-pass'},
+            content_type='application/json'))
+        self.assertEqual(response.json()['token'], self.token)
+
+    def test_profile(self):
+        response = self.assertWithinBudget(
+            'profile', lambda: self.client.get(reverse('profile'), **self.auth()))
+        self.assertEqual(response.json()['bio'], 'Loves the letter S')
+
+    def test_profile_sparse_fields(self):
+        response = self.assertWithinBudget('profile', lambda: self.client.get(
+            reverse('profile') + '?fields=bio,user.username', **self.auth()))
+        self.assertEqual(response.json(), {'user': {'username': self.user.username},
+                                           'bio': 'Loves the letter S'})
+
+    def test_get_or_create_token(self):
+        self.assertWithinBudget('get-or-create-token', lambda: self.client.post(
+            reverse('get-or-create-token'), {'email': self.user.email},
+            content_type='application/json'))
+
+    def test_verify_email(self):
+        inactive = seed_users(1, prefix='newbie', active=False)[0]
+        token = EmailVerificationToken.objects.create(user=inactive)
+        url = reverse('verify-email') + f'?token={token.token}'
+        self.assertWithinBudget('verify-email', lambda: self.client.get(url))
+        inactive.refresh_from_db()
+        self.assertTrue(inactive.is_active)
+
+    @mock.patch.dict('os.environ', {'GROQ_API_KEY': 'test-key'})
+    @mock.patch('users.views.Groq')
+    def test_ai_help(self, groq):
+        cache.clear()   # a cached explanation would skip Groq (word_help.py)
+        message = SimpleNamespace(content='A sun is a big hot star! ☀️')
+        groq.return_value.chat.completions.create.return_value = SimpleNamespace(
+            choices=[SimpleNamespace(message=message)])
+        response = self.assertWithinBudget('ai-help', lambda: self.client.post(
+            reverse('ai-help'), {'word': 'sun'}, content_type='application/json'))
+        self.assertEqual(response.json()['explanation'], message.content)
+
+    @mock.patch.dict('os.environ', {'GROQ_API_KEY': 'test-key'})
+    @mock.patch('users.views.Groq')
+    def test_ai_help_is_cached(self, groq):
+        cache.clear()
+        message = SimpleNamespace(content='A sun is a big hot star! ☀️')
+        groq.return_value.chat.completions.create.return_value = SimpleNamespace(
+            choices=[SimpleNamespace(message=message)])
+        for word in ['sun', ' Sun ']:
+            response = self.client.post(reverse('ai-help'), {'word': word},
+                                        content_type='application/json')
+            self.assertEqual(response.json()['explanation'], message.content)
+        # the second kid got the stored answer, Groq was asked once
+        self.assertEqual(groq.return_value.chat.completions.create.call_count, 1)
+
+
+# The AI helper must fail fast (no Groq call at all) once Groq keeps failing,
+# instead of tying up a worker per request - see speechfun_backend/outbound.py
+@override_settings(OUTBOUND_SERVICES={
+    **settings.OUTBOUND_SERVICES,
+    'groq': {**settings.OUTBOUND_SERVICES['groq'],
+             'failure_threshold': 2, 'reset_timeout': 60},
+})
+@mock.patch.dict('os.environ', {'GROQ_API_KEY': 'test-key'})
+class GroqCircuitBreakerTests(TestCase):
+
+    def setUp(self):
+        cache.clear()   # no explanation of 'sun' left over from another test
+        reset_guards()
+        self.addCleanup(reset_guards)
+
+    def ask(self):
+        return self.client.post(reverse('ai-help'), {'word': 'sun'},
+                                content_type='application/json')
+
+    @mock.patch('users.views.Groq')
+    def test_breaker_opens_after_repeated_failures(self, groq):
+        groq.return_value.chat.completions.create.side_effect = TimeoutError('slow')
+
+        self.assertEqual(self.ask().status_code, 500)
+        self.assertEqual(self.ask().status_code, 500)
+        self.assertEqual(groq.return_value.chat.completions.create.call_count, 2)
+
+        response = self.ask()   # breaker is open now
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(groq.return_value.chat.completions.create.call_count, 2)
+
+        state = self.client.get(reverse('health-outbound')).json()['groq']
+        self.assertEqual(state['state'], 'open')
+        self.assertEqual(state['rejected']['breaker_open'], 1)
+
+    @mock.patch('users.views.Groq')
+    def test_half_open_trial_closes_the_breaker(self, groq):
+        create = groq.return_value.chat.completions.create
+        create.side_effect = TimeoutError('slow')
+        self.ask()
+        self.ask()
+
+        create.side_effect = None
+        create.return_value = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content='Hi! ☀️'))])
+        with mock.patch('speechfun_backend.outbound.time.monotonic',
+                        return_value=time.monotonic() + 61):
+            self.assertEqual(self.ask().status_code, 200)
+        self.assertEqual(guard('groq').state, 'closed')
+
+    @mock.patch('users.views.Groq')
+    def test_client_errors_do_not_open_the_breaker(self, groq):
+        error = Exception('bad request')
+        error.status_code = 400
+        groq.return_value.chat.completions.create.side_effect = error
+        for _ in range(3):
+            self.assertEqual(self.ask().status_code, 500)
+        self.assertEqual(guard('groq').state, 'closed')
+
+
+# A full bulkhead turns requests away from many threads at once; every one of
+# them must show up in the rejected counts on /health/outbound/.
+@override_settings(OUTBOUND_SERVICES={
+    **settings.OUTBOUND_SERVICES,
+    'groq': {**settings.OUTBOUND_SERVICES['groq'],
+             'max_concurrent': 1, 'queue_timeout': 0},
+})
+class BulkheadTests(TestCase):
+
+    def setUp(self):
+        reset_guards()
+        self.addCleanup(reset_guards)
+
+    def test_concurrent_rejections_are_all_counted(self):
+        groq = guard('groq')
+
+        def knock():
+            for _ in range(500):
+                try:
+                    with groq.call():
+                        pass
+                except OutboundUnavailable:
+                    pass
+
+        with groq.call():   # holds the only slot
+            threads = [threading.Thread(target=knock) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(groq.snapshot()['rejected']['bulkhead_full'], 8 * 500)
+        self.assertEqual(groq.snapshot()['in_flight'], 0)
@@ -7,11 +7,15 @@ from rest_framework.authtoken.models import Token
 from rest_framework.views import APIView
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.views.decorators.csrf import csrf_exempt
 from .models import Profile, EmailVerificationToken
 from .serializers import UserSerializer, RegisterSerializer, LoginSerializer, ProfileSerializer
 from .emails import send_verification_email
+from .word_help import cached_explanation, remember_explanation
+from speechfun_backend.outbound import OutboundUnavailable, outbound_call
+from speechfun_backend.sparse_fields import SparseFieldsMixin
 
 
 # Create your views here.
@@ -81,7 +85,8 @@ class VerifyEmailView(APIView):
             return Response({"detail": "Token is required"}, status=400)
 
         try:
-            token_obj = EmailVerificationToken.objects.get(token=token_str)
+            token_obj = EmailVerificationToken.objects.select_related(
+                'user').get(token=token_str)
         except EmailVerificationToken.DoesNotExist:
             return Response({"detail": "Invalid token"}, status=400)
 
@@ -128,12 +133,14 @@ class LoginView(APIView):
         })
 
 
-class ProfileView(generics.RetrieveUpdateAPIView):
+class ProfileView(SparseFieldsMixin, generics.RetrieveUpdateAPIView):
+    # GET ?fields=bio → just the bio, no user join (speechfun_backend/sparse_fields.py)
     serializer_class = ProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return Profile.objects.get(user=self.request.user)
+        return (self.filter_queryset(Profile.objects.select_related('user'))
+                .get(user=self.request.user))
 
 
 @api_view(['POST'])
@@ -171,6 +178,11 @@ def get_word_help(request):
     if not word:
         return Response({'error': 'Word is required'}, status=400)
 
+    # explained before? no need to ask Groq again (see word_help.py)
+    explanation = cached_explanation(word)
+    if explanation is not None:
+        return Response({'explanation': explanation})
+
     try:
         # Get API key from environment
         api_key = os.getenv('GROQ_API_KEY')
@@ -178,35 +190,46 @@ def get_word_help(request):
             print("❌ GROQ_API_KEY not found in environment")
             return Response({'error': 'AI helper not configured'}, status=500)
 
-        # Initialize Groq client
-        client = Groq(api_key=api_key)
-
         print(f"🤖 Getting AI help for word: {word}")
 
-        # Call Groq API
-        chat_completion = client.chat.completions.create(
-            messages=[
-                {
-                    "role": "user",
-                    "content": f"""You are a friendly AI helper for kids ages 5-8 learning speech. 
+        prompt = f"""You are a friendly AI helper for kids ages 5-8 learning speech. 
                     Explain the word "{word}" in a fun, simple way. Include:
                     1. What it means (in 1 simple sentence)
                     2. A fun example sentence using the word
                     3. One fun fact about it
 
                     Keep it under 50 words total. Be enthusiastic and use emojis!"""
-                }
-            ],
-            model="llama-3.3-70b-versatile",  # Groq's best free model
-            max_tokens=200,
-            temperature=0.7,
-        )
+
+        # Call Groq API - with a timeout and circuit breaker, so a slow Groq
+        # can't block every worker (see speechfun_backend/outbound.py)
+        with outbound_call('groq') as policy:
+            client = Groq(api_key=api_key, base_url=settings.GROQ_BASE_URL,
+                          timeout=policy.timeout, max_retries=policy.retries)
+            chat_completion = client.chat.completions.create(
+                messages=[
+                    {
+                        "role": "user",
+                        "content": prompt
+                    }
+                ],
+                model="llama-3.3-70b-versatile",  # Groq's best free model
+                max_tokens=200,
+                temperature=0.7,
+            )
 
         explanation = chat_completion.choices[0].message.content
         print(f"✅ AI response: {explanation[:100]}...")
+        remember_explanation(word, explanation)
 
         return Response({'explanation': explanation})
 
+    except OutboundUnavailable as e:
+        # Groq is down or overloaded: answer right away instead of waiting
+        print(f"❌ AI skipped: {e}")
+        return Response({
+            'error': 'AI helper is taking a break. Try again in a moment! 😊'
+        }, status=503)
+
     except Exception as e:
         print(f"❌ AI error: {type(e).__name__}: {e}")
         traceback.print_exc()
@@ -0,0 +1,31 @@
+# users/word_help.py
+# Cache of the AI helper's explanations (get_word_help in views.py).
+#
+# "sun" gets the same explanation whoever asks, but every Groq call takes
+# about a second and counts against the rate limit. So once a word has been
+# explained, the answer is kept for WORD_HELP_CACHE_SECONDS: the next kid
+# gets it instantly, and /api/challenges/lesson/<id>/ can include it
+# without calling Groq at all.
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from speechfun_backend.metrics import record_cache
+
+
+def cache_key(word):
+    # hashed: keys with spaces/emoji/accents aren't valid for every backend
+    normalized = ' '.join(str(word).lower().split())
+    return 'word-help:' + hashlib.sha256(normalized.encode('utf-8')).hexdigest()[:32]
+
+
+def cached_explanation(word):
+    """The stored explanation of `word`, or None."""
+    explanation = cache.get(cache_key(word))
+    record_cache('word_help', explanation is not None)
+    return explanation
+
+
+def remember_explanation(word, explanation):
+    cache.set(cache_key(word), explanation, settings.WORD_HELP_CACHE_SECONDS)